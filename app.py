@@ -1,10 +1,31 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
 import datetime
-import json
 import logging
+import array
 import asyncio
+import atexit
+import codecs
+import concurrent.futures
+import functools
+import gc
+import hashlib
+import hmac
+import inspect
+import ipaddress
+import itertools
+import queue
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
 from werkzeug.exceptions import BadRequest
 
 
@@ -13,18 +34,40 @@ from werkzeug.exceptions import BadRequest
 # - Document ingestion and retrieval logic is modular and ready for extension
 import uuid
 
+# PDF parsing: PyMuPDF extracts text far faster than pypdf; pypdf stays as
+# the fallback for environments without the PyMuPDF wheel.
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
 try:
     from pypdf import PdfReader
 except ImportError:
     PdfReader = None
 
-from supabase_client import add_document_to_supabase, search_documents_supabase, supabase as supabase_client
+# orjson serializes responses and audit outputs several times faster than the
+# stdlib encoder; without it everything falls back to json.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from text_chunks import INGEST_CHUNK_CHARS, INGEST_EMBED_BATCH, iter_text_chunks
+from supabase_client import add_documents_to_supabase, search_documents_supabase, supabase as supabase_client
 from graphiti_client import (
-    add_episode, 
-    search_graph, 
-    get_temporal_context,
+    add_episode_async,
+    search_graph_async,
+    get_temporal_context_async,
+    serialize as serialize_graph_result,
     GRAPHITI_AVAILABLE
 )
+try:
+    from llm_provider import llm_config
+    _LLM_CONFIG_ERROR = None
+except Exception as e:
+    llm_config = None
+    _LLM_CONFIG_ERROR = str(e)
 from crawl4ai_source import (
     CrawlJobManager,
     CrawlJobRequest,
@@ -34,7 +77,77 @@ from crawl4ai_source import (
 # - Output folder is consistent for audit and onboarding
 # - Logging is enabled for production safety
 
-app = Flask(__name__)
+# Long-lived event loop shared by every async view. Spinning up a fresh loop per
+# request (asyncio.run / asgiref) pays loop setup and teardown on each call and
+# kills any task a handler schedules, e.g. the job task from start_job.
+_LOOP = asyncio.new_event_loop()
+threading.Thread(target=_LOOP.run_forever, name="ragflow-event-loop", daemon=True).start()
+
+
+# Longest an async view may run before its request gets a 504. gthread workers
+# heartbeat from their main loop, so gunicorn's timeout never catches a request
+# thread stuck waiting on a hung Graphiti, Ollama or Supabase call.
+VIEW_TIMEOUT = float(os.getenv("RAGFLOW_VIEW_TIMEOUT", "120"))
+
+
+def _run(coro, timeout=None):
+    """Run a coroutine on the shared event loop and block until it finishes.
+
+    If it is still running after timeout seconds, it is cancelled and
+    concurrent.futures.TimeoutError is raised.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _LOOP)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        if future.done():
+            raise  # The coroutine itself raised TimeoutError
+        future.cancel()
+        raise
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson when it is installed.
+
+    Dataclasses (e.g. CrawlJobResponse) are serialized natively. Types orjson
+    does not handle the way Flask does (dates, Decimal, ...) go through
+    Flask's default hook, and anything orjson rejects falls back to the
+    stdlib encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.keys() - {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+
+class RagflowFlask(Flask):
+    """Flask app that executes async views on the shared event loop."""
+
+    json_provider_class = OrjsonProvider
+
+    def async_to_sync(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return _run(func(*args, **kwargs), timeout=VIEW_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                # Work already handed to asyncio.to_thread finishes in the
+                # background, but this request thread is free again
+                logging.error(f"{request.path} timed out after {VIEW_TIMEOUT:.0f}s")
+                return jsonify({"error": "Request timed out."}), 504
+        return wrapper
+
+
+app = RagflowFlask(__name__)
 
 # Security: Restrict CORS to specific origins
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
@@ -52,50 +165,97 @@ app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
 OUTPUT_DIR = os.path.join(os.getcwd(), "outputs")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Initialize CrawlJobManager with Supabase client
+# Initialize CrawlJobManager with the module-global Supabase client, so crawl
+# jobs share its pooled HTTP session instead of opening their own connections
 crawl_manager = CrawlJobManager(supabase_client)
 
 # Configuration directory for bootstrap files (can be mounted as a Docker volume)
 # Default is /data/application but can be overridden with the RAGFLOW_CONFIG_DIR env var.
 CONFIG_DIR = os.getenv("RAGFLOW_CONFIG_DIR", "/data/application")
 
-def _is_safe_path(base_dir: str, path: str) -> bool:
-    """Ensure the resolved path is inside base_dir to avoid directory traversal."""
+def _is_safe_path(base_real: str, path: str) -> bool:
+    """Ensure path resolves inside base_real to avoid directory traversal.
+
+    base_real must already be a realpath; callers resolve CONFIG_DIR once
+    instead of per file.
+    """
+    target = os.path.realpath(path)
+    return target == base_real or target.startswith(os.path.join(base_real, ""))
+
+# Process-local LRU of config lookups: key -> (dir_sig, file_sig, value).
+# dir_sig holds st_mtime_ns of the scanned directories and file_sig the
+# (path, st_mtime_ns) of every file read into value, so an unchanged config dir
+# costs a handful of stat calls and no listdir/open/read. Keys include caller
+# supplied app and file names, so the cache is bounded and empty results are
+# never stored.
+CFG_CACHE_SIZE = 256
+_CFG_CACHE: OrderedDict[tuple, tuple[tuple, tuple, object]] = OrderedDict()
+_cfg_cache_lock = threading.Lock()
+
+def _mtime_ns(path: str | None) -> int | None:
+    if path is None:
+        return None
     try:
-        base = os.path.abspath(base_dir)
-        target = os.path.abspath(path)
-        return os.path.commonpath([base]) == os.path.commonpath([base, target])
-    except Exception:
-        return False
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _dir_signature(dirs: tuple) -> tuple:
+    return tuple(_mtime_ns(d) for d in dirs)
+
+def _get_cached_config(key: tuple, dirs: tuple):
+    with _cfg_cache_lock:
+        cached = _CFG_CACHE.get(key)
+        if cached is None:
+            return None
+        _CFG_CACHE.move_to_end(key)
+    dir_sig, file_sig, value = cached
+    if _dir_signature(dirs) != dir_sig:
+        return None
+    if any(_mtime_ns(p) != mtime for p, mtime in file_sig):
+        return None
+    return value
+
+def _put_cached_config(key: tuple, dir_sig: tuple, file_sig: tuple, value) -> None:
+    if not value:
+        return
+    with _cfg_cache_lock:
+        _CFG_CACHE[key] = (dir_sig, file_sig, value)
+        _CFG_CACHE.move_to_end(key)
+        while len(_CFG_CACHE) > CFG_CACHE_SIZE:
+            _CFG_CACHE.popitem(last=False)
+
+def _scan_files(directory: str) -> list[str]:
+    """Return the regular files (symlinks followed) directly inside directory."""
+    with os.scandir(directory) as it:
+        return [entry.path for entry in it if entry.is_file()]
 
 def list_config_files(app_name: str | None = None) -> list:
     """List config files in CONFIG_DIR.
 
     If app_name is provided, prefer files in a subdirectory named after the app
     (e.g., /data/application/myapp/). Otherwise, return all files at top level.
-    Returns a list of absolute paths.
+    Returns a list of absolute paths. Results are cached until the config
+    directory (or the app subdirectory) changes.
     """
-    files = []
     try:
-        base = os.path.abspath(CONFIG_DIR)
+        base = os.path.realpath(CONFIG_DIR)
         if not os.path.isdir(base):
             return []
-        # If app-specific dir exists, prefer it
-        if app_name:
-            safe_app = os.path.basename(app_name)
-            app_dir = os.path.join(base, safe_app)
-            if os.path.isdir(app_dir):
-                for entry in os.listdir(app_dir):
-                    p = os.path.join(app_dir, entry)
-                    if os.path.isfile(p) and _is_safe_path(base, p):
-                        files.append(p)
-                return sorted(files)
-        # Fallback: top-level files
-        for entry in os.listdir(base):
-            p = os.path.join(base, entry)
-            if os.path.isfile(p) and _is_safe_path(base, p):
-                files.append(p)
-        return sorted(files)
+        app_key = os.path.basename(app_name) if app_name else None
+        app_dir = os.path.join(base, app_key) if app_key else None
+        dirs = (base, app_dir)
+        key = ("list", base, app_key)
+        cached = _get_cached_config(key, dirs)
+        if cached is not None:
+            return list(cached)
+        # Take the signature before scanning so a change mid-scan invalidates it
+        dir_sig = _dir_signature(dirs)
+        # If app-specific dir exists, prefer it; fallback: top-level files
+        scan_dir = app_dir if app_dir and os.path.isdir(app_dir) else base
+        files = sorted(p for p in _scan_files(scan_dir) if _is_safe_path(base, p))
+        _put_cached_config(key, dir_sig, (), files)
+        return list(files)
     except Exception as e:
         logging.error(f"Error listing config files: {e}")
         return []
@@ -107,30 +267,35 @@ def load_config_file(filename: str | None = None, app_name: str | None = None) -
     or top-level). If not provided, return a mapping of filename->content for all
     files found for the app (or top-level files).
 
-    Returns a dict {relative_filename: content}.
+    Returns a dict {relative_filename: content}. Results are cached until the
+    directory or one of the loaded files changes.
     """
-    base = os.path.abspath(CONFIG_DIR)
+    base = os.path.realpath(CONFIG_DIR)
     if not os.path.isdir(base):
         return {}
     results = {}
     candidates = []
     try:
+        app_key = os.path.basename(app_name) if app_name else None
+        app_dir = os.path.join(base, app_key) if app_key else None
+        dirs = (base, app_dir)
+        key = ("load", base, app_key, filename)
+        cached = _get_cached_config(key, dirs)
+        if cached is not None:
+            return dict(cached)
+
+        # Take the signature before scanning so a change mid-scan invalidates it
+        dir_sig = _dir_signature(dirs)
         # Build candidate list
-        if app_name:
-            safe_app = os.path.basename(app_name)
-            app_dir = os.path.join(base, safe_app)
-            if os.path.isdir(app_dir):
-                for entry in os.listdir(app_dir):
-                    candidates.append(os.path.join(app_dir, entry))
+        if app_dir and os.path.isdir(app_dir):
+            candidates.extend(_scan_files(app_dir))
         # add top-level files too
-        for entry in os.listdir(base):
-            candidates.append(os.path.join(base, entry))
+        candidates.extend(_scan_files(base))
 
         # filter unique, safe, and files only
         seen = set()
+        file_sig = []
         for p in sorted(set(candidates)):
-            if not os.path.isfile(p):
-                continue
             if not _is_safe_path(base, p):
                 logging.warning(f"Skipping unsafe config path: {p}")
                 continue
@@ -140,13 +305,15 @@ def load_config_file(filename: str | None = None, app_name: str | None = None) -
             if rel in seen:
                 continue
             seen.add(rel)
+            file_sig.append((p, _mtime_ns(p)))
             try:
                 with open(p, "r", encoding="utf-8") as fh:
                     content = fh.read()
                 results[rel] = content
             except Exception as e:
                 logging.error(f"Failed to read config file {p}: {e}")
-        return results
+        _put_cached_config(key, dir_sig, tuple(file_sig), results)
+        return dict(results)
     except Exception as e:
         logging.error(f"Error loading config files: {e}")
         return {}
@@ -160,7 +327,24 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s %(message)s"
 )
 
-def log_output(filename, content):
+# Warm the config cache so the first /config request does not pay for the scan
+load_config_file()
+
+# Timestamp used to name output files. The formatted string only changes once
+# a second, so format it once per second instead of on every request.
+_OUTPUT_TS_FORMAT = "%Y%m%d_%H%M%S"
+_output_ts: tuple[int, str] = (-1, "")
+
+def output_timestamp() -> str:
+    global _output_ts
+    now = int(time.time())
+    second, formatted = _output_ts
+    if second != now:
+        formatted = time.strftime(_OUTPUT_TS_FORMAT, time.localtime(now))
+        _output_ts = (now, formatted)
+    return formatted
+
+def _write_output(filename, content):
     # Sanitize filename for contributor safety
     safe_filename = os.path.basename(filename)
     path = os.path.join(OUTPUT_DIR, safe_filename)
@@ -171,6 +355,38 @@ def log_output(filename, content):
     except Exception as e:
         logging.error(f"Failed to write output: {e}")
 
+# Output files are audit copies, not part of the response, so they are written
+# by a background thread instead of inside the request. When the queue is full
+# new entries are dropped (and counted) rather than blocking the handler.
+OUTPUT_QUEUE_SIZE = 1024
+_output_queue: queue.Queue[tuple[str, str]] = queue.Queue(maxsize=OUTPUT_QUEUE_SIZE)
+_dropped_outputs = 0
+
+def _drain_outputs():
+    while True:
+        filename, content = _output_queue.get()
+        try:
+            _write_output(filename, content)
+        finally:
+            _output_queue.task_done()
+
+threading.Thread(target=_drain_outputs, name="ragflow-output-writer", daemon=True).start()
+# Flush whatever is still queued before the interpreter exits
+atexit.register(_output_queue.join)
+
+def to_output_json(obj) -> str:
+    """Serialize obj as indented JSON for an output file."""
+    return app.json.dumps(obj, indent=2)
+
+def log_output(filename, content):
+    """Queue content to be written to OUTPUT_DIR by the background writer."""
+    global _dropped_outputs
+    try:
+        _output_queue.put_nowait((filename, content))
+    except queue.Full:
+        _dropped_outputs += 1
+        logging.warning(f"Output queue full, dropped {filename} ({_dropped_outputs} dropped so far)")
+
 # Security: Add security headers to all responses
 @app.after_request
 def set_security_headers(response):
@@ -184,26 +400,33 @@ def set_security_headers(response):
 
 # Helper to determine the 'app' context from a request:
 def get_app_context_from_request(req) -> str | None:
-    # Priority: X-APP header -> JSON body 'app' -> query param 'app'
-    app = req.headers.get("X-APP")
+    # Priority: X-APP header -> query param 'app' -> JSON body 'app'.
+    # The body is only parsed when neither cheap source is set; get_json caches
+    # the result, so a handler reading the body afterwards does not decode again.
+    app = req.headers.get("X-APP") or req.args.get("app")
     if app:
         return app
     try:
-        j = req.get_json(silent=True) or {}
+        j = req.get_json(silent=True, cache=True) or {}
         if isinstance(j, dict) and j.get("app"):
             return j.get("app")
     except Exception as e:
         logging.debug(f"Failed to parse JSON body for app context: {e}")
-    app = req.args.get("app")
-    return app
+    return None
+
+@functools.lru_cache(maxsize=1)
+def _provider_info() -> dict:
+    """LLM provider details, computed once; failures are not cached."""
+    if llm_config is None:
+        raise RuntimeError(_LLM_CONFIG_ERROR)
+    return llm_config.get_provider_info()
 
 # Health check endpoint with LLM provider information
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint showing system status and LLM provider info."""
     try:
-        from llm_provider import llm_config
-        provider_info = llm_config.get_provider_info()
+        provider_info = _provider_info()
     except Exception as e:
         provider_info = {
             "provider": "unknown",
@@ -219,9 +442,19 @@ def health_check():
         "neo4j_uri": os.getenv("NEO4J_URI", "not configured"),
         "supabase_configured": bool(os.getenv("SUPABASE_URL")),
         "crawl4ai_available": True,  # Crawl4AI is now integrated
-        "timestamp": datetime.datetime.now().isoformat()
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds")
     })
 
+# Drop the cached provider info so the next /health reflects config changes.
+@app.route("/health/refresh", methods=["POST"])
+def health_refresh():
+    if not authenticate():
+        return jsonify({"error": "Unauthorized"}), 401
+    _provider_info.cache_clear()
+    if llm_config is not None:
+        llm_config.clear_cached_configs()
+    return jsonify({"message": "Provider info cache cleared"})
+
 # Debug endpoint to view loaded config for the current request's app context.
 # This is API-key protected and contributor-friendly (read-only).
 @app.route("/config", methods=["GET"])
@@ -235,23 +468,161 @@ def config_view():
         return jsonify({"configs": {}, "message": "No config files found for the provided context."})
     return jsonify({"configs": configs})
 
+# Only the head of an ingested document is sent to Graphiti for entity
+# extraction; chunk sizes live in text_chunks.
+GRAPH_EPISODE_MAX_CHARS = 10000
+UPLOAD_READ_SIZE = 64 * 1024
+# A full collection stalls the shared event loop, so it only runs after
+# parsing a PDF upload at least this large
+INGEST_GC_MIN_BYTES = int(os.getenv("RAGFLOW_INGEST_GC_MIN_BYTES", str(10 * 1024 * 1024)))
+
+def iter_text_upload(file, read_size: int = UPLOAD_READ_SIZE):
+    """Decode an uploaded text file incrementally, read_size bytes at a time.
+
+    The file is decoded as UTF-8; if it turns out not to be, everything from
+    the first invalid byte on is decoded as latin-1 instead.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while block := file.stream.read(read_size):
+        try:
+            text = decoder.decode(block)
+        except UnicodeDecodeError as e:
+            data = decoder.getstate()[0] + block
+            decoder = codecs.getincrementaldecoder("latin-1")()
+            text = data[:e.start].decode("utf-8") + decoder.decode(data[e.start:])
+        if text:
+            yield text
+    try:
+        text = decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        # Truncated multi-byte sequence at the very end of the file
+        text = decoder.getstate()[0].decode("latin-1")
+    if text:
+        yield text
+
+def iter_pdf_pages(file):
+    """Open an uploaded PDF and return an iterator over its page texts.
+
+    The document is opened eagerly so malformed PDFs fail before anything is
+    stored; pages are then extracted one at a time as the iterator advances.
+    """
+    if fitz is not None:
+        doc = fitz.open(stream=file.read(), filetype="pdf")
+
+        def pages():
+            with doc:
+                for page in doc:
+                    yield page.get_text("text")
+        return pages()
+    pdf = PdfReader(file.stream)
+    return (page.extract_text() or "" for page in pdf.pages)
+
+def upload_size(file) -> int:
+    """Size in bytes of an uploaded file, leaving its stream position unchanged."""
+    stream = file.stream
+    pos = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(pos)
+    return size
+
 # Ollama embedding function (scaffold)
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://host.docker.internal:11434")
+EMBED_CACHE_SIZE = int(os.getenv("RAGFLOW_EMBED_CACHE_SIZE", "4096"))
+
+# One pooled session for every Ollama call so embeddings reuse keep-alive
+# connections instead of opening a new TCP connection per request.
+_ollama_session = requests.Session()
+_ollama_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+_ollama_session.mount("http://", _ollama_adapter)
+_ollama_session.mount("https://", _ollama_adapter)
+
+# LRU of successful embeddings keyed by (model, sha1(text)). Fallback vectors
+# are never cached so an Ollama outage does not outlive itself.
+_embed_cache: OrderedDict[tuple[str, str], list] = OrderedDict()
+_embed_cache_lock = threading.Lock()
+
+def _embed_cache_key(text: str, model: str) -> tuple[str, str]:
+    return model, hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _embed_cache_get(key: tuple[str, str]) -> list | None:
+    with _embed_cache_lock:
+        embedding = _embed_cache.get(key)
+        if embedding is not None:
+            _embed_cache.move_to_end(key)
+        return embedding
+
+def _embed_cache_put(key: tuple[str, str], embedding: list) -> None:
+    with _embed_cache_lock:
+        _embed_cache[key] = embedding
+        _embed_cache.move_to_end(key)
+        while len(_embed_cache) > EMBED_CACHE_SIZE:
+            _embed_cache.popitem(last=False)
+
+FALLBACK_EMBED_DIM = 128
+
+def fallback_embedding(text: str) -> list[float]:
+    """Deterministic unit-length stand-in vector used when Ollama is unreachable.
+
+    The text is hashed with SHAKE-256 (arbitrary digest length, unlike
+    blake2b's 64-byte cap) and the digest bytes become the vector components.
+    """
+    digest = hashlib.shake_256(text.encode("utf-8", "ignore")).digest(FALLBACK_EMBED_DIM)
+    vector = np.frombuffer(digest, dtype=np.int8).astype(np.float32)
+    vector /= max(float(np.linalg.norm(vector)), 1e-9)
+    return vector.tolist()
+
 def get_embedding_ollama(text, model="nomic-embed-text"):
-    """Get embeddings from Ollama API."""
+    """Get embeddings from Ollama API, served from the LRU cache when possible."""
+    key = _embed_cache_key(text, model)
+    cached = _embed_cache_get(key)
+    if cached is not None:
+        return cached
     try:
-        import requests
-        ollama_host = os.getenv("OLLAMA_HOST", "http://host.docker.internal:11434")
-        response = requests.post(
-            f"{ollama_host}/api/embeddings",
+        response = _ollama_session.post(
+            f"{OLLAMA_HOST}/api/embeddings",
             json={"model": model, "prompt": text},
             timeout=30
         )
         response.raise_for_status()
-        return response.json()["embedding"]
+        embedding = response.json()["embedding"]
     except Exception as e:
         logging.error(f"Ollama embedding error: {e}")
         # Fallback to fake embedding if Ollama fails
-        return [hash(word) % 1000 for word in text.lower().split()][:128]
+        return fallback_embedding(text)
+    _embed_cache_put(key, embedding)
+    return embedding
+
+def get_embeddings_ollama_batch(texts, model="nomic-embed-text"):
+    """Embed several texts with a single Ollama /api/embed round-trip.
+
+    Cached texts are answered locally and only the misses are sent. If the
+    batch call fails (e.g. an Ollama build without /api/embed), each missing
+    text goes through get_embedding_ollama instead.
+    """
+    keys = [_embed_cache_key(text, model) for text in texts]
+    results = [_embed_cache_get(key) for key in keys]
+    missing = [i for i, embedding in enumerate(results) if embedding is None]
+    if not missing:
+        return results
+    try:
+        response = _ollama_session.post(
+            f"{OLLAMA_HOST}/api/embed",
+            json={"model": model, "input": [texts[i] for i in missing]},
+            timeout=30
+        )
+        response.raise_for_status()
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(missing):
+            raise ValueError(f"expected {len(missing)} embeddings, got {len(embeddings)}")
+    except Exception as e:
+        logging.warning(f"Ollama batch embedding failed, embedding individually: {e}")
+        for i in missing:
+            results[i] = get_embedding_ollama(texts[i], model)
+        return results
+    for i, embedding in zip(missing, embeddings):
+        results[i] = embedding
+        _embed_cache_put(keys[i], embedding)
+    return results
 
 
 # API Key configuration - REQUIRED in production
@@ -276,39 +647,70 @@ elif len(API_KEY) < 32:
     logging.warning(f"API key is short ({len(API_KEY)} chars). Recommend 32+ chars for security.")
 
 RATE_LIMIT = 100  # requests per hour per IP
-rate_limit_store: dict[str, list[float]] = {}
+# Fixed-size table of per-IP counters instead of a dict that grows with every
+# new client. Bucket = hash(ip) & _RL_MASK; each slot packs
+# (epoch_hour << 24) | count. Colliding IPs share a bucket. Counts are
+# per process; use a shared store (e.g. Redis) for a global limit.
+_RL_BUCKETS = 1 << 16
+_RL_MASK = _RL_BUCKETS - 1
+_RL_COUNT_BITS = 24
+_RL_COUNT_MASK = (1 << _RL_COUNT_BITS) - 1
+_rate_limit_table = array.array("Q", [0]) * _RL_BUCKETS
+
+_API_KEY_BYTES = API_KEY.encode()
 
 def authenticate():
-    key = request.headers.get("X-API-KEY")
-    if key != API_KEY:
-        return False
-    return True
+    # Constant-time comparison so response timing does not leak the key
+    key = request.headers.get("X-API-KEY", "")
+    return hmac.compare_digest(key.encode(), _API_KEY_BYTES)
 
 def rate_limit():
-    ip = request.remote_addr
-    now = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
-    if ip not in rate_limit_store or rate_limit_store[ip]["window"] != now:
-        rate_limit_store[ip] = {"window": now, "count": 1}
-    else:
-        rate_limit_store[ip]["count"] += 1
-    if rate_limit_store[ip]["count"] > RATE_LIMIT:
-        return False
-    return True
-
-
-@app.route("/completion", methods=["POST"])
-def completion():
+    bucket = hash(request.remote_addr) & _RL_MASK
+    now_hour = int(time.time()) // 3600
+    packed = _rate_limit_table[bucket]
+    count = packed & _RL_COUNT_MASK if packed >> _RL_COUNT_BITS == now_hour else 0
+    count = min(count + 1, _RL_COUNT_MASK)
+    _rate_limit_table[bucket] = (now_hour << _RL_COUNT_BITS) | count
+    return count <= RATE_LIMIT
+
+def _check_access():
+    """Return an error response if the request is unauthenticated or rate limited."""
     if not authenticate():
         return jsonify({"error": "Unauthorized"}), 401
     if not rate_limit():
         return jsonify({"error": "Rate limit exceeded"}), 429
+    return None
+
+def guarded(view):
+    """Require a valid API key and apply the per-IP rate limit before the view runs."""
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            denied = _check_access()
+            if denied is not None:
+                return denied
+            return await view(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        denied = _check_access()
+        if denied is not None:
+            return denied
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/completion", methods=["POST"])
+@guarded
+async def completion():
     try:
         data = request.get_json(force=True)
         prompt = str(data.get("prompt", "")).strip()
         model = str(data.get("model", "llama2")).strip()
         if not prompt:
             raise BadRequest("Prompt is required.")
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = output_timestamp()
         response = f"Mock response from {model} for prompt: {prompt}"
         log_output(f"completion_{timestamp}.txt", response)
         logging.info(f"Completion endpoint called with model={model}")
@@ -321,52 +723,82 @@ def completion():
         return jsonify({"error": "Internal server error."}), 500
 
 @app.route("/ingest", methods=["POST"])
-def ingest():
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
+@guarded
+async def ingest():
     try:
-        if "file" not in request.files:
+        # The first request.files access parses the multipart body; to_thread
+        # copies the request context along with it
+        files = await asyncio.to_thread(lambda: request.files)
+        if "file" not in files:
             raise BadRequest("No file part in request.")
-        file = request.files["file"]
+        file = files["file"]
         filename = os.path.basename(file.filename or "uploaded_file")
         if not filename:
             raise BadRequest("No selected file.")
         ext = filename.lower().rsplit(".", 1)[-1]
+        collect_after = False
         if ext == "txt":
-            try:
-                text = file.read().decode("utf-8")
-            except UnicodeDecodeError:
-                file.seek(0)
-                text = file.read().decode("latin-1", errors="ignore")
+            # Raw 64KB blocks of one text, so they are concatenated without a separator
+            segments, sep = iter_text_upload(file), ""
         elif ext == "pdf":
-            if PdfReader is None:
-                raise BadRequest("pypdf not installed. PDF support unavailable.")
+            if fitz is None and PdfReader is None:
+                raise BadRequest("PyMuPDF/pypdf not installed. PDF support unavailable.")
+            collect_after = upload_size(file) >= INGEST_GC_MIN_BYTES
             try:
-                pdf = PdfReader(file.stream)
-                text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+                # Reading the upload and opening the document both block
+                segments, sep = await asyncio.to_thread(iter_pdf_pages, file), "\n"
             except Exception as e:
                 logging.error(f"PDF parsing error: {e}")
                 raise BadRequest("Failed to parse PDF document.")
         else:
             raise BadRequest("Unsupported file type. Only .txt and .pdf allowed.")
-        
-        # Store in Supabase (vector store)
-        embedding = get_embedding_ollama(text)
-        response = add_document_to_supabase(text, metadata={"filename": filename}, embedding=embedding)
-        
+
+        # Store in Supabase (vector store) chunk by chunk as pages are parsed,
+        # embedding and inserting INGEST_EMBED_BATCH chunks per round-trip.
+        # Parsing, embedding and the Supabase client are all blocking, so each
+        # step runs off the event loop.
+        chunks = iter_text_chunks(segments, sep=sep)
+        inserted_ids = []
+        chunk_count = 0
+        head: list[str] = []
+        head_size = 0
+        while batch := await asyncio.to_thread(list, itertools.islice(chunks, INGEST_EMBED_BATCH)):
+            for chunk in batch:
+                if head_size < GRAPH_EPISODE_MAX_CHARS:
+                    head.append(chunk[:GRAPH_EPISODE_MAX_CHARS - head_size])
+                    head_size += len(head[-1])
+            embeddings = await asyncio.to_thread(get_embeddings_ollama_batch, batch)
+            documents = [
+                {
+                    "text": chunk,
+                    "metadata": {"filename": filename, "chunk_index": chunk_count + i},
+                    "embedding": embedding,
+                }
+                for i, (chunk, embedding) in enumerate(zip(batch, embeddings))
+            ]
+            response = await asyncio.to_thread(add_documents_to_supabase, documents)
+            inserted_ids.append([row["id"] for row in response.data])
+            chunk_count += len(documents)
+        if not chunk_count:
+            raise BadRequest("Document contains no extractable text.")
+        text = "".join(head)
+        # Free the parsed pages and the last batch now; after a large PDF
+        # also collect the cycles parsing leaves behind, so back-to-back
+        # uploads of big documents don't keep growing the heap
+        del segments, chunks, batch, embeddings, documents, response
+        if collect_after:
+            gc.collect()
+
         # Also add to Graphiti knowledge graph for entity/relationship extraction
         graph_result = {}
         if GRAPHITI_AVAILABLE:
             try:
                 episode_name = f"{filename}_{uuid.uuid4().hex[:8]}"
                 logging.info(f"Adding episode to Graphiti: {episode_name}")
-                graph_result = add_episode(
+                graph_result = await add_episode_async(
                     name=episode_name,
-                    episode_body=text[:10000],  # Limit text size for graph processing
-                    source_description=f"Document: {filename}",
-                    episode_type="text"
+                    episode_body=text,  # Already capped at GRAPH_EPISODE_MAX_CHARS
+                    source_description=f"Document: {filename}"
                 )
                 logging.info(f"Added document to knowledge graph: {graph_result}")
             except Exception as e:
@@ -378,7 +810,8 @@ def ingest():
         logging.info(f"Ingested document {filename} via Supabase and Graphiti")
         return jsonify({
             "status": "success",
-            "supabase_response": response,
+            "chunks": chunk_count,
+            "supabase_response": inserted_ids,
             "graph_response": graph_result
         })
     except BadRequest as e:
@@ -388,12 +821,24 @@ def ingest():
         logging.error(f"Internal error: {e}")
         return jsonify({"error": "Internal server error."}), 500
 
+async def _vector_search(query: str, top_k: int, metadata_filter: dict) -> list:
+    """Embed the query and run the Supabase similarity search off the event loop."""
+    query_embedding = await asyncio.to_thread(get_embedding_ollama, query)
+    return await asyncio.to_thread(
+        search_documents_supabase, query_embedding, top_k=top_k, metadata_filter=metadata_filter
+    )
+
+async def _graph_search(query: str, num_results: int) -> list:
+    """Search the knowledge graph for entities and relationships, if available."""
+    if not GRAPHITI_AVAILABLE:
+        return []
+    graph_results = await search_graph_async(query, num_results=num_results)
+    logging.info(f"Graph search returned {len(graph_results)} results")
+    return graph_results
+
 @app.route("/retrieval", methods=["POST"])
-def retrieval():
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
+@guarded
+async def retrieval():
     try:
         data = request.get_json(force=True)
         query = str(data.get("query", "")).strip()
@@ -403,19 +848,15 @@ def retrieval():
             raise BadRequest("Query is required.")
         if top_k < 1 or top_k > 20:
             raise BadRequest("top_k must be between 1 and 20.")
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        query_embedding = get_embedding_ollama(query)
-        docs = search_documents_supabase(query_embedding, top_k=top_k)
-        
-        # Metadata filtering
-        if metadata_filter:
-            docs = [doc for doc in docs if all(doc.get("metadata", {}).get(k) == v for k, v in metadata_filter.items())]
-        
-        # Also search the knowledge graph for entities and relationships
-        graph_results = []
-        if GRAPHITI_AVAILABLE:
-            graph_results = search_graph(query, num_results=5)
-            logging.info(f"Graph search returned {len(graph_results)} results")
+        if not isinstance(metadata_filter, dict):
+            raise BadRequest("metadata must be an object.")
+        timestamp = output_timestamp()
+        # Vector search (embedding + Supabase) and graph search hit independent
+        # services, so run them concurrently rather than back to back.
+        docs, graph_results = await asyncio.gather(
+            _vector_search(query, top_k, metadata_filter),
+            _graph_search(query, num_results=5),
+        )
         
         results = [{
             "doc_id": doc.get("id", "unknown"),
@@ -423,10 +864,10 @@ def retrieval():
             "snippet": doc.get("text", "")[:200]
         } for doc in docs]
         
-        log_output(f"retrieval_{timestamp}.json", json.dumps({
+        log_output(f"retrieval_{timestamp}.json", to_output_json({
             "vector_results": results,
             "graph_results": graph_results
-        }, indent=2))
+        }))
         logging.info(f"Retrieval endpoint called with query='{query}' top_k={top_k}")
         return jsonify({
             "vector_results": results,
@@ -441,13 +882,9 @@ def retrieval():
 
 
 @app.route("/graph/search", methods=["POST"])
-def graph_search():
+@guarded
+async def graph_search():
     """Search the temporal knowledge graph for entities and relationships."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-    
     if not GRAPHITI_AVAILABLE:
         return jsonify({"error": "Graphiti is not available. Install graphiti-core package."}), 503
     
@@ -462,10 +899,10 @@ def graph_search():
         if num_results < 1 or num_results > 50:
             raise BadRequest("num_results must be between 1 and 50.")
         
-        results = search_graph(query, num_results=num_results, center_node_uuid=center_node_uuid)
+        results = await search_graph_async(query, num_results=num_results, center_node_uuid=center_node_uuid)
         
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_output(f"graph_search_{timestamp}.json", json.dumps(results, indent=2))
+        timestamp = output_timestamp()
+        log_output(f"graph_search_{timestamp}.json", to_output_json(results))
         
         logging.info(f"Graph search endpoint called with query='{query}'")
         return jsonify({"results": results, "count": len(results)})
@@ -478,13 +915,9 @@ def graph_search():
 
 
 @app.route("/graph/temporal", methods=["POST"])
-def graph_temporal():
+@guarded
+async def graph_temporal():
     """Get temporal context for an entity across time."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-    
     if not GRAPHITI_AVAILABLE:
         return jsonify({"error": "Graphiti is not available. Install graphiti-core package."}), 503
     
@@ -511,13 +944,15 @@ def graph_temporal():
             except ValueError:
                 raise BadRequest("end_time must be in ISO format (YYYY-MM-DDTHH:MM:SS)")
         
-        context = get_temporal_context(entity_name, start_time=start_time, end_time=end_time)
+        context = await get_temporal_context_async(entity_name, start_time=start_time, end_time=end_time)
+        # Encoded once for both the audit output and the response
+        body = serialize_graph_result(context)
         
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_output(f"temporal_context_{timestamp}.json", json.dumps(context, indent=2))
+        timestamp = output_timestamp()
+        log_output(f"temporal_context_{timestamp}.json", body.decode())
         
         logging.info(f"Temporal context endpoint called for entity='{entity_name}'")
-        return jsonify(context)
+        return app.response_class(body, mimetype="application/json")
     except BadRequest as e:
         logging.warning(f"Bad request: {e}")
         return jsonify({"error": str(e)}), 400
@@ -526,17 +961,42 @@ def graph_temporal():
         return jsonify({"error": "Internal server error."}), 500
 
 
+DNS_CACHE_TTL = 60.0
+DNS_CACHE_SIZE = 4096
+_dns_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_dns_cache_lock = threading.Lock()
+
+def _resolve_host(hostname: str) -> tuple:
+    """Resolve hostname to every address it maps to (IPv4 and IPv6).
+
+    Results are cached for DNS_CACHE_TTL seconds so repeated crawls of the
+    same host skip the blocking resolver call. Failed lookups are not cached.
+    """
+    now = time.monotonic()
+    with _dns_cache_lock:
+        hit = _dns_cache.get(hostname)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+    infos = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+    addresses = tuple(dict.fromkeys(info[4][0] for info in infos))
+    with _dns_cache_lock:
+        _dns_cache[hostname] = (now + DNS_CACHE_TTL, addresses)
+        _dns_cache.move_to_end(hostname)
+        while len(_dns_cache) > DNS_CACHE_SIZE:
+            _dns_cache.popitem(last=False)
+    return addresses
+
+_ALLOWED_SCHEMES = frozenset(("http", "https"))
+# Cloud metadata endpoints
+_BLOCKED_HOSTS = frozenset(("169.254.169.254", "metadata.google.internal", "metadata.goog"))
+
 def is_safe_url(url: str) -> bool:
     """Validate URL is safe to crawl (prevent SSRF attacks)."""
-    from urllib.parse import urlparse
-    import ipaddress
-    import socket
-    
     try:
         parsed = urlparse(url)
         
         # Only allow http/https
-        if parsed.scheme not in ['http', 'https']:
+        if parsed.scheme not in _ALLOWED_SCHEMES:
             return False
         
         # Must have hostname
@@ -545,22 +1005,21 @@ def is_safe_url(url: str) -> bool:
             return False
         
         # Block cloud metadata endpoints
-        blocked_domains = ['169.254.169.254', 'metadata.google.internal', 'metadata.goog']
-        if hostname in blocked_domains:
+        if hostname in _BLOCKED_HOSTS:
             return False
         
         # Allow testing domains (example.com, example[0-9].com, localhost for testing)
         if FLASK_ENV != "production" and (hostname.startswith('example') or hostname == 'localhost'):
             return True
         
-        # Resolve to IP and check if internal
+        # Resolve to IPs and check if any is internal
         try:
-            ip = socket.gethostbyname(hostname)
-            ip_obj = ipaddress.ip_address(ip)
-            
-            # Block private/loopback/link-local networks
-            if ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local:
-                return False
+            for ip in _resolve_host(hostname):
+                ip_obj = ipaddress.ip_address(ip.split('%', 1)[0])
+                
+                # Block private/loopback/link-local networks
+                if ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local:
+                    return False
         except socket.gaierror:
             # DNS resolution failed
             return False
@@ -572,35 +1031,32 @@ def is_safe_url(url: str) -> bool:
 
 
 @app.route("/crawl", methods=["POST"])
-def create_crawl_job():
+@guarded
+async def create_crawl_job():
     """Create a new crawl job for web content extraction."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-
     try:
         data = request.get_json(force=True)
         crawl_request = CrawlJobRequest.from_dict(data)
 
         # Security: Validate URL to prevent SSRF attacks
-        if not is_safe_url(crawl_request.url):
+        # is_safe_url resolves the hostname, which blocks; keep it off the loop
+        if not await asyncio.to_thread(is_safe_url, crawl_request.url):
             raise BadRequest("Invalid or unsafe URL. Only public HTTP/HTTPS URLs are allowed.")
 
         # Create the job
-        job = asyncio.run(crawl_manager.create_job(crawl_request.url, crawl_request.to_config()))
+        job = await crawl_manager.create_job(crawl_request.url, crawl_request.to_config())
 
         response = CrawlJobResponse.from_job(job)
 
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_output(f"crawl_job_created_{timestamp}.json", json.dumps({
+        timestamp = output_timestamp()
+        log_output(f"crawl_job_created_{timestamp}.json", to_output_json({
             "job_id": job.id,
             "url": job.url,
             "config": job.config.to_dict()
-        }, indent=2))
+        }))
 
         logging.info(f"Created crawl job {job.id} for URL: {job.url}")
-        return jsonify(response.__dict__), 201
+        return jsonify(response), 201
 
     except BadRequest as e:
         logging.warning(f"Bad request: {e}")
@@ -611,20 +1067,16 @@ def create_crawl_job():
 
 
 @app.route("/crawl/<job_id>", methods=["GET"])
-def get_crawl_job(job_id: str):
+@guarded
+async def get_crawl_job(job_id: str):
     """Get the status and results of a crawl job."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-
     try:
-        job = asyncio.run(crawl_manager.get_job(job_id))
+        job = await crawl_manager.get_job(job_id)
         if not job:
             return jsonify({"error": "Job not found"}), 404
 
         response = CrawlJobResponse.from_job(job)
-        return jsonify(response.__dict__)
+        return jsonify(response)
 
     except Exception as e:
         logging.error(f"Internal error retrieving crawl job {job_id}: {e}")
@@ -632,13 +1084,9 @@ def get_crawl_job(job_id: str):
 
 
 @app.route("/crawl", methods=["GET"])
-def list_crawl_jobs():
+@guarded
+async def list_crawl_jobs():
     """List crawl jobs with optional filtering."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-
     try:
         status_filter = request.args.get("status")
         limit = int(request.args.get("limit", 50))
@@ -653,8 +1101,8 @@ def list_crawl_jobs():
             except ValueError:
                 raise BadRequest(f"Invalid status: {status_filter}. Must be one of: {[s.value for s in CrawlStatus]}")
 
-        jobs = asyncio.run(crawl_manager.list_jobs(status=status, limit=limit))
-        responses = [CrawlJobResponse.from_job(job).__dict__ for job in jobs]
+        jobs = await crawl_manager.list_jobs(status=status, limit=limit)
+        responses = [CrawlJobResponse.from_job(job) for job in jobs]
 
         return jsonify({
             "jobs": responses,
@@ -670,15 +1118,11 @@ def list_crawl_jobs():
 
 
 @app.route("/crawl/<job_id>/start", methods=["POST"])
-def start_crawl_job(job_id: str):
+@guarded
+async def start_crawl_job(job_id: str):
     """Start execution of a pending crawl job."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-
     try:
-        success = asyncio.run(crawl_manager.start_job(job_id))
+        success = await crawl_manager.start_job(job_id)
         if not success:
             return jsonify({"error": "Failed to start job. It may not exist or not be in pending status."}), 400
 
@@ -691,15 +1135,11 @@ def start_crawl_job(job_id: str):
 
 
 @app.route("/crawl/<job_id>/cancel", methods=["POST"])
-def cancel_crawl_job(job_id: str):
+@guarded
+async def cancel_crawl_job(job_id: str):
     """Cancel a running or pending crawl job."""
-    if not authenticate():
-        return jsonify({"error": "Unauthorized"}), 401
-    if not rate_limit():
-        return jsonify({"error": "Rate limit exceeded"}), 429
-
     try:
-        success = asyncio.run(crawl_manager.cancel_job(job_id))
+        success = await crawl_manager.cancel_job(job_id)
         if not success:
             return jsonify({"error": "Failed to cancel job. It may not exist or not be cancellable."}), 400
 
@@ -712,5 +1152,6 @@ def cancel_crawl_job(job_id: str):
 
 
 if __name__ == "__main__":
-    # Production-ready: debug=False
-    app.run(debug=False)
+    # Local development only; production runs gunicorn.conf.py (gthread workers).
+    # threaded=True keeps concurrent local requests from queueing behind each other.
+    app.run(debug=False, threaded=True)
@@ -0,0 +1,51 @@
+"""
+Shared pytest fixtures.
+
+The Google clients are built once per test session: each one does SDK setup
+and a TLS handshake on first use, which every Gemini test would otherwise
+repeat.
+"""
+
+import logging
+import os
+
+import pytest
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture(scope="session")
+def google_api_key():
+    """GOOGLE_API_KEY from the environment; tests needing it skip without it."""
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        pytest.skip("GOOGLE_API_KEY not set")
+    return api_key
+
+
+@pytest.fixture(scope="session")
+def genai_client(google_api_key):
+    """A google-genai client shared by the whole session."""
+    try:
+        from google import genai
+    except ModuleNotFoundError as e:
+        pytest.skip(f"Optional dependency missing: {e}")
+
+    client = genai.Client(api_key=google_api_key)
+    logger.debug("genai.Client created: %s", client)
+    return client
+
+
+@pytest.fixture(scope="session")
+def gemini_client(google_api_key):
+    """A Graphiti GeminiClient shared by the whole session."""
+    try:
+        from graphiti_core.llm_client import LLMConfig
+        from graphiti_core.llm_client.gemini_client import GeminiClient
+    except ModuleNotFoundError as e:
+        pytest.skip(f"Optional dependency missing: {e}")
+
+    config = LLMConfig(api_key=google_api_key, model="gemini-1.5-flash")
+    client = GeminiClient(config=config)
+    logger.debug("GeminiClient created: %s", client)
+    return client
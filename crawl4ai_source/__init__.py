@@ -15,7 +15,7 @@ from .models import (
 )
 from .service import CrawlService
 from .manager import CrawlJobManager
-from .deduplicator import ContentDeduplicator, ContentFingerprint
+from .deduplicator import ContentDeduplicator, ContentFingerprint, LocalHashIndex
 from .rate_limiter import RateLimiter, RateLimitRule
 
 __all__ = [
@@ -29,6 +29,7 @@ __all__ = [
     "CrawlJobManager",
     "ContentDeduplicator",
     "ContentFingerprint",
+    "LocalHashIndex",
     "RateLimiter",
     "RateLimitRule",
 ]
\ No newline at end of file
@@ -5,16 +5,212 @@ This module provides utilities for detecting and preventing duplicate
 content from being stored, using content hashing and similarity analysis.
 """
 
+import asyncio
+import functools
 import hashlib
 import logging
-from typing import Optional
-from dataclasses import dataclass
-from difflib import SequenceMatcher
-
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from dataclasses import dataclass, field
+
+import numpy as np
 from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+# MinHash parameters: word 5-gram shingles, 64 hash permutations of the form
+# (a * x + b) mod p. a, b and the CRC32 shingle hashes are all below 2**32, so
+# a * x + b never overflows uint64. The fixed seed keeps signatures stable
+# across processes.
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_SHINGLE_SIZE = 5
+_NUM_PERM = 64
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=_NUM_PERM, dtype=np.uint64)
+# Shingles hashed per block; keeps the (block, _NUM_PERM) intermediate at 2MB
+# instead of one row per shingle of the whole page
+_MINHASH_BLOCK = 4096
+
+
+_HASH_BLOCK_CHARS = 64 * 1024
+
+# Recently seen hash lookups. Hashes known to be stored are kept in an LRU;
+# hashes confirmed absent expire quickly so content stored by another process
+# is picked up again.
+_HASH_CACHE_SIZE = 50_000
+_ABSENT_HASH_TTL = 60.0
+
+_HASH_COLUMNS = ("content_hash", "url_hash", "title_hash")
+
+# Pages with less text than this (error pages, JS-only stubs) are not worth
+# storing and are reported as duplicates without any lookup
+MIN_CONTENT_LENGTH = 200
+_EMPTY_CONTENT_HASH = hashlib.sha256(b"").hexdigest()
+# Rows fetched per page when hydrating the local index; lookups are split to
+# stay under SQLite's bound-parameter limit
+_HYDRATE_PAGE_SIZE = 1000
+_SQLITE_MAX_PARAMS = 500
+
+
+def sha256_hex(text: str) -> str:
+    """
+    SHA-256 hex digest of text's UTF-8 encoding.
+
+    Long text is encoded and hashed in 64K-character slices, so a page is
+    never duplicated as one full-size bytes object just to be hashed.
+    Slicing on code points keeps the byte stream, and the digest, identical.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        SHA-256 hash string
+    """
+    if len(text) <= _HASH_BLOCK_CHARS:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    digest = hashlib.sha256()
+    for start in range(0, len(text), _HASH_BLOCK_CHARS):
+        digest.update(text[start:start + _HASH_BLOCK_CHARS].encode('utf-8'))
+    return digest.hexdigest()
+
+
+def sha256_hex_and_size(text: str) -> Tuple[str, int]:
+    """
+    SHA-256 hex digest and UTF-8 size of text, from a single encoding pass.
+
+    Each 64K-character slice is encoded once and used for both the digest
+    and the byte count.
+
+    Args:
+        text: Text to hash
+
+    Returns:
+        (SHA-256 hash string, encoded size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for start in range(0, len(text), _HASH_BLOCK_CHARS):
+        block = text[start:start + _HASH_BLOCK_CHARS].encode('utf-8')
+        digest.update(block)
+        size += len(block)
+    return digest.hexdigest(), size
+
+
+def utf8_size(text: str) -> int:
+    """
+    Size in bytes of text's UTF-8 encoding, measured in the same 64K-character
+    slices as sha256_hex.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Encoded size in bytes
+    """
+    if text.isascii():
+        return len(text)
+    return sum(
+        len(text[start:start + _HASH_BLOCK_CHARS].encode('utf-8'))
+        for start in range(0, len(text), _HASH_BLOCK_CHARS)
+    )
+
+
+# Query parameters that don't affect content
+_IGNORED_QUERY_PARAMS = frozenset({
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid',
+})
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL: drop tracking parameters, lowercase scheme and host,
+    and strip the trailing slash.
+
+    The query string is filtered in one pass over its raw `key=value` pairs,
+    so kept parameters are not percent-decoded and re-encoded. Path and query
+    keep their case, since many sites treat them case-sensitively.
+
+    Args:
+        url: URL to normalize
+
+    Returns:
+        Normalized URL string
+    """
+    parts = urlsplit(url)
+    query = "&".join(
+        pair for pair in parts.query.split("&")
+        if pair and pair.split("=", 1)[0] not in _IGNORED_QUERY_PARAMS
+    )
+    normalized = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, parts.fragment))
+    return normalized.rstrip('/')
+
+
+def title_hash(title: Optional[str]) -> Optional[str]:
+    """
+    Hash a title for deduplication: SHA-256 of the stripped, lowercased title.
+
+    Args:
+        title: Title to hash
+
+    Returns:
+        SHA-256 hash string or None if title is empty
+    """
+    if not title or not title.strip():
+        return None
+    return sha256_hex(title.strip().lower())
+
+
+def minhash_signature(content: str) -> Optional[np.ndarray]:
+    """
+    Compute the MinHash signature of content's word 5-gram shingles.
+
+    Args:
+        content: Content text
+
+    Returns:
+        Array of _NUM_PERM uint64 values, or None if content has no words
+    """
+    tokens = _TOKEN_RE.findall(content.lower())
+    if not tokens:
+        return None
+    count = max(len(tokens) - _SHINGLE_SIZE + 1, 1)
+    shingles = {" ".join(tokens[i:i + _SHINGLE_SIZE]) for i in range(count)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    signature = np.full(_NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), _MINHASH_BLOCK):
+        block = hashes[start:start + _MINHASH_BLOCK, None] * _PERM_A
+        block += _PERM_B
+        block %= _MERSENNE_PRIME
+        np.minimum(signature, block.min(axis=0), out=signature)
+    return signature
+
+
+def encode_signature(signature: np.ndarray) -> str:
+    """Encode a MinHash signature as a PostgREST bytea literal."""
+    return "\\x" + signature.astype(np.uint64).tobytes().hex()
+
+
+def decode_signature(value: str) -> np.ndarray:
+    """Decode a bytea literal written by encode_signature."""
+    return np.frombuffer(bytes.fromhex(value[2:]), dtype=np.uint64)
+
+
+def _lsh_bands(threshold: float, num_perm: int = _NUM_PERM) -> Tuple[int, int]:
+    """Pick (bands, rows) whose LSH S-curve threshold (1/b)^(1/r) is closest to threshold."""
+    return min(
+        ((b, num_perm // b) for b in range(1, num_perm + 1)),
+        key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold),
+    )
+
 
 @dataclass
 class ContentFingerprint:
@@ -23,6 +219,100 @@ class ContentFingerprint:
     url_hash: str
     title_hash: Optional[str]
     similarity_threshold: float = 0.85
+    minhash: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    too_short: bool = False
+
+
+class LocalHashIndex:
+    """
+    SQLite-backed copy of stored content hashes and MinHash signatures.
+
+    Keeps the dedup hot path on local disk: lookups are a primary-key probe
+    instead of a Supabase round-trip, and the similarity index survives
+    restarts. WAL mode lets several worker processes share one file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: SQLite database file path
+        """
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes (value TEXT PRIMARY KEY, kind TEXT NOT NULL) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures (content_hash TEXT PRIMARY KEY, minhash BLOB NOT NULL) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @property
+    def hydrated(self) -> bool:
+        """Whether the index holds every hash stored in Supabase."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'hydrated'").fetchone()
+        return row is not None
+
+    def mark_hydrated(self) -> None:
+        """Record that the index has been fully loaded from Supabase."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('hydrated', '1')")
+
+    def lookup(self, values: Iterable[str]) -> Dict[str, str]:
+        """
+        Find which hashes are stored.
+
+        Args:
+            values: Hash values to look up
+
+        Returns:
+            Mapping of each stored value to the column it is stored under
+        """
+        values = list(values)
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(values), _SQLITE_MAX_PARAMS):
+                batch = values[start:start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT value, kind FROM hashes WHERE value IN ({placeholders})", batch
+                ))
+        return found
+
+    def add_hashes(self, entries: Iterable[Tuple[str, str]]) -> None:
+        """
+        Record stored hashes.
+
+        Args:
+            entries: (value, column) pairs
+        """
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO hashes (value, kind) VALUES (?, ?)", entries)
+
+    def add_signature(self, content_hash: str, signature: np.ndarray) -> None:
+        """Record the MinHash signature of stored content."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO signatures (content_hash, minhash) VALUES (?, ?)",
+                (content_hash, signature.tobytes()),
+            )
+
+    def signatures(self) -> List[Tuple[str, np.ndarray]]:
+        """Return every recorded (content_hash, signature) pair."""
+        with self._lock:
+            rows = self._conn.execute("SELECT content_hash, minhash FROM signatures").fetchall()
+        return [(content_hash, np.frombuffer(blob, dtype=np.uint64)) for content_hash, blob in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
 
 
 class ContentDeduplicator:
@@ -30,19 +320,42 @@ class ContentDeduplicator:
     Handles content deduplication using multiple strategies:
     - Exact hash matching
     - URL-based deduplication
-    - Content similarity analysis
+    - Content similarity analysis (MinHash-LSH over registered content)
     """
 
-    def __init__(self, supabase_client: Client, similarity_threshold: float = 0.85):
+    def __init__(
+        self,
+        supabase_client: Client,
+        similarity_threshold: float = 0.85,
+        local_index_path: Optional[str] = None,
+        min_content_length: int = MIN_CONTENT_LENGTH,
+    ):
         """
         Initialize the deduplicator.
 
         Args:
             supabase_client: Supabase client for database operations
             similarity_threshold: Threshold for content similarity (0.0-1.0)
+            local_index_path: Optional SQLite file that keeps stored hashes
+                and MinHash signatures locally (see hydrate())
+            min_content_length: Content shorter than this, after stripping
+                whitespace, is always treated as a duplicate
         """
         self.supabase = supabase_client
         self.similarity_threshold = similarity_threshold
+        self.min_content_length = min_content_length
+        # In-process LSH index: one bucket map per band, keyed by the band's
+        # slice of the signature, plus the full signatures for verification
+        self._bands, self._rows = _lsh_bands(similarity_threshold)
+        self._lsh_buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(self._bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+        # hash -> column it is stored under / hash -> expiry of its absent result
+        self._stored_hashes: "OrderedDict[str, str]" = OrderedDict()
+        self._absent_hashes: "OrderedDict[str, float]" = OrderedDict()
+        self._local = LocalHashIndex(local_index_path) if local_index_path else None
+        if self._local is not None:
+            for content_hash, signature in self._local.signatures():
+                self._index_signature(content_hash, signature)
 
     def generate_content_hash(self, content: str) -> str:
         """
@@ -54,7 +367,9 @@ class ContentDeduplicator:
         Returns:
             SHA-256 hash string
         """
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if not content:
+            return _EMPTY_CONTENT_HASH
+        return sha256_hex(content)
 
     def generate_url_hash(self, url: str) -> str:
         """
@@ -68,7 +383,7 @@ class ContentDeduplicator:
         """
         # Normalize URL for consistent hashing
         normalized_url = self._normalize_url(url)
-        return hashlib.sha256(normalized_url.encode('utf-8')).hexdigest()
+        return sha256_hex(normalized_url)
 
     def generate_title_hash(self, title: str) -> Optional[str]:
         """
@@ -80,9 +395,7 @@ class ContentDeduplicator:
         Returns:
             SHA-256 hash string or None if title is empty
         """
-        if not title or not title.strip():
-            return None
-        return hashlib.sha256(title.strip().lower().encode('utf-8')).hexdigest()
+        return title_hash(title)
 
     def create_fingerprint(self, url: str, content: str, title: Optional[str] = None) -> ContentFingerprint:
         """
@@ -96,13 +409,89 @@ class ContentDeduplicator:
         Returns:
             ContentFingerprint object
         """
+        too_short = len(content.strip()) < self.min_content_length
         return ContentFingerprint(
             content_hash=self.generate_content_hash(content),
             url_hash=self.generate_url_hash(url),
             title_hash=self.generate_title_hash(title) if title else None,
             similarity_threshold=self.similarity_threshold,
+            # Too-short content never reaches the similarity check
+            minhash=None if too_short else minhash_signature(content),
+            too_short=too_short,
         )
 
+    def register(self, fingerprint: ContentFingerprint) -> None:
+        """
+        Record stored content in the hash cache and the similarity index.
+
+        Args:
+            fingerprint: Fingerprint of content that has been persisted
+        """
+        self._remember_stored({
+            "content_hash": fingerprint.content_hash,
+            "url_hash": fingerprint.url_hash,
+            "title_hash": fingerprint.title_hash,
+        })
+        signature = fingerprint.minhash
+        if signature is None or fingerprint.content_hash in self._signatures:
+            return
+        self._index_signature(fingerprint.content_hash, signature)
+        if self._local is not None:
+            self._local.add_signature(fingerprint.content_hash, signature)
+
+    def _index_signature(self, content_hash: str, signature: np.ndarray) -> None:
+        """Add a signature to the in-process LSH index."""
+        self._signatures[content_hash] = signature
+        for band, buckets in zip(self._band_keys(signature), self._lsh_buckets):
+            buckets.setdefault(band, set()).add(content_hash)
+
+    async def hydrate(self) -> int:
+        """
+        Load every stored hash and MinHash signature from Supabase into the
+        local index.
+
+        Only the hash and content_signature columns are fetched, never the
+        content itself. Runs once per index file. Afterwards a hash missing
+        from the local index is treated as absent without querying Supabase,
+        so the index must see every write (CrawlJobManager registers each page
+        it persists with its deduplicator): content stored by other hosts is
+        not picked up.
+
+        Returns:
+            Number of rows loaded (0 if there is no local index or it is already hydrated)
+        """
+        if self._local is None or self._local.hydrated:
+            return 0
+        loaded = 0
+        while True:
+            query = (
+                self.supabase.table("crawl_content")
+                .select(", ".join(_HASH_COLUMNS + ("content_signature",)))
+                .order("id")
+                .range(loaded, loaded + _HYDRATE_PAGE_SIZE - 1)
+            )
+            rows = (await asyncio.to_thread(query.execute)).data or []
+            self._local.add_hashes(
+                (row[column], column) for row in rows for column in _HASH_COLUMNS if row.get(column)
+            )
+            for row in rows:
+                content_hash, encoded = row.get("content_hash"), row.get("content_signature")
+                if content_hash and encoded and content_hash not in self._signatures:
+                    signature = decode_signature(encoded)
+                    self._index_signature(content_hash, signature)
+                    self._local.add_signature(content_hash, signature)
+            loaded += len(rows)
+            if len(rows) < _HYDRATE_PAGE_SIZE:
+                break
+        self._local.mark_hydrated()
+        logger.info(f"Hydrated local dedup index with {loaded} rows")
+        return loaded
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Split a signature into per-band bucket keys."""
+        rows = self._rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self._bands)]
+
     async def is_duplicate(self, fingerprint: ContentFingerprint) -> bool:
         """
         Check if content is a duplicate based on fingerprint.
@@ -113,20 +502,20 @@ class ContentDeduplicator:
         Returns:
             True if duplicate found, False otherwise
         """
-        try:
-            # Check exact content hash first (fastest)
-            if await self._check_exact_hash(fingerprint.content_hash):
-                logger.debug(f"Exact content hash match: {fingerprint.content_hash}")
-                return True
-
-            # Check URL hash (good for same URL recrawls)
-            if await self._check_url_hash(fingerprint.url_hash):
-                logger.debug(f"URL hash match: {fingerprint.url_hash}")
-                return True
+        if fingerprint.too_short:
+            logger.debug(f"Content below minimum length, skipping: {fingerprint.url_hash}")
+            return True
 
-            # Check title hash if available (good for similar content)
-            if fingerprint.title_hash and await self._check_title_hash(fingerprint.title_hash):
-                logger.debug(f"Title hash match: {fingerprint.title_hash}")
+        try:
+            # Check content, URL and title hashes in a single round-trip
+            match = await self._check_any_hash(fingerprint)
+            if match:
+                if match.get("content_hash") == fingerprint.content_hash:
+                    logger.debug(f"Exact content hash match: {fingerprint.content_hash}")
+                elif match.get("url_hash") == fingerprint.url_hash:
+                    logger.debug(f"URL hash match: {fingerprint.url_hash}")
+                else:
+                    logger.debug(f"Title hash match: {fingerprint.title_hash}")
                 return True
 
             # Check content similarity (slowest, most comprehensive)
@@ -141,80 +530,190 @@ class ContentDeduplicator:
             # On error, allow content (fail open)
             return False
 
-    async def _check_exact_hash(self, content_hash: str) -> bool:
-        """Check for exact content hash match."""
-        try:
-            response = self.supabase.table("crawl_content").select("id").eq("content_hash", content_hash).limit(1).execute()
-            return len(response.data) > 0
-        except Exception as e:
-            logger.error(f"Error checking exact hash: {e}")
-            return False
+    async def _check_any_hash(self, fingerprint: ContentFingerprint) -> Optional[dict]:
+        """
+        Look up the content, URL and title hashes with one OR query.
 
-    async def _check_url_hash(self, url_hash: str) -> bool:
-        """Check for URL hash match."""
-        try:
-            response = self.supabase.table("crawl_content").select("id").eq("url_hash", url_hash).limit(1).execute()
-            return len(response.data) > 0
-        except Exception as e:
-            logger.error(f"Error checking URL hash: {e}")
-            return False
+        Args:
+            fingerprint: Content fingerprint to check
 
-    async def _check_title_hash(self, title_hash: str) -> bool:
-        """Check for title hash match."""
+        Returns:
+            The first matching row (with its hash columns), or None
+        """
+        hashes = {"content_hash": fingerprint.content_hash, "url_hash": fingerprint.url_hash}
+        if fingerprint.title_hash:
+            hashes["title_hash"] = fingerprint.title_hash
+
+        # Answer from the cache when a hash is known stored, or all are known absent
+        now = time.monotonic()
+        for column, value in hashes.items():
+            if value in self._stored_hashes:
+                self._stored_hashes.move_to_end(value)
+                return {column: value}
+        if all(self._absent_hashes.get(value, 0.0) > now for value in hashes.values()):
+            return None
+        if self._local is not None:
+            known = self._local.lookup(hashes.values())
+            for value, column in known.items():
+                self._cache_stored({column: value})
+                return {column: value}
+            if self._local.hydrated:
+                return None
+
+        filters = [f"{column}.eq.{value}" for column, value in hashes.items()]
         try:
-            response = self.supabase.table("crawl_content").select("id").eq("title_hash", title_hash).limit(1).execute()
-            return len(response.data) > 0
+            query = (
+                self.supabase.table("crawl_content")
+                .select("id, content_hash, url_hash, title_hash")
+                .or_(",".join(filters))
+                .limit(1)
+            )
+            response = await asyncio.to_thread(query.execute)
         except Exception as e:
-            logger.error(f"Error checking title hash: {e}")
-            return False
+            logger.error(f"Error checking content hashes: {e}")
+            return None
 
-    async def _check_similarity(self, fingerprint: ContentFingerprint) -> bool:
-        """
-        Check content similarity against existing content.
+        if response.data:
+            match = response.data[0]
+            self._remember_stored(match)
+            return match
+        self._remember_absent(hashes.values(), now)
+        return None
 
-        This is a more expensive operation that compares content
-        against recent crawls to find similar content.
+    async def are_duplicates(self, fingerprints: List[ContentFingerprint]) -> List[bool]:
         """
-        try:
-            # Get recent content for comparison (last 1000 entries)
-            response = self.supabase.table("crawl_content").select("content").order("extracted_at", desc=True).limit(1000).execute()
-
-            if not response.data:
-                return False
+        Check a batch of fingerprints with a single Supabase round-trip.
 
-            # Extract content from results
-            existing_content = []
-            for row in response.data:
-                # Note: In a real implementation, you'd want to store processed content
-                # For now, we'll use a simplified approach
-                if row.get("content"):
-                    existing_content.append(row["content"])
+        Fingerprints are checked against stored and registered content, not
+        against each other.
 
-            # Check similarity against each existing content
-            for existing in existing_content:
-                if self._calculate_similarity(fingerprint.content_hash, existing) >= fingerprint.similarity_threshold:
-                    return True
+        Args:
+            fingerprints: Content fingerprints to check
 
-            return False
+        Returns:
+            One flag per fingerprint, in order; True if it is a duplicate
+        """
+        try:
+            stored = await self._lookup_hashes([fp for fp in fingerprints if not fp.too_short])
+            results = []
+            for fingerprint in fingerprints:
+                if fingerprint.too_short:
+                    results.append(True)
+                    continue
+                hashes = (fingerprint.content_hash, fingerprint.url_hash, fingerprint.title_hash)
+                results.append(
+                    any(value in stored for value in hashes if value)
+                    or await self._check_similarity(fingerprint)
+                )
+            return results
 
         except Exception as e:
-            logger.error(f"Error checking similarity: {e}")
-            return False
+            logger.error(f"Error checking for duplicates: {e}")
+            # On error, allow content (fail open)
+            return [False] * len(fingerprints)
 
-    def _calculate_similarity(self, content1: str, content2: str) -> float:
+    async def _lookup_hashes(self, fingerprints: List[ContentFingerprint]) -> Set[str]:
         """
-        Calculate similarity ratio between two content strings.
+        Find which of the fingerprints' hashes are already stored.
 
-        Args:
-            content1: First content string
-            content2: Second content string
+        Hashes the cache cannot answer are looked up with one query of the
+        form ``content_hash IN (...) OR url_hash IN (...) OR title_hash IN (...)``.
 
         Returns:
-            Similarity ratio (0.0-1.0)
+            The set of stored hash values among the fingerprints' hashes
+        """
+        now = time.monotonic()
+        stored: Set[str] = set()
+        pending: Dict[str, Set[str]] = {column: set() for column in _HASH_COLUMNS}
+        for fingerprint in fingerprints:
+            for column in pending:
+                value = getattr(fingerprint, column)
+                if not value:
+                    continue
+                if value in self._stored_hashes:
+                    self._stored_hashes.move_to_end(value)
+                    stored.add(value)
+                elif self._absent_hashes.get(value, 0.0) <= now:
+                    pending[column].add(value)
+
+        if self._local is not None:
+            known = self._local.lookup(set().union(*pending.values()))
+            for value, column in known.items():
+                self._cache_stored({column: value})
+                stored.add(value)
+            if self._local.hydrated:
+                return stored
+            pending = {column: values - known.keys() for column, values in pending.items()}
+
+        filters = [f"{column}.in.({','.join(sorted(values))})" for column, values in pending.items() if values]
+        if not filters:
+            return stored
+        try:
+            query = (
+                self.supabase.table("crawl_content")
+                .select("content_hash, url_hash, title_hash")
+                .or_(",".join(filters))
+            )
+            response = await asyncio.to_thread(query.execute)
+        except Exception as e:
+            logger.error(f"Error checking content hashes: {e}")
+            return stored
+
+        rows = response.data or []
+        for row in rows:
+            self._remember_stored(row)
+        for column, values in pending.items():
+            found = values & {row.get(column) for row in rows}
+            stored |= found
+            self._remember_absent(values - found, now)
+        return stored
+
+    def _remember_absent(self, values: Iterable[str], now: float) -> None:
+        """Cache hashes that a lookup found no stored row for."""
+        for value in values:
+            self._absent_hashes[value] = now + _ABSENT_HASH_TTL
+            self._absent_hashes.move_to_end(value)
+        while len(self._absent_hashes) > _HASH_CACHE_SIZE:
+            self._absent_hashes.popitem(last=False)
+
+    def _remember_stored(self, row: dict) -> None:
+        """Record the hash columns of a stored row in the cache and the local index."""
+        self._cache_stored(row)
+        if self._local is not None:
+            self._local.add_hashes((row[column], column) for column in _HASH_COLUMNS if row.get(column))
+
+    def _cache_stored(self, row: dict) -> None:
+        """Cache the hash columns of a stored row and drop any absent entries for them."""
+        for column in _HASH_COLUMNS:
+            value = row.get(column)
+            if value:
+                self._stored_hashes[value] = column
+                self._stored_hashes.move_to_end(value)
+                self._absent_hashes.pop(value, None)
+        while len(self._stored_hashes) > _HASH_CACHE_SIZE:
+            self._stored_hashes.popitem(last=False)
+
+    async def _check_similarity(self, fingerprint: ContentFingerprint) -> bool:
+        """
+        Check content similarity against registered content.
+
+        Probes the LSH buckets for candidates sharing at least one band with
+        the fingerprint, then confirms each by its estimated Jaccard
+        similarity (fraction of equal MinHash values).
         """
-        # For simplicity, use sequence matcher
-        # In production, you might want more sophisticated similarity measures
-        return SequenceMatcher(None, content1, content2).ratio()
+        signature = fingerprint.minhash
+        if signature is None:
+            return False
+
+        candidates: Set[str] = set()
+        for band, buckets in zip(self._band_keys(signature), self._lsh_buckets):
+            candidates.update(buckets.get(band, ()))
+        candidates.discard(fingerprint.content_hash)
+
+        for content_hash in candidates:
+            if np.mean(self._signatures[content_hash] == signature) >= fingerprint.similarity_threshold:
+                return True
+        return False
 
     def _normalize_url(self, url: str) -> str:
         """
@@ -226,22 +725,7 @@ class ContentDeduplicator:
         Returns:
             Normalized URL string
         """
-        # Remove common tracking parameters
-        import urllib.parse
-        parsed = urllib.parse.urlparse(url)
-
-        # Remove query parameters that don't affect content
-        ignore_params = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'fbclid', 'gclid'}
-        query_params = urllib.parse.parse_qs(parsed.query)
-        filtered_params = {k: v for k, v in query_params.items() if k not in ignore_params}
-
-        # Reconstruct URL
-        parsed = parsed._replace(query=urllib.parse.urlencode(filtered_params, doseq=True))
-
-        # Remove trailing slash
-        normalized = urllib.parse.urlunparse(parsed).rstrip('/')
-
-        return normalized.lower()
+        return normalize_url(url)
 
     async def get_duplicate_stats(self) -> dict:
         """
@@ -251,19 +735,12 @@ class ContentDeduplicator:
             Dictionary with duplicate statistics
         """
         try:
-            # Count total content
-            total_response = self.supabase.table("crawl_content").select("id", count="exact").execute()
-            total_count = total_response.count or 0
-
-            # Count unique content hashes
-            unique_response = self.supabase.table("crawl_content").select("content_hash").execute()
-            unique_hashes = set(row["content_hash"] for row in unique_response.data)
-            unique_count = len(unique_hashes)
-
-            # Count unique URLs
-            unique_url_response = self.supabase.table("crawl_content").select("url_hash").execute()
-            unique_url_hashes = set(row["url_hash"] for row in unique_url_response.data)
-            unique_url_count = len(unique_url_hashes)
+            # Counted in Postgres by the crawl_content_stats() RPC
+            response = await asyncio.to_thread(self.supabase.rpc("crawl_content_stats").execute)
+            stats = response.data[0] if response.data else {}
+            total_count = stats.get("total") or 0
+            unique_count = stats.get("unique_content") or 0
+            unique_url_count = stats.get("unique_urls") or 0
 
             return {
                 "total_content": total_count,
@@ -6,14 +6,32 @@ of crawl jobs, including persistence, queuing, and execution management.
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
 
+from postgrest.types import ReturnMethod
 from supabase import Client
 
+# Job config/result columns are encoded with orjson when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from text_chunks import INGEST_EMBED_BATCH, iter_text_chunks
+
+from .deduplicator import (
+    ContentDeduplicator,
+    ContentFingerprint,
+    encode_signature,
+    minhash_signature,
+    normalize_url,
+    sha256_hex,
+    title_hash,
+)
 from .models import CrawlJob, CrawlStatus, CrawlConfig, CrawlResult
 from .service import CrawlService
 
@@ -28,24 +46,46 @@ except ImportError:
 
 # Import Supabase document storage
 try:
-    from supabase_client import add_document_to_supabase
+    from supabase_client import add_documents_to_supabase
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
-    add_document_to_supabase = None
+    add_documents_to_supabase = None
     logging.warning("Supabase client not available. Vector storage will be disabled.")
 
 # Import embedding function
 try:
-    from app import get_embedding_ollama
+    from app import get_embeddings_ollama_batch
     EMBEDDING_AVAILABLE = True
 except ImportError:
     EMBEDDING_AVAILABLE = False
-    get_embedding_ollama = None
+    get_embeddings_ollama_batch = None
     logging.warning("Embedding function not available. Vector embeddings will be disabled.")
 
 logger = logging.getLogger(__name__)
 
+# Writes queued within PERSIST_BATCH_WINDOW seconds of each other (up to
+# PERSIST_BATCH_LIMIT) are sent as one bulk upsert per table.
+PERSIST_BATCH_LIMIT = 100
+PERSIST_BATCH_WINDOW = 0.01
+
+
+def _dumps(obj) -> str:
+    """Encode a JSON column value, with orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj)
+
+
+def _loads(data):
+    """Decode a JSON column value, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class CrawlJobManager:
     """
@@ -55,19 +95,33 @@ class CrawlJobManager:
     persistence to Supabase and integration with the CrawlService.
     """
 
-    def __init__(self, supabase_client: Client, max_concurrent_jobs: int = 5):
+    def __init__(
+        self,
+        supabase_client: Client,
+        max_concurrent_jobs: int = 5,
+        deduplicator: Optional[ContentDeduplicator] = None,
+    ):
         """
         Initialize the job manager.
 
         Args:
             supabase_client: Supabase client for database operations
-            max_concurrent_jobs: Maximum number of concurrent crawl jobs
+            max_concurrent_jobs: Maximum number of concurrent crawl jobs; further
+                started jobs wait for a free slot
+            deduplicator: Optional deduplicator that every persisted page is
+                registered with, keeping its hash caches and local index current
         """
         self.supabase = supabase_client
         self.max_concurrent_jobs = max_concurrent_jobs
-        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs)
+        self.deduplicator = deduplicator
+        self._job_slots = asyncio.Semaphore(max_concurrent_jobs)
         self._active_jobs: Dict[str, asyncio.Task] = {}
+        # The CrawlJob each active task is executing; this process owns their
+        # state, so they are not re-read from the database
+        self._active_job_objects: Dict[str, CrawlJob] = {}
         self._crawl_service: Optional[CrawlService] = None
+        self._persist_queue: Optional[asyncio.Queue] = None
+        self._persist_worker: Optional[asyncio.Task] = None
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -97,13 +151,16 @@ class CrawlJobManager:
         if self._active_jobs:
             await asyncio.gather(*self._active_jobs.values(), return_exceptions=True)
 
+        # Stop the persistence worker; every write has been awaited by now
+        if self._persist_worker:
+            self._persist_worker.cancel()
+            await asyncio.gather(self._persist_worker, return_exceptions=True)
+            self._persist_worker = None
+
         # Stop crawl service
         if self._crawl_service:
             await self._crawl_service.stop()
 
-        # Shutdown executor
-        self._executor.shutdown(wait=True)
-
     async def create_job(self, url: str, config: CrawlConfig) -> CrawlJob:
         """
         Create a new crawl job.
@@ -134,7 +191,7 @@ class CrawlJobManager:
             CrawlJob object if found, None otherwise
         """
         try:
-            response = self.supabase.table("crawl_jobs").select("*").eq("id", job_id).execute()
+            response = await self._execute(self.supabase.table("crawl_jobs").select("*").eq("id", job_id))
 
             if not response.data:
                 return None
@@ -163,40 +220,47 @@ class CrawlJobManager:
             if status:
                 query = query.eq("status", status.value)
 
-            response = query.execute()
+            response = await self._execute(query)
             return [self._job_from_db_row(row) for row in response.data]
 
         except Exception as e:
             logger.error(f"Error listing jobs: {e}")
             return []
 
-    async def start_job(self, job_id: str) -> bool:
+    async def start_job(self, job: Union[CrawlJob, str]) -> bool:
         """
         Start execution of a crawl job.
 
         Args:
-            job_id: ID of job to start
+            job: Job to start, or its ID. Passing the CrawlJob (e.g. the one
+                create_job returned) skips re-reading it from the database.
 
         Returns:
             True if job was started successfully, False otherwise
         """
-        job = await self.get_job(job_id)
-        if not job:
-            logger.warning(f"Job {job_id} not found")
-            return False
+        if isinstance(job, CrawlJob):
+            job_id = job.id
+        else:
+            job_id = job
+            job = await self.get_job(job_id)
+            if not job:
+                logger.warning(f"Job {job_id} not found")
+                return False
 
         if job.status != CrawlStatus.PENDING:
             logger.warning(f"Job {job_id} is not in pending status (current: {job.status.value})")
             return False
 
-        # Check concurrent job limit
-        if len(self._active_jobs) >= self.max_concurrent_jobs:
-            logger.warning(f"Maximum concurrent jobs ({self.max_concurrent_jobs}) reached")
+        # A started job stays pending until it gets a slot, so guard against
+        # starting it twice while it waits
+        if job_id in self._active_jobs:
+            logger.warning(f"Job {job_id} is already started")
             return False
 
-        # Start the job execution
+        # Start the job execution (it waits for a free slot if all are busy)
         task = asyncio.create_task(self._execute_job(job))
         self._active_jobs[job_id] = task
+        self._active_job_objects[job_id] = job
 
         logger.info(f"Started execution of job {job_id}")
         return True
@@ -211,7 +275,7 @@ class CrawlJobManager:
         Returns:
             True if job was cancelled successfully, False otherwise
         """
-        job = await self.get_job(job_id)
+        job = self._active_job_objects.get(job_id) or await self.get_job(job_id)
         if not job:
             return False
 
@@ -224,6 +288,7 @@ class CrawlJobManager:
             if not task.done():
                 task.cancel()
             del self._active_jobs[job_id]
+            self._active_job_objects.pop(job_id, None)
 
         # Update job status
         job.mark_cancelled()
@@ -240,27 +305,28 @@ class CrawlJobManager:
             job: Job to execute
         """
         try:
-            # Mark job as running
-            job.mark_running()
-            await self._persist_job(job)
+            async with self._job_slots:
+                # Mark job as running
+                job.mark_running()
+                await self._persist_job(job)
 
-            # Execute the crawl
-            if not self._crawl_service:
-                raise RuntimeError("Crawl service not available")
+                # Execute the crawl
+                if not self._crawl_service:
+                    raise RuntimeError("Crawl service not available")
 
-            result = await self._crawl_service.crawl_url(job.url, job.config)
+                result = await self._crawl_service.crawl_url(job.url, job.config)
 
-            # Store the result in database
-            await self._persist_crawl_result(job.id, result)
+                # Store the result in database
+                await self._persist_crawl_result(job.id, result)
 
-            # Mark job as completed
-            job.mark_completed(result)
-            await self._persist_job(job)
+                # Mark job as completed
+                job.mark_completed(result)
+                await self._persist_job(job)
 
-            # Integrate with downstream systems (Graphiti and Supabase)
-            await self._integrate_with_downstream(job, result)
+                # Integrate with downstream systems (Graphiti and Supabase)
+                await self._integrate_with_downstream(job, result)
 
-            logger.info(f"Completed job {job.id} successfully")
+                logger.info(f"Completed job {job.id} successfully")
 
         except asyncio.CancelledError:
             # Job was cancelled
@@ -278,6 +344,7 @@ class CrawlJobManager:
         finally:
             # Remove from active jobs
             self._active_jobs.pop(job.id, None)
+            self._active_job_objects.pop(job.id, None)
 
     async def _integrate_with_downstream(self, job: CrawlJob, result: CrawlResult) -> None:
         """
@@ -287,11 +354,16 @@ class CrawlJobManager:
             job: The completed crawl job
             result: The crawl result with content
         """
-        # Integrate with Supabase vector storage
-        await self._integrate_with_supabase(job, result)
-
-        # Integrate with Graphiti for entity extraction
-        await self._integrate_with_graphiti(job, result)
+        # Supabase vector storage and Graphiti entity extraction are
+        # independent, so run them concurrently
+        outcomes = await asyncio.gather(
+            self._integrate_with_supabase(job, result),
+            self._integrate_with_graphiti(job, result),
+            return_exceptions=True,
+        )
+        for target, outcome in zip(("Supabase", "Graphiti"), outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error integrating job {job.id} with {target}: {outcome}")
 
     async def _integrate_with_supabase(self, job: CrawlJob, result: CrawlResult) -> None:
         """
@@ -301,14 +373,11 @@ class CrawlJobManager:
             job: The completed crawl job
             result: The crawl result with content
         """
-        if not SUPABASE_AVAILABLE or not add_document_to_supabase or not EMBEDDING_AVAILABLE or not get_embedding_ollama:
+        if not SUPABASE_AVAILABLE or not add_documents_to_supabase or not EMBEDDING_AVAILABLE or not get_embeddings_ollama_batch:
             logger.debug("Supabase vector storage not available, skipping")
             return
 
         try:
-            # Generate embedding for the crawled content
-            embedding = get_embedding_ollama(result.content)
-
             # Create metadata for the crawled content
             metadata = {
                 "source_url": result.url,
@@ -319,10 +388,25 @@ class CrawlJobManager:
                 "content_size": result.content_size,
             }
 
-            # Store in Supabase vector storage
-            add_document_to_supabase(result.content, metadata=metadata, embedding=embedding)
-
-            logger.info(f"Successfully stored crawled content from {result.url} in Supabase vector storage")
+            # Chunked like /ingest, with one embedding call and one insert per
+            # INGEST_EMBED_BATCH chunks; both are blocking HTTP calls
+            chunks = list(iter_text_chunks([result.content], sep=""))
+            chunk_count = 0
+            for start in range(0, len(chunks), INGEST_EMBED_BATCH):
+                batch = chunks[start:start + INGEST_EMBED_BATCH]
+                embeddings = await asyncio.to_thread(get_embeddings_ollama_batch, batch)
+                documents = [
+                    {
+                        "text": chunk,
+                        "metadata": {**metadata, "chunk_index": chunk_count + i},
+                        "embedding": embedding,
+                    }
+                    for i, (chunk, embedding) in enumerate(zip(batch, embeddings))
+                ]
+                await asyncio.to_thread(add_documents_to_supabase, documents)
+                chunk_count += len(documents)
+
+            logger.info(f"Successfully stored {chunk_count} chunks of crawled content from {result.url} in Supabase vector storage")
 
         except Exception as e:
             logger.error(f"Error storing content in Supabase: {e}")
@@ -341,8 +425,10 @@ class CrawlJobManager:
             return
 
         try:
-            # Create a unique episode name based on job ID and URL
-            episode_name = f"crawl_{job.id}_{hash(result.url) % 10000}"
+            # Create a unique episode name based on job ID and URL. hash() is
+            # salted per process, so use a stable digest of the URL instead
+            url_digest = hashlib.blake2b(result.url.encode("utf-8"), digest_size=6).hexdigest()
+            episode_name = f"crawl_{job.id}_{url_digest}"
 
             # Use the crawled content for entity extraction
             episode_body = result.content[:10000]  # Limit content size for Graphiti processing
@@ -371,17 +457,20 @@ class CrawlJobManager:
         """Resume any pending or running jobs from the database."""
         try:
             # Get jobs that should be running
-            response = self.supabase.table("crawl_jobs").select("*").in_("status", ["pending", "running"]).execute()
+            response = await self._execute(
+                self.supabase.table("crawl_jobs").select("*").in_("status", ["pending", "running"])
+            )
 
+            # Jobs that were running when the service stopped are restarted
+            # from the rows already fetched; pending jobs stay pending
+            resumable = []
             for row in response.data:
                 job = self._job_from_db_row(row)
+                if job.status == CrawlStatus.RUNNING and job.id not in self._active_jobs:
+                    job.status = CrawlStatus.PENDING
+                    resumable.append(job)
 
-                # Only resume if not already active
-                if job.id not in self._active_jobs:
-                    if job.status == CrawlStatus.RUNNING:
-                        # Job was running when service stopped, restart it
-                        await self.start_job(job.id)
-                    # Pending jobs stay pending
+            await asyncio.gather(*(self.start_job(job) for job in resumable))
 
         except Exception as e:
             logger.error(f"Error resuming pending jobs: {e}")
@@ -400,13 +489,31 @@ class CrawlJobManager:
             "created_at": job.created_at.isoformat(),
             "updated_at": job.updated_at.isoformat(),
             "completed_at": job.completed_at.isoformat() if job.completed_at else None,
-            "config": json.dumps(job.config.to_dict()),
-            "result": json.dumps(job.result.to_dict()) if job.result else None,
+            "config": self._encode_column(job, "config"),
+            "result": self._encode_column(job, "result"),
             "error_message": job.error_message,
         }
 
         # Upsert the job
-        self.supabase.table("crawl_jobs").upsert(job_data).execute()
+        await self._write("crawl_jobs", job_data)
+
+    @staticmethod
+    def _encode_column(job: CrawlJob, name: str) -> Optional[str]:
+        """
+        Encode job.config or job.result for its JSON column.
+
+        Config and result are not modified once attached to a job, so the
+        encoding is reused across state transitions until the attribute is
+        replaced with a different object.
+        """
+        value = getattr(job, name)
+        if value is None:
+            return None
+        cached = job._encoded.get(name)
+        if cached is None or cached[0] is not value:
+            cached = (value, _dumps(value.to_dict()))
+            job._encoded[name] = cached
+        return cached[1]
 
     async def _persist_crawl_result(self, job_id: str, result: CrawlResult) -> None:
         """
@@ -416,24 +523,124 @@ class CrawlJobManager:
             job_id: ID of the job that produced the result
             result: Crawl result to persist
         """
+        # Shingling and hashing a large page takes long enough to stall the loop
+        signature = await asyncio.to_thread(minhash_signature, result.content)
+        # Hashed as ContentDeduplicator.create_fingerprint does, so the URL and
+        # title duplicate checks match rows written here
+        url_hash = sha256_hex(normalize_url(result.url))
+        result_title_hash = title_hash(result.title)
         content_data = {
             "id": result.content_hash,  # Use hash as ID for deduplication
             "job_id": job_id,
             "url": result.url,
             "title": result.title,
             "content_hash": result.content_hash,
+            "url_hash": url_hash,
+            "title_hash": result_title_hash,
             "content_size": result.content_size,
             "extracted_at": result.extracted_at.isoformat(),
+            # MinHash signature for near-duplicate detection (see ContentDeduplicator.hydrate)
+            "content_signature": encode_signature(signature) if signature is not None else None,
         }
 
         # Insert content (ignore if hash already exists due to unique constraint)
         try:
-            self.supabase.table("crawl_content").insert(content_data).execute()
+            await self._write("crawl_content", content_data, ignore_duplicates=True)
         except Exception as e:
-            # If it's a duplicate hash, that's fine - content already exists
-            if "duplicate key" not in str(e).lower():
-                logger.error(f"Error persisting crawl content: {e}")
-                raise
+            logger.error(f"Error persisting crawl content: {e}")
+            raise
+
+        # A hydrated local index treats unknown hashes as absent, so it has to
+        # see every page stored after hydration
+        deduplicator = self.deduplicator
+        if deduplicator is not None:
+            deduplicator.register(ContentFingerprint(
+                content_hash=result.content_hash,
+                url_hash=url_hash,
+                title_hash=result_title_hash,
+                similarity_threshold=deduplicator.similarity_threshold,
+                minhash=signature,
+            ))
+
+    async def _write(self, table: str, row: dict, ignore_duplicates: bool = False) -> None:
+        """
+        Queue a row for the next batched upsert and wait until it is written.
+
+        Callers keep read-after-write semantics (the row is stored when this
+        returns); concurrent writes from other jobs share the round-trip.
+
+        Args:
+            table: Table to upsert into
+            row: Row data, keyed by "id"
+            ignore_duplicates: Skip rows whose key already exists instead of updating
+        """
+        if self._persist_queue is None:
+            self._persist_queue = asyncio.Queue()
+        if self._persist_worker is None or self._persist_worker.done():
+            self._persist_worker = asyncio.create_task(self._persist_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._persist_queue.put((table, ignore_duplicates, row, future))
+        await future
+
+    async def _persist_loop(self) -> None:
+        """Collect queued writes into batches and flush them."""
+        queue = self._persist_queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < PERSIST_BATCH_LIMIT:
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=PERSIST_BATCH_WINDOW))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush_writes(batch)
+
+    async def _flush_writes(self, batch: list) -> None:
+        """
+        Send a batch of queued writes as one upsert per table.
+
+        Args:
+            batch: (table, ignore_duplicates, row, future) tuples
+        """
+        groups: Dict[tuple, tuple] = {}
+        for table, ignore_duplicates, row, future in batch:
+            rows, futures = groups.setdefault((table, ignore_duplicates), ({}, []))
+            # A row written twice in one batch keeps its latest state
+            rows[row["id"]] = row
+            futures.append(future)
+
+        for (table, ignore_duplicates), (rows, futures) in groups.items():
+            try:
+                # Callers discard the response, so don't have PostgREST echo the rows back
+                query = self.supabase.table(table).upsert(
+                    list(rows.values()),
+                    on_conflict="id",
+                    ignore_duplicates=ignore_duplicates,
+                    returning=ReturnMethod.minimal,
+                )
+                await self._execute(query)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for future in futures:
+                    if not future.done():
+                        future.set_result(None)
+
+    async def _execute(self, query):
+        """
+        Execute a Supabase query builder on a worker thread.
+
+        The shared Supabase client is synchronous; running the round-trip off
+        the event loop keeps one slow query from stalling every other request.
+
+        Args:
+            query: PostgREST request builder to execute
+
+        Returns:
+            The query response
+        """
+        return await asyncio.to_thread(query.execute)
 
     def _job_from_db_row(self, row: dict) -> CrawlJob:
         """
@@ -445,8 +652,8 @@ class CrawlJobManager:
         Returns:
             CrawlJob object
         """
-        config = CrawlConfig.from_dict(json.loads(row["config"])) if row.get("config") else CrawlConfig()
-        result = CrawlResult.from_dict(json.loads(row["result"])) if row.get("result") else None
+        config = CrawlConfig.from_dict(_loads(row["config"])) if row.get("config") else CrawlConfig()
+        result = CrawlResult.from_dict(_loads(row["result"])) if row.get("result") else None
 
         return CrawlJob(
             id=row["id"],
@@ -128,6 +128,9 @@ class CrawlJob:
     config: CrawlConfig = field(default_factory=CrawlConfig)
     result: Optional[CrawlResult] = None
     error_message: Optional[str] = None
+    # Encoded config/result columns, keyed by field name and stored with the
+    # object they were encoded from (see CrawlJobManager._encode_column)
+    _encoded: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert job to dictionary for JSON serialization."""
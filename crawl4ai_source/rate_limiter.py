@@ -6,33 +6,152 @@ policies and prevent overwhelming target servers during crawling.
 """
 
 import asyncio
+import functools
 import logging
+import math
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, Optional
-from urllib.parse import urlparse
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Initial number of per-domain rows; the arrays double when full
+_INITIAL_CAPACITY = 1024
+
+# Default cap on tracked domains; past it the least recently used is evicted
+DEFAULT_MAX_DOMAINS = 10_000
+
+# Timestamps are time.monotonic_ns() integers; _NEVER marks a bucket that has
+# never been refilled
+_NS_PER_SECOND = 1_000_000_000
+_NEVER = int(np.iinfo(np.int64).min)
+
+# Longest cooldown a server can impose; longer Retry-After values are clamped
+MAX_COOLDOWN_SECONDS = 3600.0
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RateLimitRule:
-    """Rate limiting rule for a domain."""
+    """
+    Rate limiting rule for a domain.
+
+    Enforced as a token bucket: tokens refill at requests_per_minute / 60 per
+    second, up to burst_limit (at least 1) banked requests. Rules are
+    immutable and hashable; replace one with set_domain_rule.
+    """
     requests_per_minute: int
     burst_limit: int = 0
     cooldown_seconds: float = 60.0
+    rate_per_second: float = field(init=False, repr=False, compare=False)
+    capacity: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "rate_per_second", self.requests_per_minute / 60.0)
+        object.__setattr__(self, "capacity", float(max(self.burst_limit, 1)))
 
 
-@dataclass
+@dataclass(slots=True)
 class DomainStats:
-    """Statistics for domain rate limiting."""
-    request_count: int = 0
-    window_start: float = field(default_factory=time.time)
+    """
+    Statistics for domain rate limiting (a snapshot of one RateLimiter row).
+
+    Times are time.monotonic() values in seconds. tokens goes negative while requests
+    are queued waiting for the bucket to refill.
+    """
+    tokens: float = 0.0
+    last_refill: float = 0.0
     last_request: float = 0.0
     cooldown_until: float = 0.0
 
 
+@functools.lru_cache(maxsize=256)
+def parse_retry_after(value: str) -> Optional[Tuple[float, bool]]:
+    """
+    Parse a Retry-After header value.
+
+    Servers tend to repeat the same value, so results are cached. An HTTP
+    date is returned as an absolute POSIX timestamp rather than a delay, so
+    a cached entry stays correct as time passes.
+
+    Only the two forms RFC 9110 defines are accepted: delay-seconds (ASCII
+    digits only) and an HTTP-date. Anything else, including fractions,
+    exponents, "inf" and "nan", returns None.
+
+    Args:
+        value: Retry-After header value (delay in seconds or an HTTP date)
+
+    Returns:
+        (seconds, is_absolute) tuple, or None if the value can't be parsed
+    """
+    value = value.strip()
+    if value.isascii() and value.isdigit():
+        return float(value), False
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        # "-0000" dates carry no zone; HTTP dates are always GMT
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+    return retry_date.timestamp(), True
+
+
+@functools.lru_cache(maxsize=4096)
+def extract_domain(url: str) -> Optional[str]:
+    """
+    Extract the lowercased host of a URL, without a leading www.
+
+    Userinfo and port are dropped, so every port on a host shares its
+    limits. Parsed with str.partition rather than urlparse, which does a
+    lot of work on parts of the URL this doesn't need.
+
+    Args:
+        url: URL (or just its scheme://host prefix)
+
+    Returns:
+        Domain name or None if invalid
+    """
+    scheme, sep, rest = url.partition("://")
+    if not sep or not scheme:
+        return None
+    host = rest.partition("/")[0].partition("?")[0].partition("#")[0]
+    host = host.rpartition("@")[2]
+    if host.startswith("["):
+        # IPv6 literal; its colons aren't a port separator
+        end = host.find("]")
+        if end < 0:
+            return None
+        host = host[:end + 1]
+    else:
+        host = host.partition(":")[0]
+    # Remove www. prefix
+    domain = host.lower()
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain or None
+
+
+class _RowIndex(OrderedDict):
+    """
+    Domain -> row mapping that allocates a row on first subscript access.
+
+    Kept in least- to most-recently-used order.
+    """
+
+    def __init__(self, allocate):
+        super().__init__()
+        self._allocate = allocate
+
+    def __missing__(self, domain: str) -> int:
+        row = self[domain] = self._allocate()
+        return row
+
+
 class RateLimiter:
     """
     Rate limiter for crawl requests.
@@ -41,11 +160,34 @@ class RateLimiter:
     and automatic cooldown periods for rate-limited domains.
     """
 
-    def __init__(self):
-        """Initialize the rate limiter."""
-        self._domain_stats: Dict[str, DomainStats] = {}
+    def __init__(self, max_domains: int = DEFAULT_MAX_DOMAINS):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_domains: Maximum number of domains to track; the least
+                recently used domain's state is dropped beyond it
+        """
+        self.max_domains = max(max_domains, 1)
+        # Per-domain statistics, struct-of-arrays: domain -> row index into
+        # one array per field. Rows freed by reset_domain or by eviction are
+        # reused. Subscripting an unseen domain allocates its row; .get()
+        # doesn't.
+        self._rows = _RowIndex(self._allocate_row)
+        self._free_rows: List[int] = []
+        self._tokens = np.zeros(_INITIAL_CAPACITY, dtype=np.float64)
+        self._last_refill = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._last_request = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
+        self._cooldown_until = np.zeros(_INITIAL_CAPACITY, dtype=np.int64)
         self._default_rule = RateLimitRule(requests_per_minute=30, burst_limit=5)
-        self._domain_rules: Dict[str, RateLimitRule] = {}
+        # Rules in a trie of reversed domain labels (com -> google), so a rule
+        # also covers its subdomains; a node's rule is stored under None
+        self._rule_trie: dict = {}
+        # Rule resolved for each domain looked up so far
+        self._resolved_rule: Dict[str, RateLimitRule] = {}
+        # One event per domain cooldown, set by a single loop timer when the
+        # cooldown ends; waiters share it instead of each arming a timer
+        self._cooldown_events: Dict[str, asyncio.Event] = {}
 
         # Pre-configured rules for common domains
         self._setup_default_rules()
@@ -53,7 +195,7 @@ class RateLimiter:
     def _setup_default_rules(self) -> None:
         """Setup default rate limiting rules for common domains."""
         # Conservative rules for major platforms
-        self._domain_rules.update({
+        rules = {
             "google.com": RateLimitRule(requests_per_minute=10, burst_limit=2),
             "github.com": RateLimitRule(requests_per_minute=15, burst_limit=3),
             "stackoverflow.com": RateLimitRule(requests_per_minute=20, burst_limit=3),
@@ -64,30 +206,55 @@ class RateLimiter:
             "linkedin.com": RateLimitRule(requests_per_minute=5, burst_limit=1),
             "amazon.com": RateLimitRule(requests_per_minute=10, burst_limit=2),
             "youtube.com": RateLimitRule(requests_per_minute=5, burst_limit=1),
-        })
+        }
+        for domain, rule in rules.items():
+            self._insert_rule(domain, rule)
+
+    def _insert_rule(self, domain: str, rule: RateLimitRule) -> None:
+        """Store a rule at the trie node for domain."""
+        node = self._rule_trie
+        for label in reversed(domain.lower().split('.')):
+            node = node.setdefault(label, {})
+        node[None] = rule
 
     def set_domain_rule(self, domain: str, rule: RateLimitRule) -> None:
         """
-        Set a custom rate limiting rule for a domain.
+        Set a custom rate limiting rule for a domain and its subdomains.
 
         Args:
             domain: Domain name (e.g., 'example.com')
             rule: Rate limiting rule to apply
         """
-        self._domain_rules[domain.lower()] = rule
+        self._insert_rule(domain, rule)
+        # Rules change rarely; drop every resolved entry rather than track
+        # which spellings of the domain were cached
+        self._resolved_rule.clear()
         logger.info(f"Set rate limit rule for {domain}: {rule.requests_per_minute} req/min, burst {rule.burst_limit}")
 
     def get_domain_rule(self, domain: str) -> RateLimitRule:
         """
         Get the rate limiting rule for a domain.
 
+        The most specific rule set for the domain or one of its parent
+        domains applies (mail.google.com uses the google.com rule).
+
         Args:
             domain: Domain name
 
         Returns:
             RateLimitRule for the domain
         """
-        return self._domain_rules.get(domain.lower(), self._default_rule)
+        rule = self._resolved_rule.get(domain)
+        if rule is None:
+            rule = self._default_rule
+            node = self._rule_trie
+            for label in reversed(domain.lower().split('.')):
+                node = node.get(label)
+                if node is None:
+                    break
+                rule = node.get(None, rule)
+            self._resolved_rule[domain] = rule
+        return rule
 
     async def wait_if_needed(self, url: str) -> None:
         """
@@ -100,26 +267,36 @@ class RateLimiter:
         if not domain:
             return
 
-        rule = self.get_domain_rule(domain)
-        stats = self._get_domain_stats(domain)
-
-        current_time = time.time()
-
-        # Check if in cooldown
-        if current_time < stats.cooldown_until:
-            wait_time = stats.cooldown_until - current_time
-            logger.debug(f"Rate limited for {domain}, waiting {wait_time:.2f}s")
+        # Known domains skip the method calls: both lookups are one dict hit
+        rule = self._resolved_rule.get(domain) or self.get_domain_rule(domain)
+        row = self._rows[domain]
+        self._rows.move_to_end(domain)
+
+        now_ns = time.monotonic_ns()
+
+        # A request during a cooldown is paced by the bucket from the moment
+        # the cooldown ends, so waiters don't all wake and fire together.
+        # Taking the token and stamping the row happen without an await in
+        # between, so concurrent callers for a domain queue behind each other
+        # without a lock.
+        start_ns = max(now_ns, int(self._cooldown_until[row]))
+        wait_ns = start_ns - now_ns + int(self._calculate_wait_time(row, rule, start_ns) * _NS_PER_SECOND)
+        self._update_stats(row, now_ns + wait_ns)
+
+        if wait_ns > 0:
+            wait_time = wait_ns / _NS_PER_SECOND
+            if start_ns > now_ns:
+                logger.debug(f"Rate limited for {domain}, waiting {wait_time:.2f}s")
+                event = self._cooldown_events.get(domain)
+                if event is not None and not event.is_set():
+                    await event.wait()
+                    # Only the bucket's pacing past the cooldown is left
+                    wait_time = (now_ns + wait_ns - time.monotonic_ns()) / _NS_PER_SECOND
+                    if wait_time <= 0:
+                        return
+            else:
+                logger.debug(f"Rate limiting {domain}, waiting {wait_time:.2f}s")
             await asyncio.sleep(wait_time)
-            return
-
-        # Check if we need to wait for rate limit
-        wait_time = self._calculate_wait_time(stats, rule, current_time)
-        if wait_time > 0:
-            logger.debug(f"Rate limiting {domain}, waiting {wait_time:.2f}s")
-            await asyncio.sleep(wait_time)
-
-        # Update stats
-        self._update_stats(stats, current_time)
 
     def _extract_domain(self, url: str) -> Optional[str]:
         """
@@ -131,80 +308,107 @@ class RateLimiter:
         Returns:
             Domain name or None if invalid
         """
-        try:
-            parsed = urlparse(url)
-            if not parsed.netloc:
-                return None
-            # Remove www. prefix
-            domain = parsed.netloc.lower()
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            return domain
-        except Exception:
-            return None
+        # Only scheme and host matter, so every path on a host shares one
+        # cache entry
+        return extract_domain("/".join(url.split("/", 3)[:3]))
 
-    def _get_domain_stats(self, domain: str) -> DomainStats:
+    def _get_domain_stats(self, domain: str) -> int:
         """
-        Get or create domain statistics.
+        Get or create the statistics row for a domain.
 
         Args:
             domain: Domain name
 
         Returns:
-            DomainStats object
+            Row index into the per-domain arrays
+        """
+        return self._rows[domain]
+
+    def _allocate_row(self) -> int:
+        """Claim a free row and reset it to a full, never-used bucket."""
+        if len(self._rows) >= self.max_domains:
+            # Take over the least recently used domain's row
+            domain, row = self._rows.popitem(last=False)
+            self._resolved_rule.pop(domain, None)
+            self._cooldown_events.pop(domain, None)
+        elif self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._rows)
+            if row == len(self._tokens):
+                self._grow()
+        # A bucket that was never refilled starts full
+        self._tokens[row] = 0.0
+        self._last_refill[row] = _NEVER
+        self._last_request[row] = 0
+        self._cooldown_until[row] = 0
+        return row
+
+    def _grow(self) -> None:
+        """Double the capacity of the per-domain arrays."""
+        capacity = 2 * len(self._tokens)
+        for name in ("_tokens", "_last_refill", "_last_request", "_cooldown_until"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def get_domain_stats(self, domain: str) -> Optional[DomainStats]:
         """
-        if domain not in self._domain_stats:
-            self._domain_stats[domain] = DomainStats()
-        return self._domain_stats[domain]
+        Get a snapshot of a domain's statistics.
 
-    def _calculate_wait_time(self, stats: DomainStats, rule: RateLimitRule, current_time: float) -> float:
+        Args:
+            domain: Domain name
+
+        Returns:
+            DomainStats for the domain, or None if it has not been seen
+        """
+        row = self._rows.get(domain)
+        if row is None:
+            return None
+        return DomainStats(
+            tokens=float(self._tokens[row]),
+            last_refill=int(self._last_refill[row]) / _NS_PER_SECOND,
+            last_request=int(self._last_request[row]) / _NS_PER_SECOND,
+            cooldown_until=int(self._cooldown_until[row]) / _NS_PER_SECOND,
+        )
+
+    def _calculate_wait_time(self, row: int, rule: RateLimitRule, now_ns: int) -> float:
         """
-        Calculate how long to wait before making a request.
+        Take a token from the domain's bucket and return how long to wait for it.
+
+        The bucket is refilled for the time elapsed since the last call and
+        capped at the rule's capacity. The token is always taken, so the
+        balance goes negative when the bucket is empty and concurrent
+        callers queue behind each other.
 
         Args:
-            stats: Current domain statistics
+            row: Domain statistics row
             rule: Rate limiting rule
-            current_time: Current timestamp
+            now_ns: Current time.monotonic_ns() value
 
         Returns:
             Wait time in seconds (0 if no wait needed)
         """
-        # Reset window if needed
-        window_duration = 60.0  # 1 minute window
-        if current_time - stats.window_start >= window_duration:
-            stats.request_count = 0
-            stats.window_start = current_time
-
-        # Check burst limit first
-        if rule.burst_limit > 0 and stats.request_count >= rule.burst_limit:
-            # Calculate time until next window
-            time_to_next_window = window_duration - (current_time - stats.window_start)
-            return max(0, time_to_next_window)
-
-        # Check rate limit
-        if stats.request_count >= rule.requests_per_minute:
-            # Calculate time until next window
-            time_to_next_window = window_duration - (current_time - stats.window_start)
-            return max(0, time_to_next_window)
-
-        # Check minimum interval between requests
-        min_interval = 60.0 / rule.requests_per_minute
-        time_since_last = current_time - stats.last_request
-        if time_since_last < min_interval:
-            return min_interval - time_since_last
-
-        return 0.0
-
-    def _update_stats(self, stats: DomainStats, current_time: float) -> None:
+        rate = rule.rate_per_second
+        tokens_by_row, last_refill_by_row = self._tokens, self._last_refill
+        tokens = min(
+            float(tokens_by_row[row]) + max(now_ns - int(last_refill_by_row[row]), 0) / _NS_PER_SECOND * rate,
+            rule.capacity,
+        ) - 1.0
+        tokens_by_row[row] = tokens
+        last_refill_by_row[row] = max(now_ns, int(last_refill_by_row[row]))
+        return -tokens / rate if tokens < 0.0 else 0.0
+
+    def _update_stats(self, row: int, now_ns: int) -> None:
         """
         Update domain statistics after a request.
 
         Args:
-            stats: Domain statistics to update
-            current_time: Current timestamp
+            row: Domain statistics row to update
+            now_ns: time.monotonic_ns() value at which the request goes out
         """
-        stats.request_count += 1
-        stats.last_request = current_time
+        self._last_request[row] = now_ns
 
     def handle_rate_limit_response(self, url: str, status_code: int, retry_after: Optional[str] = None) -> None:
         """
@@ -219,28 +423,45 @@ class RateLimiter:
         if not domain:
             return
 
-        stats = self._get_domain_stats(domain)
+        row = self._get_domain_stats(domain)
+        self._rows.move_to_end(domain)
         rule = self.get_domain_rule(domain)
 
         # Calculate cooldown based on response
-        if retry_after:
-            try:
-                # Try parsing as seconds
-                cooldown = float(retry_after)
-            except ValueError:
-                # Try parsing as HTTP date
-                try:
-                    from email.utils import parsedate_to_datetime
-                    retry_date = parsedate_to_datetime(retry_after)
-                    cooldown = (retry_date - datetime.now(retry_date.tzinfo)).total_seconds()
-                except Exception:
-                    cooldown = rule.cooldown_seconds
-        else:
+        parsed = parse_retry_after(retry_after) if retry_after else None
+        if parsed is None:
             cooldown = rule.cooldown_seconds
-
-        stats.cooldown_until = time.time() + cooldown
+        else:
+            cooldown, is_absolute = parsed
+            if is_absolute:
+                cooldown -= time.time()
+        if not math.isfinite(cooldown):
+            cooldown = rule.cooldown_seconds if math.isfinite(rule.cooldown_seconds) else MAX_COOLDOWN_SECONDS
+        # Past dates mean no wait; huge delays would overflow the int64 ns arrays
+        cooldown = min(max(cooldown, 0.0), MAX_COOLDOWN_SECONDS)
+
+        self._cooldown_until[row] = time.monotonic_ns() + int(cooldown * _NS_PER_SECOND)
+        self._arm_cooldown_event(domain, cooldown)
         logger.warning(f"Rate limited by {domain} (status {status_code}), cooling down for {cooldown:.2f}s")
 
+    def _arm_cooldown_event(self, domain: str, cooldown: float) -> None:
+        """
+        Replace a domain's cooldown event with one set when the cooldown ends.
+
+        Args:
+            domain: Domain entering a cooldown
+            cooldown: Cooldown length in seconds
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to time the event; waiters fall back to sleeping
+            self._cooldown_events.pop(domain, None)
+            return
+        event = asyncio.Event()
+        loop.call_later(max(cooldown, 0.0), event.set)
+        self._cooldown_events[domain] = event
+
     def get_stats(self) -> Dict[str, dict]:
         """
         Get current rate limiting statistics.
@@ -248,17 +469,18 @@ class RateLimiter:
         Returns:
             Dictionary of domain statistics
         """
-        current_time = time.time()
+        current_time = time.monotonic_ns() / _NS_PER_SECOND
         stats = {}
 
-        for domain, domain_stats in self._domain_stats.items():
+        for domain in self._rows:
             rule = self.get_domain_rule(domain)
+            snapshot = self.get_domain_stats(domain)
             stats[domain] = {
-                "requests_this_window": domain_stats.request_count,
-                "window_start": domain_stats.window_start,
-                "last_request": domain_stats.last_request,
-                "cooldown_until": domain_stats.cooldown_until,
-                "is_cooling_down": current_time < domain_stats.cooldown_until,
+                "tokens": snapshot.tokens,
+                "last_refill": snapshot.last_refill,
+                "last_request": snapshot.last_request,
+                "cooldown_until": snapshot.cooldown_until,
+                "is_cooling_down": current_time < snapshot.cooldown_until,
                 "rule": {
                     "requests_per_minute": rule.requests_per_minute,
                     "burst_limit": rule.burst_limit,
@@ -275,11 +497,15 @@ class RateLimiter:
         Args:
             domain: Domain to reset
         """
-        if domain in self._domain_stats:
-            del self._domain_stats[domain]
+        self._cooldown_events.pop(domain, None)
+        row = self._rows.pop(domain, None)
+        if row is not None:
+            self._free_rows.append(row)
             logger.info(f"Reset rate limiting stats for {domain}")
 
     def reset_all(self) -> None:
         """Reset all rate limiting statistics."""
-        self._domain_stats.clear()
+        self._rows.clear()
+        self._free_rows.clear()
+        self._cooldown_events.clear()
         logger.info("Reset all rate limiting statistics")
\ No newline at end of file
@@ -5,15 +5,38 @@ This module provides the core crawling service that uses Crawl4AI to extract
 content from web pages and return structured results.
 """
 
-import hashlib
+import functools
+import re
 import time
 from typing import Optional
 from urllib.parse import urlparse
 
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
 
+from .deduplicator import sha256_hex, sha256_hex_and_size
 from .models import CrawlConfig, CrawlResult
 
+_TITLE_RE = re.compile(r'<title[^>]*>([^<]+)</title>', re.IGNORECASE)
+
+# Page metadata fields copied into CrawlResult.metadata
+_PAGE_METADATA_KEYS = ('title', 'description', 'keywords', 'author', 'language', 'content_type')
+
+
+@functools.lru_cache(maxsize=4096)
+def _url_parts(url: str) -> tuple[str, str]:
+    """Return (netloc, scheme) of a URL; pages of one crawl are parsed once."""
+    parsed = urlparse(url)
+    return parsed.netloc, parsed.scheme
+
+
+def _iter_hrefs(links: list):
+    """Yield the URL of each link in a list of strings and/or {'href': ...} dicts."""
+    for link in links:
+        if isinstance(link, str):
+            yield link
+        elif isinstance(link, dict) and 'href' in link:
+            yield link['href']
+
 
 class CrawlService:
     """
@@ -89,20 +112,20 @@ class CrawlService:
             crawl_time = time.time() - start_time
 
             # Extract content and metadata
-            content = ""
-            if hasattr(result, 'markdown') and result.markdown:
-                content = result.markdown.raw_markdown if hasattr(result.markdown, 'raw_markdown') else str(result.markdown)
-            elif hasattr(result, 'markdown_v2') and result.markdown_v2:
-                content = result.markdown_v2.raw_markdown if hasattr(result.markdown_v2, 'raw_markdown') else str(result.markdown_v2)
+            markdown = getattr(result, 'markdown', None) or getattr(result, 'markdown_v2', None)
+            if markdown:
+                raw_markdown = getattr(markdown, 'raw_markdown', None)
+                content = raw_markdown if raw_markdown is not None else str(markdown)
             else:
                 # Fallback to HTML content
-                content = result.html if hasattr(result, 'html') and result.html else ""
+                content = getattr(result, 'html', None) or ""
             title = self._extract_title(result)
             metadata = self._extract_metadata(result, config)
             links = self._extract_links(result)
 
-            # Generate content hash for deduplication
-            content_hash = self._generate_content_hash(content)
+            # Generate content hash for deduplication (and the encoded size,
+            # from the same UTF-8 pass)
+            content_hash, content_size = sha256_hex_and_size(content)
 
             # Create result object
             crawl_result = CrawlResult(
@@ -112,7 +135,7 @@ class CrawlService:
                 metadata=metadata,
                 links=links,
                 content_hash=content_hash,
-                content_size=len(content.encode('utf-8')),
+                content_size=content_size,
                 crawl_time=crawl_time,
             )
 
@@ -140,8 +163,7 @@ class CrawlService:
             # Fallback: extract from HTML if available
             if hasattr(result, 'html') and result.html:
                 # Simple title extraction (could be improved)
-                import re
-                title_match = re.search(r'<title[^>]*>([^<]+)</title>', result.html, re.IGNORECASE)
+                title_match = _TITLE_RE.search(result.html)
                 if title_match:
                     return title_match.group(1).strip()
 
@@ -157,14 +179,8 @@ class CrawlService:
             if config.extract_metadata and hasattr(result, 'metadata'):
                 # Copy relevant metadata
                 result_meta = result.metadata or {}
-                metadata.update({
-                    'title': result_meta.get('title'),
-                    'description': result_meta.get('description'),
-                    'keywords': result_meta.get('keywords'),
-                    'author': result_meta.get('author'),
-                    'language': result_meta.get('language'),
-                    'content_type': result_meta.get('content_type'),
-                })
+                for key in _PAGE_METADATA_KEYS:
+                    metadata[key] = result_meta.get(key)
 
             # Add crawl configuration info
             metadata['crawl_config'] = {
@@ -175,9 +191,7 @@ class CrawlService:
             }
 
             # Add URL information
-            parsed_url = urlparse(result.url or "")
-            metadata['domain'] = parsed_url.netloc
-            metadata['scheme'] = parsed_url.scheme
+            metadata['domain'], metadata['scheme'] = _url_parts(result.url or "")
 
         except Exception as e:
             metadata['extraction_error'] = str(e)
@@ -190,16 +204,21 @@ class CrawlService:
 
         try:
             if hasattr(result, 'links') and result.links:
-                # result.links might be a list of link objects or strings
-                if isinstance(result.links, list):
-                    for link in result.links:
-                        if isinstance(link, str):
-                            links.append(link)
-                        elif isinstance(link, dict) and 'href' in link:
-                            links.append(link['href'])
-
-            # Remove duplicates and filter
-            links = list(set(links))
+                # result.links might be a list of link objects or strings.
+                # dict.fromkeys drops duplicates in one pass, keeping
+                # first-seen order; a list of plain strings skips the
+                # per-item type checks
+                raw = result.links
+                if isinstance(raw, list):
+                    if isinstance(raw[0], str):
+                        try:
+                            links = list(dict.fromkeys(raw))
+                        except TypeError:
+                            # Mixed list with unhashable link objects
+                            links = list(dict.fromkeys(_iter_hrefs(raw)))
+                    else:
+                        links = list(dict.fromkeys(_iter_hrefs(raw)))
+
             # Could add filtering for internal/external links here
 
         except Exception as e:
@@ -211,7 +230,7 @@ class CrawlService:
 
     def _generate_content_hash(self, content: str) -> str:
         """Generate SHA256 hash of content for deduplication."""
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        return sha256_hex(content)
 
     async def health_check(self) -> bool:
         """Check if the crawler service is healthy."""
@@ -6,5 +6,5 @@ if [ -d "/app/.venv" ]; then
     source /app/.venv/bin/activate
 fi
 
-# Start the Flask server
-exec flask run --host=0.0.0.0 --port=5000
+# Start the API server: gunicorn supervising threaded (gthread) workers
+exec gunicorn -c gunicorn.conf.py app:app
@@ -1,40 +1,64 @@
 # Graphiti integration for Ragflow Slim
 # Temporal knowledge graph client for entity and relationship extraction
 import os
+import atexit
+import json
 import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import importlib.util
 import logging
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from importlib import import_module
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential, wait_random
 
 try:
-    from graphiti_core import Graphiti
-    from graphiti_core.llm_client import OpenAIClient, LLMConfig
-    from graphiti_core.embedder.openai import OpenAIEmbedder, OpenAIEmbedderConfig
-    
-    # Try to import GeminiClient
-    try:
-        from graphiti_core.llm_client.gemini_client import GeminiClient
-        GEMINI_AVAILABLE = True
-    except ImportError:
-        GEMINI_AVAILABLE = False
-        GeminiClient = None
-    
-    # Try to import GeminiRerankerClient
+    import orjson
+except ImportError:
+    orjson = None
+
+# graphiti_core pulls in httpx, pydantic, google-genai and tiktoken, so it is
+# only imported when a client is first built; finding it is enough here
+GRAPHITI_AVAILABLE = importlib.util.find_spec("graphiti_core") is not None
+if not GRAPHITI_AVAILABLE:
+    logging.warning("graphiti_core not installed. Graph features will be disabled.")
+
+
+@functools.lru_cache(maxsize=1)
+def _import_graphiti() -> Optional[Dict[str, Any]]:
+    """Import the graphiti_core classes on first use, or None if unavailable."""
     try:
-        from graphiti_core.cross_encoder.gemini_reranker_client import GeminiRerankerClient
-        GEMINI_RERANKER_AVAILABLE = True
-    except ImportError:
-        GEMINI_RERANKER_AVAILABLE = False
-        GeminiRerankerClient = None
-    
-    GRAPHITI_AVAILABLE = True
-except ImportError as e:
-    GRAPHITI_AVAILABLE = False
-    GEMINI_AVAILABLE = False
-    GEMINI_RERANKER_AVAILABLE = False
-    GeminiClient = None
-    GeminiRerankerClient = None
-    logging.warning(f"graphiti_core not installed: {e}. Graph features will be disabled.")
+        classes = {
+            "Graphiti": import_module("graphiti_core").Graphiti,
+            "OpenAIClient": import_module("graphiti_core.llm_client").OpenAIClient,
+            "LLMConfig": import_module("graphiti_core.llm_client").LLMConfig,
+            "OpenAIEmbedder": import_module("graphiti_core.embedder.openai").OpenAIEmbedder,
+            "OpenAIEmbedderConfig": import_module("graphiti_core.embedder.openai").OpenAIEmbedderConfig,
+            "Neo4jDriver": import_module("graphiti_core.driver.neo4j_driver").Neo4jDriver,
+            "AsyncGraphDatabase": import_module("neo4j").AsyncGraphDatabase,
+        }
+    except ImportError as e:
+        logging.warning("graphiti_core could not be imported: %s. Graph features will be disabled.", e)
+        return None
+
+    # Gemini support needs the graphiti-core[google-genai] extra
+    for name, module in (
+        ("GeminiClient", "graphiti_core.llm_client.gemini_client"),
+        ("GeminiRerankerClient", "graphiti_core.cross_encoder.gemini_reranker_client"),
+    ):
+        try:
+            classes[name] = getattr(import_module(module), name)
+        except ImportError:
+            classes[name] = None
+    return classes
+
 
 try:
     from llm_provider import llm_config
@@ -47,128 +71,247 @@ except ImportError:
 NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "graphiti_password")
+# Driver connection pool; concurrent episode batches queue on it
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "64"))
+NEO4J_ACQUIRE_TIMEOUT = float(os.getenv("NEO4J_ACQUIRE_TIMEOUT", "60"))
 
 # Global Graphiti instance (initialized lazily)
 _graphiti_instance: Optional[Any] = None
+_graphiti_lock = threading.Lock()
+
+# Set once build_indices_and_constraints has succeeded; the schema only needs
+# declaring once per process, not before every episode. Episodes run on both
+# app.py's loop and _bg_loop, so this is a plain flag and the lock serializing
+# the build is per loop (asyncio locks are loop-bound, like _llm_sems)
+_schema_ready = False
+_schema_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+    weakref.WeakKeyDictionary()
+)
+# Whether the embedder warmup has run alongside the first schema build
+_embedder_warmed = False
+
+# Persistent loop behind the synchronous wrappers. A fresh loop per call pays
+# setup/teardown every time and closes loops the Neo4j driver still has tasks
+# and connections bound to.
+_bg_loop = asyncio.new_event_loop()
+_bg_thread = threading.Thread(target=_bg_loop.run_forever, name="graphiti-event-loop", daemon=True)
+_bg_thread.start()
+
+
+def _stop_bg_loop() -> None:
+    """Stop the background loop and wait for its thread at interpreter exit."""
+    _bg_loop.call_soon_threadsafe(_bg_loop.stop)
+    _bg_thread.join(timeout=5)
+
+
+atexit.register(_stop_bg_loop)
+
+
+def _run(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the background loop and block until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _bg_loop).result(timeout=timeout)
 
 
 def get_graphiti_client() -> Optional[Any]:
     """Get or create the global Graphiti client instance with multi-provider LLM support."""
     logging.debug("get_graphiti_client() called")
     global _graphiti_instance
-    
+
     if _graphiti_instance is not None:
         return _graphiti_instance
-    
-    if not GRAPHITI_AVAILABLE:
+
+    # Double-checked: concurrent first calls from worker threads would each
+    # build a Neo4j driver and HTTP pools and leak all but one
+    with _graphiti_lock:
+        if _graphiti_instance is None:
+            _graphiti_instance = _create_graphiti_client()
+    return _graphiti_instance
+
+
+@functools.lru_cache(maxsize=None)
+def _get_embedder(api_key: str, base_url: Optional[str] = None, model: Optional[str] = None) -> Any:
+    """
+    Long-lived OpenAI-compatible embedder, one per endpoint and model.
+
+    Shared by every Graphiti client built in the process, so they reuse its
+    HTTP connection pool.
+    """
+    classes = _import_graphiti()
+    config_kwargs = {"api_key": api_key}
+    if base_url is not None:
+        config_kwargs["base_url"] = base_url
+    if model is not None:
+        config_kwargs["embedding_model"] = model
+    return classes["OpenAIEmbedder"](config=classes["OpenAIEmbedderConfig"](**config_kwargs))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_reranker(api_key: str, model: str) -> Any:
+    """Long-lived Gemini reranker, one per key and model."""
+    classes = _import_graphiti()
+    return classes["GeminiRerankerClient"](config=classes["LLMConfig"](api_key=api_key, model=model))
+
+
+def _ollama_embedder() -> Any:
+    """Ollama embedder through its OpenAI-compatible API endpoint."""
+    return _get_embedder(
+        "ollama",  # Dummy key for Ollama
+        "http://host.docker.internal:11434/v1",  # OpenAI-compatible API endpoint
+        os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+    )
+
+
+def _build_ollama_clients(classes: Dict[str, Any], provider_config: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    """OpenAI LLM (for structured outputs) with Ollama embeddings."""
+    # Ollama has compatibility issues with Graphiti's structured outputs
+    # Use OpenAI for LLM (required for entity extraction) and Ollama for embeddings
+    logging.warning("Graphiti requires OpenAI's structured outputs for entity extraction.")
+    logging.info("Using OpenAI for LLM client and Ollama for embedder to minimize costs.")
+
+    # Check if OpenAI key is available
+    llm_client = None
+    openai_key = os.getenv("OPENAI_API_KEY")
+    logging.info("OpenAI key present: %s", bool(openai_key))
+    if not openai_key:
+        logging.error("OpenAI API key required for Graphiti LLM client")
+    else:
+        llm_client_config = classes["LLMConfig"](
+            api_key=openai_key,
+            model="gpt-4o-mini"  # Use cost-effective model that supports structured outputs
+        )
+        llm_client = classes["OpenAIClient"](config=llm_client_config)
+
+    return llm_client, _ollama_embedder(), None
+
+
+def _build_google_clients(classes: Dict[str, Any], provider_config: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    """Gemini LLM and reranker with Ollama embeddings."""
+    # Use Google Gemini for LLM client
+    logging.info("Using Google Gemini for entity extraction and reranking")
+    GeminiClient = classes["GeminiClient"]
+    GeminiRerankerClient = classes["GeminiRerankerClient"]
+    LLMConfig = classes["LLMConfig"]
+
+    llm_client = None
+    reranker_client = None
+
+    if GeminiClient is None:
+        logging.error("GeminiClient not available. Try: pip install graphiti-core[google-genai]")
+    else:
+        google_key = os.getenv("GOOGLE_API_KEY")
+        if not google_key:
+            logging.error("Google API key required for Gemini LLM client")
+        else:
+            try:
+                llm_client_config = LLMConfig(
+                    api_key=google_key,
+                    model=os.getenv("GOOGLE_MODEL", "gemini-2.5-flash")  # Cost-effective Gemini model
+                )
+                llm_client = GeminiClient(config=llm_client_config)
+                logging.info("Gemini client initialized successfully")
+            except Exception as e:
+                logging.error("Failed to initialize Gemini client: %s", e)
+
+    # Initialize GeminiRerankerClient for cross-encoding
+    if GeminiRerankerClient is not None:
+        google_key = os.getenv("GOOGLE_API_KEY")
+        if google_key:
+            try:
+                reranker_client = _get_reranker(google_key, os.getenv("GOOGLE_MODEL", "gemini-2.5-flash"))
+                logging.info("Gemini reranker client initialized successfully")
+            except Exception as e:
+                logging.warning("Failed to initialize Gemini reranker client: %s", e)
+                reranker_client = None
+    else:
+        logging.warning("GeminiRerankerClient not available, falling back to default reranker")
+
+    # Use Ollama for embeddings (optional, can use Google embeddings too)
+    return llm_client, _ollama_embedder(), reranker_client
+
+
+def _build_openai_clients(classes: Dict[str, Any], provider_config: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    """OpenAI LLM and embeddings."""
+    llm_client_config = classes["LLMConfig"](
+        api_key=provider_config["llm_config"]["api_key"],
+        model=provider_config["llm_config"]["model"]
+    )
+    llm_client = classes["OpenAIClient"](config=llm_client_config)
+
+    # Use default OpenAI embedder for OpenAI
+    return llm_client, _get_embedder(provider_config["llm_config"]["api_key"]), None
+
+
+@functools.lru_cache(maxsize=None)
+def _pooled_neo4j_driver_class(base: type, graph_database: Any) -> type:
+    """Subclass of Graphiti's Neo4jDriver whose client pool is sized from the environment."""
+
+    class PooledNeo4jDriver(base):
+        """Neo4jDriver with its pool sized by NEO4J_POOL_SIZE / NEO4J_ACQUIRE_TIMEOUT."""
+
+        def __init__(self, uri: str, user: Optional[str], password: Optional[str], database: str = "neo4j"):
+            super().__init__(uri, user, password, database)
+            # Neo4jDriver doesn't take pool settings, so its own client is
+            # replaced; it never opened a connection, and closing it here keeps
+            # it from warning about being unclosed when collected
+            default_client = self.client
+            self.client = graph_database.driver(
+                uri=uri,
+                auth=(user or "", password or ""),
+                max_connection_pool_size=NEO4J_POOL_SIZE,
+                connection_acquisition_timeout=NEO4J_ACQUIRE_TIMEOUT,
+            )
+            asyncio.run(default_client.close())
+
+    return PooledNeo4jDriver
+
+
+def _neo4j_driver(classes: Dict[str, Any]) -> Any:
+    """Graphiti Neo4j driver with its pool sized by NEO4J_POOL_SIZE / NEO4J_ACQUIRE_TIMEOUT."""
+    driver_class = _pooled_neo4j_driver_class(classes["Neo4jDriver"], classes["AsyncGraphDatabase"])
+    args = (NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return driver_class(*args)
+    # Built inside a running loop, newer Neo4jDriver versions schedule their own
+    # schema build (duplicating _ensure_schema), and the replaced client can't
+    # be closed synchronously; so construct it on a thread with no loop
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(driver_class, *args).result()
+
+
+# Provider -> builder of its (llm_client, embedder_client, reranker_client)
+_PROVIDER_BUILDERS = {
+    "ollama": _build_ollama_clients,
+    "google": _build_google_clients,
+    "openai": _build_openai_clients,
+}
+
+
+def _create_graphiti_client() -> Optional[Any]:
+    """Build a Graphiti client for the configured LLM provider, or None on failure."""
+    graphiti_classes = _import_graphiti() if GRAPHITI_AVAILABLE else None
+    if graphiti_classes is None:
         logging.error("Graphiti is not available. Install graphiti-core package.")
         return None
-    
+    Graphiti = graphiti_classes["Graphiti"]
+
     try:
         # Get LLM configuration
         if LLM_CONFIG_AVAILABLE:
             provider_config = llm_config.get_graphiti_llm_config()
-            logging.info(f"Initializing Graphiti with {llm_config.provider} provider")
-            
-            # Create LLM client based on provider
-            llm_client = None
-            embedder_client = None
-            reranker_client = None
-            
-            if llm_config.provider == "ollama":
-                # Ollama has compatibility issues with Graphiti's structured outputs
-                # Use OpenAI for LLM (required for entity extraction) and Ollama for embeddings
-                logging.warning("Graphiti requires OpenAI's structured outputs for entity extraction.")
-                logging.info("Using OpenAI for LLM client and Ollama for embedder to minimize costs.")
-
-                # Check if OpenAI key is available
-                openai_key = os.getenv("OPENAI_API_KEY")
-                logging.info(f"OpenAI key present: {bool(openai_key)}")
-                if not openai_key:
-                    logging.error("OpenAI API key required for Graphiti LLM client")
-                    llm_client = None
-                else:
-                    llm_client_config = LLMConfig(
-                        api_key=openai_key,
-                        model="gpt-4o-mini"  # Use cost-effective model that supports structured outputs
-                    )
-                    llm_client = OpenAIClient(config=llm_client_config)
-                
-                # Configure Ollama embedder with OpenAI-compatible API endpoint
-                embedder_config = OpenAIEmbedderConfig(
-                    api_key="ollama",  # Dummy key for Ollama
-                    base_url="http://host.docker.internal:11434/v1",  # OpenAI-compatible API endpoint
-                    embedding_model=os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
-                )
-                embedder_client = OpenAIEmbedder(config=embedder_config)
-                
-            elif llm_config.provider == "google":
-                # Use Google Gemini for LLM client
-                logging.info("Using Google Gemini for entity extraction and reranking")
+            logging.info("Initializing Graphiti with %s provider", llm_config.provider)
 
-                llm_client = None
-                reranker_client = None
+            # Create LLM client based on provider
+            builder = _PROVIDER_BUILDERS.get(llm_config.provider)
+            if builder is not None:
+                llm_client, embedder_client, reranker_client = builder(graphiti_classes, provider_config)
+            else:
+                llm_client = embedder_client = reranker_client = None
 
-                if not GEMINI_AVAILABLE or GeminiClient is None:
-                    logging.error("GeminiClient not available. Try: pip install graphiti-core[google-genai]")
-                else:
-                    google_key = os.getenv("GOOGLE_API_KEY")
-                    if not google_key:
-                        logging.error("Google API key required for Gemini LLM client")
-                    else:
-                        try:
-                            llm_client_config = LLMConfig(
-                                api_key=google_key,
-                                model=os.getenv("GOOGLE_MODEL", "gemini-2.5-flash")  # Cost-effective Gemini model
-                            )
-                            llm_client = GeminiClient(config=llm_client_config)
-                            logging.info("Gemini client initialized successfully")
-                        except Exception as e:
-                            logging.error(f"Failed to initialize Gemini client: {e}")
-                
-                # Initialize GeminiRerankerClient for cross-encoding
-                if GEMINI_RERANKER_AVAILABLE and GeminiRerankerClient is not None:
-                    google_key = os.getenv("GOOGLE_API_KEY")
-                    if google_key:
-                        try:
-                            reranker_config = LLMConfig(
-                                api_key=google_key,
-                                model=os.getenv("GOOGLE_MODEL", "gemini-2.5-flash")
-                            )
-                            reranker_client = GeminiRerankerClient(config=reranker_config)
-                            logging.info("Gemini reranker client initialized successfully")
-                        except Exception as e:
-                            logging.warning(f"Failed to initialize Gemini reranker client: {e}")
-                            reranker_client = None
-                else:
-                    logging.warning("GeminiRerankerClient not available, falling back to default reranker")
-                
-                # Use Ollama for embeddings (optional, can use Google embeddings too)
-                embedder_config = OpenAIEmbedderConfig(
-                    api_key="ollama",
-                    base_url="http://host.docker.internal:11434/v1",
-                    embedding_model=os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
-                )
-                embedder_client = OpenAIEmbedder(config=embedder_config)
-                
-            elif llm_config.provider == "openai":
-                llm_client_config = LLMConfig(
-                    api_key=provider_config["llm_config"]["api_key"],
-                    model=provider_config["llm_config"]["model"]
-                )
-                llm_client = OpenAIClient(config=llm_client_config)
-                
-                # Use default OpenAI embedder for OpenAI
-                embedder_config = OpenAIEmbedderConfig(
-                    api_key=provider_config["llm_config"]["api_key"]
-                )
-                embedder_client = OpenAIEmbedder(config=embedder_config)
-            
             # Initialize Graphiti with custom LLM client, embedder, and reranker
             graphiti_kwargs = {
-                "uri": NEO4J_URI,
-                "user": NEO4J_USER,
-                "password": NEO4J_PASSWORD,
+                "graph_driver": _neo4j_driver(graphiti_classes),
                 "llm_client": llm_client,
                 "embedder": embedder_client
             }
@@ -176,26 +319,22 @@ def get_graphiti_client() -> Optional[Any]:
             if reranker_client is not None:
                 graphiti_kwargs["cross_encoder"] = reranker_client
             
-            _graphiti_instance = Graphiti(**graphiti_kwargs)
+            instance = Graphiti(**graphiti_kwargs)
         else:
             # Fallback to default OpenAI configuration
             logging.warning("Using default OpenAI configuration")
-            _graphiti_instance = Graphiti(
-                uri=NEO4J_URI,
-                user=NEO4J_USER,
-                password=NEO4J_PASSWORD
-            )
+            instance = Graphiti(graph_driver=_neo4j_driver(graphiti_classes))
 
-        logging.info(f"Graphiti client initialized with Neo4j at {NEO4J_URI}")
+        logging.info("Graphiti client initialized with Neo4j at %s", NEO4J_URI)
 
         # Note: Database schema will be initialized on first episode addition
     except Exception as e:
-        logging.error(f"Failed to initialize Graphiti client: {e}")
+        logging.error("Failed to initialize Graphiti client: %s", e)
         import traceback
-        logging.error(f"Traceback: {traceback.format_exc()}")
+        logging.error("Traceback: %s", traceback.format_exc())
         return None
-    
-    return _graphiti_instance
+
+    return instance
 
 
 async def add_episode_async(
@@ -219,32 +358,197 @@ async def add_episode_async(
     client = get_graphiti_client()
     if not client:
         return {"error": "Graphiti client not available"}
-    
+
+    await _ensure_schema(client)
+    return await _add_episode(client, name, episode_body, source_description, reference_time)
+
+
+# Attempts per Graphiti call before a transient failure is returned as an error
+GRAPHITI_RETRY_ATTEMPTS = int(os.getenv("GRAPHITI_RETRY_ATTEMPTS", "5"))
+_RETRYABLE_STATUS = frozenset((408, 429, 500, 502, 503, 504))
+
+# Episode extractions running at once, across all callers on an event loop.
+# Without a shared bound, concurrent add_episode calls from independent
+# coroutines can exceed the LLM's rate limit and trigger a storm of retried
+# 429s. asyncio semaphores are loop-bound, so each loop gets its own.
+GRAPHITI_MAX_CONCURRENCY = int(os.getenv("GRAPHITI_MAX_CONCURRENCY", "8"))
+_llm_sems: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _llm_sem() -> asyncio.Semaphore:
+    """The episode concurrency bound for the running loop."""
+    loop = asyncio.get_running_loop()
+    sem = _llm_sems.get(loop)
+    if sem is None:
+        sem = _llm_sems[loop] = asyncio.Semaphore(max(GRAPHITI_MAX_CONCURRENCY, 1))
+    return sem
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Whether a failed Graphiti call is worth retrying: rate limits, overload, dropped connections."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in _RETRYABLE_STATUS
+    # neo4j and httpx are loaded by the time a Graphiti call can fail
+    try:
+        from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+        if isinstance(exc, (ServiceUnavailable, SessionExpired, TransientError)):
+            return True
+    except ImportError:
+        pass
     try:
-        # Initialize database schema on first use (idempotent operation)
+        import httpx
+        return isinstance(exc, httpx.TransportError)
+    except ImportError:
+        return False
+
+
+_graphiti_retry = retry(
+    retry=retry_if_exception(_is_transient),
+    # Backoff from 0.5s plus up to 1s of jitter; wait_exponential_jitter's
+    # initial= is deprecated in 9.2, and google-genai pins tenacity<9.2
+    wait=wait_exponential(multiplier=0.5, max=8) + wait_random(0, 1),
+    stop=stop_after_attempt(GRAPHITI_RETRY_ATTEMPTS),
+    reraise=True,
+)
+
+
+@_graphiti_retry
+async def _client_add_episode(client: Any, **kwargs: Any) -> Any:
+    """client.add_episode, retried with backoff on transient failures."""
+    # Held per attempt, so a backoff sleep doesn't occupy a slot
+    async with _llm_sem():
+        return await client.add_episode(**kwargs)
+
+
+@_graphiti_retry
+async def _client_search(client: Any, **kwargs: Any) -> Any:
+    """client.search, retried with backoff on transient failures."""
+    return await client.search(**kwargs)
+
+
+def _schema_lock() -> asyncio.Lock:
+    """The schema build lock for the running loop."""
+    loop = asyncio.get_running_loop()
+    lock = _schema_locks.get(loop)
+    if lock is None:
+        lock = _schema_locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def _ensure_schema(client: Any) -> None:
+    """
+    Initialize the Graphiti database schema once per process.
+
+    Two loops racing on a cold start may both build it; the statements are
+    idempotent, so that only costs a round trip.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    async with _schema_lock():
+        if _schema_ready:
+            return
         logging.info("Attempting to initialize Graphiti database schema...")
-        try:
-            await client.build_indices_and_constraints()
+        # The schema round trip and the first embedder call are independent,
+        # so a cold start pays for the slower of the two rather than both
+        schema_result, _ = await asyncio.gather(
+            client.build_indices_and_constraints(),
+            _warm_embedder(client),
+            return_exceptions=True,
+        )
+        if isinstance(schema_result, BaseException):
+            # Not marked ready, so the next episode tries again
+            logging.warning("Schema initialization failed (may already exist): %s", schema_result)
+        else:
+            _schema_ready = True
             logging.info("Graphiti database schema initialized")
-        except Exception as schema_e:
-            logging.warning(f"Schema initialization failed (may already exist): {schema_e}")
-        
+
+
+async def _warm_embedder(client: Any) -> None:
+    """Open the embedder's connection before the first episode needs it."""
+    global _embedder_warmed
+    if _embedder_warmed:
+        return
+    _embedder_warmed = True
+    try:
+        await client.embedder.create(input_data=["warmup"])
+    except Exception as e:
+        logging.debug("Embedder warmup failed: %s", e)
+
+
+# Episode additions still running, keyed by a hash of (name, episode_body).
+# Retries and at-least-once queues resubmit the same episode while the first
+# is still extracting; those callers share the first result rather than
+# paying for LLM extraction again.
+_inflight_episodes: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+def _episode_key(name: str, episode_body: str) -> str:
+    return hashlib.blake2b(f"{name}|{episode_body}".encode(), digest_size=16).hexdigest()
+
+
+async def _add_episode(
+    client: Any,
+    name: str,
+    episode_body: str,
+    source_description: str,
+    reference_time: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Add one episode with an already initialized client, joining an identical one in flight."""
+    key = _episode_key(name, episode_body)
+    loop = asyncio.get_running_loop()
+    task = _inflight_episodes.get(key)
+    # Tasks are bound to their loop; a submission from another loop starts its own
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(
+            _add_episode_once(client, name, episode_body, source_description, reference_time)
+        )
+        _inflight_episodes[key] = task
+
+        def _forget(done: "asyncio.Task[Dict[str, Any]]") -> None:
+            if _inflight_episodes.get(key) is done:
+                del _inflight_episodes[key]
+
+        task.add_done_callback(_forget)
+    # Shielded so one caller cancelling doesn't abort the addition for the others
+    return await asyncio.shield(task)
+
+
+async def _add_episode_once(
+    client: Any,
+    name: str,
+    episode_body: str,
+    source_description: str,
+    reference_time: Optional[datetime] = None
+) -> Dict[str, Any]:
+    # One timestamp for both the graph and the response; Neo4j temporal
+    # types want it timezone-aware
+    reference_time = reference_time or datetime.now(timezone.utc)
+    try:
         # Add episode to graph
-        await client.add_episode(
+        await _client_add_episode(
+            client,
             name=name,
             episode_body=episode_body,
             source_description=source_description,
-            reference_time=reference_time or datetime.now()
+            reference_time=reference_time
         )
         
-        logging.info(f"Added episode '{name}' to knowledge graph")
+        # The graph changed, so cached searches may be stale
+        _search_cache_clear()
+        logging.info("Added episode '%s' to knowledge graph", name)
         return {
             "status": "success",
             "episode_name": name,
-            "timestamp": (reference_time or datetime.now()).isoformat()
+            "timestamp": reference_time.isoformat()
         }
     except Exception as e:
-        logging.error(f"Failed to add episode to Graphiti: {e}")
+        logging.error("Failed to add episode to Graphiti: %s", e)
         return {"error": str(e)}
 
 
@@ -255,15 +559,83 @@ def add_episode(
     reference_time: Optional[datetime] = None
 ) -> Dict[str, Any]:
     """Synchronous wrapper for add_episode_async."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(
-            add_episode_async(name, episode_body, source_description, reference_time)
-        )
-        return result
-    finally:
-        loop.close()
+    return _run(add_episode_async(name, episode_body, source_description, reference_time))
+
+
+async def add_episodes_batch_async(
+    items: List[Dict[str, Any]],
+    max_concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    """
+    Add many episodes to the knowledge graph concurrently.
+
+    Entity extraction is a remote LLM round-trip per episode, so episodes are
+    added in parallel, at most max_concurrency at a time. The schema is
+    initialized once for the whole batch.
+
+    Args:
+        items: Episodes as dicts of add_episode_async keyword arguments
+            (name, episode_body, source_description, optional reference_time)
+        max_concurrency: Maximum number of episodes being added at once
+
+    Returns:
+        One status dict per item, in the same order as items
+    """
+    client = get_graphiti_client()
+    if not client:
+        return [{"error": "Graphiti client not available"} for _ in items]
+
+    await _ensure_schema(client)
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def _one(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _add_episode(client, **item)
+
+    results = await asyncio.gather(*(_one(item) for item in items), return_exceptions=True)
+    return [{"error": str(r)} if isinstance(r, BaseException) else r for r in results]
+
+
+def add_episodes_batch(
+    items: List[Dict[str, Any]],
+    max_concurrency: int = 16
+) -> List[Dict[str, Any]]:
+    """Synchronous wrapper for add_episodes_batch_async."""
+    return _run(add_episodes_batch_async(items, max_concurrency))
+
+
+# Recent search results keyed by (normalized query, num_results, center node).
+# RAG turns tend to repeat a query, and each miss costs an embedder call plus
+# a Neo4j round trip. Errors are never cached; adding an episode clears it.
+GRAPH_SEARCH_CACHE_TTL = float(os.getenv("GRAPH_SEARCH_CACHE_TTL", "60"))
+GRAPH_SEARCH_CACHE_SIZE = int(os.getenv("GRAPH_SEARCH_CACHE_SIZE", "1024"))
+_search_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+
+def _search_cache_get(key: tuple) -> Optional[list]:
+    with _search_cache_lock:
+        hit = _search_cache.get(key)
+        if hit is None:
+            return None
+        if hit[0] <= time.monotonic():
+            del _search_cache[key]
+            return None
+        _search_cache.move_to_end(key)
+        return hit[1]
+
+
+def _search_cache_put(key: tuple, results: list) -> None:
+    with _search_cache_lock:
+        _search_cache[key] = (time.monotonic() + GRAPH_SEARCH_CACHE_TTL, results)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > GRAPH_SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
+
+def _search_cache_clear() -> None:
+    with _search_cache_lock:
+        _search_cache.clear()
 
 
 async def search_graph_async(
@@ -285,36 +657,62 @@ async def search_graph_async(
     client = get_graphiti_client()
     if not client:
         return [{"error": "Graphiti client not available"}]
-    
+
+    cache_key = (" ".join(query.split()), num_results, center_node_uuid)
+    cached = _search_cache_get(cache_key)
+    if cached is not None:
+        logging.debug("Graph search for '%s' served from cache", query)
+        return list(cached)
+
     try:
-        results = await client.search(
+        results = await _client_search(
+            client,
             query=query,
             num_results=num_results,
             center_node_uuid=center_node_uuid
         )
         
-        logging.info(f"Graph search for '{query}' returned {len(results)} results")
+        logging.info("Graph search for '%s' returned %s results", query, len(results))
+        _search_cache_put(cache_key, list(results))
         return results
     except Exception as e:
-        logging.error(f"Graph search failed: {e}")
+        logging.error("Graph search failed: %s", e)
         return [{"error": str(e)}]
 
 
+async def search_graph_stream(
+    query: str,
+    num_results: int = 10,
+    center_node_uuid: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Search the temporal knowledge graph, yielding results one at a time.
+
+    Lets a consumer serialize or forward each result as it goes instead of
+    handling the whole list at once. Graphiti's search returns a complete
+    list (it has no paged/cursor API), so the result set is fetched, and
+    cached, the same way as search_graph_async.
+
+    Args:
+        query: Natural language query
+        num_results: Maximum number of results to return
+        center_node_uuid: Optional UUID to center search around specific node
+
+    Yields:
+        Relevant entities and relationships from the graph, or a single
+        error dict
+    """
+    for result in await search_graph_async(query, num_results, center_node_uuid):
+        yield result
+
+
 def search_graph(
     query: str,
     num_results: int = 10,
     center_node_uuid: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """Synchronous wrapper for search_graph_async."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        results = loop.run_until_complete(
-            search_graph_async(query, num_results, center_node_uuid)
-        )
-        return results
-    finally:
-        loop.close()
+    return _run(search_graph_async(query, num_results, center_node_uuid))
 
 
 async def get_temporal_context_async(
@@ -339,7 +737,8 @@ async def get_temporal_context_async(
     
     try:
         # Search for the entity
-        search_results = await client.search(
+        search_results = await _client_search(
+            client,
             query=entity_name,
             num_results=5
         )
@@ -347,17 +746,18 @@ async def get_temporal_context_async(
         # Build temporal context
         context = {
             "entity": entity_name,
+            # Left as datetimes; serialize() encodes them natively
             "time_range": {
-                "start": start_time.isoformat() if start_time else None,
-                "end": end_time.isoformat() if end_time else None
+                "start": start_time,
+                "end": end_time
             },
             "results": search_results
         }
         
-        logging.info(f"Retrieved temporal context for entity '{entity_name}'")
+        logging.info("Retrieved temporal context for entity '%s'", entity_name)
         return context
     except Exception as e:
-        logging.error(f"Failed to get temporal context: {e}")
+        logging.error("Failed to get temporal context: %s", e)
         return {"error": str(e)}
 
 
@@ -367,24 +767,46 @@ def get_temporal_context(
     end_time: Optional[datetime] = None
 ) -> Dict[str, Any]:
     """Synchronous wrapper for get_temporal_context_async."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        result = loop.run_until_complete(
-            get_temporal_context_async(entity_name, start_time, end_time)
+    return _run(get_temporal_context_async(entity_name, start_time, end_time))
+
+
+def _jsonable(obj: Any) -> Any:
+    """Encode what orjson doesn't natively, e.g. Graphiti's pydantic edges."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, datetime) and not orjson:
+        # Match orjson's OPT_NAIVE_UTC
+        return (obj if obj.tzinfo else obj.replace(tzinfo=timezone.utc)).isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def serialize(ctx: Any) -> bytes:
+    """
+    Encode a graph result (e.g. a temporal context) as JSON bytes.
+
+    Uses orjson when it is installed, which handles datetimes and numpy
+    arrays such as embeddings directly; naive datetimes are taken as UTC.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            ctx, default=_jsonable, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
         )
-        return result
-    finally:
-        loop.close()
+    return json.dumps(ctx, default=_jsonable).encode()
 
 
 def close_graphiti_client():
     """Close the Graphiti client connection."""
-    global _graphiti_instance
-    if _graphiti_instance:
-        try:
-            # Graphiti cleanup if needed
-            _graphiti_instance = None
-            logging.info("Graphiti client closed")
-        except Exception as e:
-            logging.error(f"Error closing Graphiti client: {e}")
+    global _graphiti_instance, _embedder_warmed, _schema_ready
+    with _graphiti_lock:
+        if _graphiti_instance:
+            try:
+                # Graphiti cleanup if needed
+                _graphiti_instance = None
+                # A new client may point at a fresh database
+                _schema_ready = False
+                _embedder_warmed = False
+                logging.info("Graphiti client closed")
+            except Exception as e:
+                logging.error("Error closing Graphiti client: %s", e)
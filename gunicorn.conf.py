@@ -0,0 +1,21 @@
+# Gunicorn settings for Ragflow Slim
+# Gunicorn supervises threaded (gthread) workers serving the WSGI app:app.
+# Async views hand their coroutines to app.py's shared event loop, so each
+# worker thread only blocks on its own request. A gthread worker heartbeats
+# from its main loop, so timeout only restarts a worker whose whole process
+# is stuck, not one with a hung request thread; app.py bounds each async view
+# with RAGFLOW_VIEW_TIMEOUT and answers 504 instead.
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Do not preload: app.py starts its event-loop and output-writer threads at
+# import time, and threads do not survive the fork into each worker.
+preload_app = False
@@ -3,11 +3,32 @@ Multi-provider LLM configuration for RAGFlow Slim
 Supports: OpenAI, Google AI (Gemini), Ollama
 """
 import os
+import json
+import time
+import socket
 import logging
-from typing import Dict, Any
+import http.client
+from functools import cached_property
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# A positive Ollama probe is cached on disk so process start doesn't pay a
+# network round trip every time. Negatives are not cached: a closed port fails
+# fast, and Ollama started before a restart has to be picked up at once
+PROVIDER_CACHE_PATH = os.path.join(
+    os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "ragflow", "provider.json"
+)
+PROVIDER_CACHE_TTL_SECONDS = 3600
+# A closed port is refused at once; this only bounds an unreachable host
+OLLAMA_CONNECT_TIMEOUT_SECONDS = 0.1
+
 
 class LLMConfig:
     """Centralized LLM provider configuration."""
@@ -32,14 +53,14 @@ class LLMConfig:
         # Priority order: Ollama (local) > Google AI > OpenAI
         
         # Check Ollama (local, no auth needed)
-        try:
-            import requests
-            response = requests.get(f"{self.ollama_host}/api/tags", timeout=2)
-            if response.status_code == 200:
-                logger.info("✅ Detected Ollama running locally")
-                return "ollama"
-        except Exception as e:
-            logger.debug(f"Ollama not available: {e}")
+        ollama_available = self._read_cached_probe()
+        if ollama_available is None:
+            ollama_available = self._probe_ollama()
+            if ollama_available:
+                self._write_cached_probe(ollama_available)
+        if ollama_available:
+            logger.info("✅ Detected Ollama running locally")
+            return "ollama"
         
         # Check Google AI
         if self.google_api_key:
@@ -55,8 +76,64 @@ class LLMConfig:
         logger.warning("⚠️  No LLM provider detected. Defaulting to Ollama. Install Ollama or set API keys.")
         return "ollama"
     
+    def _probe_ollama(self) -> bool:
+        """Check whether Ollama answers at ollama_host."""
+        parsed = urlparse(self.ollama_host)
+        host = parsed.hostname or "localhost"
+        port = parsed.port or 11434
+        # Fail fast when nothing is listening before paying for an HTTP request
+        try:
+            socket.create_connection((host, port), timeout=OLLAMA_CONNECT_TIMEOUT_SECONDS).close()
+        except OSError as e:
+            logger.debug("Ollama not available: %s", e)
+            return False
+        # A single GET needs nothing beyond the stdlib client
+        connection_class = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        conn = connection_class(host, port, timeout=2)
+        try:
+            conn.request("GET", f"{parsed.path.rstrip('/')}/api/tags")
+            return conn.getresponse().status == 200
+        except (OSError, http.client.HTTPException) as e:
+            logger.debug("Ollama not available: %s", e)
+            return False
+        finally:
+            conn.close()
+
+    def _read_cached_probe(self) -> Optional[bool]:
+        """Return the cached Ollama probe for ollama_host, or None if missing or stale."""
+        try:
+            if time.time() - os.path.getmtime(PROVIDER_CACHE_PATH) > PROVIDER_CACHE_TTL_SECONDS:
+                return None
+            with open(PROVIDER_CACHE_PATH, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get("ollama_host") != self.ollama_host:
+            return None
+        available = cached.get("ollama_available")
+        return available if isinstance(available, bool) else None
+
+    def _write_cached_probe(self, available: bool) -> None:
+        """Cache the Ollama probe result; best effort, e.g. on read-only filesystems."""
+        try:
+            os.makedirs(os.path.dirname(PROVIDER_CACHE_PATH), exist_ok=True)
+            with open(PROVIDER_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump({"ollama_host": self.ollama_host, "ollama_available": available}, f)
+        except OSError as e:
+            logger.debug("Could not cache provider detection: %s", e)
+
+    def clear_cached_configs(self) -> None:
+        """Drop the cached config dicts so they are rebuilt on next access."""
+        for name in ("graphiti_llm_config", "embeddings_config", "provider_info", "provider_info_json"):
+            self.__dict__.pop(name, None)
+
     def get_graphiti_llm_config(self) -> Dict[str, Any]:
         """Get LLM configuration for Graphiti."""
+        return self.graphiti_llm_config
+
+    @cached_property
+    def graphiti_llm_config(self) -> Dict[str, Any]:
+        """LLM configuration for Graphiti, computed once (treat as read-only)."""
         if self.provider == "ollama":
             return {
                 "llm_provider": "ollama",
@@ -86,6 +163,11 @@ class LLMConfig:
     
     def get_embeddings_config(self) -> Dict[str, Any]:
         """Get embeddings configuration."""
+        return self.embeddings_config
+
+    @cached_property
+    def embeddings_config(self) -> Dict[str, Any]:
+        """Embeddings configuration, computed once (treat as read-only)."""
         # For embeddings, prefer order: Ollama > OpenAI > Google
         if self.provider == "ollama":
             return {
@@ -110,6 +192,11 @@ class LLMConfig:
     
     def get_provider_info(self) -> Dict[str, Any]:
         """Get current provider information for logging/debugging."""
+        return self.provider_info
+
+    @cached_property
+    def provider_info(self) -> Dict[str, Any]:
+        """Provider information, computed once (treat as read-only)."""
         return {
             "provider": self.provider,
             "llm_model": self._get_current_model(),
@@ -117,6 +204,13 @@ class LLMConfig:
             "ollama_host": self.ollama_host if self.provider == "ollama" else None
         }
     
+    @cached_property
+    def provider_info_json(self) -> str:
+        """provider_info serialized once, for log lines."""
+        if orjson is not None:
+            return orjson.dumps(self.provider_info, option=orjson.OPT_SORT_KEYS).decode()
+        return json.dumps(self.provider_info, sort_keys=True, separators=(",", ":"))
+    
     def _get_current_model(self) -> str:
         """Get the current LLM model name."""
         if self.provider == "ollama":
@@ -142,5 +236,6 @@ class LLMConfig:
 llm_config = LLMConfig()
 
 # Log the detected provider at startup
-logger.info(f"🤖 LLM Provider: {llm_config.provider}")
-logger.info(f"📊 Config: {llm_config.get_provider_info()}")
+logger.info("🤖 LLM Provider: %s", llm_config.provider)
+if logger.isEnabledFor(logging.INFO):
+    logger.info("📊 Config: %s", llm_config.provider_info_json)
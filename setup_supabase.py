@@ -1,21 +1,19 @@
 #!/usr/bin/env python3
 """Setup Supabase database table for documents"""
 
-import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+
+from supabase_client import get_client
 
 # Load environment variables
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
 print(f"Setting up Supabase database...")
 
 try:
-    # Create Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Get the shared Supabase client
+    supabase: Client = get_client()
     print("✅ Connected to Supabase")
     
     # Read the SQL file
@@ -0,0 +1,206 @@
+-- Enable pgvector extension (0.7+ for halfvec)
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Create documents table with all necessary columns
+CREATE TABLE IF NOT EXISTS documents (
+  id BIGSERIAL PRIMARY KEY,
+  text TEXT NOT NULL,
+  metadata JSONB DEFAULT '{}'::jsonb,
+  -- float16 halves the storage of float32 vector(1536) (3KB vs 6KB a row)
+  embedding halfvec(1536),
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+-- Add embedding column if it doesn't exist
+DO $$ 
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'documents' AND column_name = 'embedding'
+    ) THEN
+        ALTER TABLE documents ADD COLUMN embedding halfvec(1536);
+    ELSIF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'documents' AND column_name = 'embedding'
+            AND udt_name = 'vector'
+    ) THEN
+        DROP INDEX IF EXISTS documents_embedding_idx;
+        ALTER TABLE documents ALTER COLUMN embedding TYPE halfvec(1536)
+            USING embedding::halfvec(1536);
+    END IF;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'Could not add embedding column: %', SQLERRM;
+END $$;
+
+-- Drop existing index if it has wrong type
+DROP INDEX IF EXISTS documents_embedding_idx;
+
+-- Create index for vector similarity search. HNSW needs no training pass
+-- and has better recall and latency than IVFFlat at 1536 dimensions
+CREATE INDEX IF NOT EXISTS documents_embedding_idx ON documents
+USING hnsw (embedding halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Create index for metadata queries. Filters are all containment tests
+-- (metadata @> filter), which jsonb_path_ops serves with a smaller index
+DROP INDEX IF EXISTS documents_metadata_idx;
+CREATE INDEX IF NOT EXISTS documents_metadata_idx ON documents USING gin(metadata jsonb_path_ops);
+
+-- Create index for created_at for sorting
+CREATE INDEX IF NOT EXISTS documents_created_at_idx ON documents(created_at DESC);
+
+-- Create RPC function for vector similarity search. Same signature as the
+-- migrations (halfvec, float, int, jsonb); every older overload is dropped
+-- so RPC calls are not ambiguous, along with any version that still
+-- returned the stored embedding
+DROP FUNCTION IF EXISTS match_documents(vector, float, int);
+DROP FUNCTION IF EXISTS match_documents(vector, float, int, jsonb);
+DROP FUNCTION IF EXISTS match_documents(halfvec, float, int);
+DROP FUNCTION IF EXISTS match_documents(halfvec, float, int, jsonb);
+CREATE FUNCTION match_documents(
+  query_embedding halfvec(1536),
+  match_threshold float DEFAULT 0.0,
+  match_count int DEFAULT 10,
+  filter jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (
+  id bigint,
+  text text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    documents.id,
+    documents.text,
+    documents.metadata,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM public.documents
+  WHERE documents.embedding IS NOT NULL
+    AND documents.metadata @> filter
+    AND 1 - (documents.embedding <=> query_embedding) > match_threshold
+  ORDER BY documents.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+-- Create trigger function for updated_at
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = timezone('utc'::text, now());
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Create trigger on documents
+DROP TRIGGER IF EXISTS update_documents_updated_at ON documents;
+CREATE TRIGGER update_documents_updated_at BEFORE UPDATE ON documents
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Grant permissions
+GRANT ALL ON documents TO service_role;
+GRANT USAGE, SELECT ON SEQUENCE documents_id_seq TO service_role;
+GRANT SELECT, INSERT, UPDATE ON documents TO authenticated;
+GRANT USAGE, SELECT ON SEQUENCE documents_id_seq TO authenticated;
+REVOKE ALL ON FUNCTION match_documents(halfvec, float, int, jsonb) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION match_documents(halfvec, float, int, jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION match_documents(halfvec, float, int, jsonb) TO authenticated;
+
+-- Crawl job states (crawl4ai_source.models.CrawlStatus); a 4-byte enum
+-- rather than TEXT with a CHECK on every write
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'crawl_status') THEN
+        CREATE TYPE crawl_status AS ENUM ('pending', 'running', 'completed', 'failed', 'cancelled');
+    END IF;
+END $$;
+
+-- Create crawl_jobs table
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  url TEXT NOT NULL,
+  status crawl_status NOT NULL DEFAULT 'pending',
+  config JSONB DEFAULT '{}'::jsonb,
+  result JSONB DEFAULT '{}'::jsonb,
+  error_message TEXT,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+  started_at TIMESTAMP WITH TIME ZONE,
+  completed_at TIMESTAMP WITH TIME ZONE
+);
+
+-- crawl_jobs created by an earlier run of this script still has a TEXT
+-- status with a CHECK; convert it as migration 20251101000008 does. The
+-- old default must go first, since a text default can't be cast with it.
+ALTER TABLE crawl_jobs DROP CONSTRAINT IF EXISTS crawl_jobs_status_check;
+ALTER TABLE crawl_jobs ALTER COLUMN status DROP DEFAULT;
+ALTER TABLE crawl_jobs
+  ALTER COLUMN status TYPE crawl_status USING status::crawl_status;
+ALTER TABLE crawl_jobs ALTER COLUMN status SET DEFAULT 'pending';
+
+-- Create indexes for crawl_jobs
+CREATE INDEX IF NOT EXISTS crawl_jobs_status_idx ON crawl_jobs(status);
+CREATE INDEX IF NOT EXISTS crawl_jobs_created_at_idx ON crawl_jobs(created_at DESC);
+
+-- Create trigger on crawl_jobs
+DROP TRIGGER IF EXISTS update_crawl_jobs_updated_at ON crawl_jobs;
+CREATE TRIGGER update_crawl_jobs_updated_at BEFORE UPDATE ON crawl_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Grant permissions on crawl_jobs
+GRANT ALL ON crawl_jobs TO service_role;
+GRANT SELECT, INSERT, UPDATE ON crawl_jobs TO authenticated;
+
+-- End-to-end check in a single RPC: insert two documents, run
+-- match_documents, insert and update a crawl job, then clean up
+CREATE OR REPLACE FUNCTION verify_ragflow_setup()
+RETURNS jsonb
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+DECLARE
+  test_embedding halfvec(1536) := array_fill(0.5::real, ARRAY[1536])::halfvec(1536);
+  doc_id bigint;
+  emb_doc_id bigint;
+  match_count int;
+  job_id uuid;
+  job_status text;
+BEGIN
+  INSERT INTO documents (text, metadata)
+  VALUES ('verify_ragflow_setup', '{"verify": true}'::jsonb)
+  RETURNING id INTO doc_id;
+
+  INSERT INTO documents (text, metadata, embedding)
+  VALUES ('verify_ragflow_setup embedding', '{"verify": true}'::jsonb, test_embedding)
+  RETURNING id INTO emb_doc_id;
+
+  SELECT count(*) INTO match_count FROM match_documents(test_embedding, 0.0, 5);
+
+  INSERT INTO crawl_jobs (url, status)
+  VALUES ('https://example.com/verify_ragflow_setup', 'pending')
+  RETURNING id INTO job_id;
+
+  UPDATE crawl_jobs SET status = 'completed'
+  WHERE id = job_id
+  RETURNING status INTO job_status;
+
+  DELETE FROM documents WHERE id IN (doc_id, emb_doc_id);
+  DELETE FROM crawl_jobs WHERE id = job_id;
+
+  RETURN jsonb_build_object(
+    'documents_ok', doc_id IS NOT NULL AND emb_doc_id IS NOT NULL,
+    'vector_search_count', match_count,
+    'crawl_jobs_ok', job_status = 'completed'
+  );
+END;
+$$;
+
+REVOKE ALL ON FUNCTION verify_ragflow_setup() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION verify_ragflow_setup() TO service_role;
@@ -0,0 +1,41 @@
+-- Add a metadata filter to match_documents
+-- The filter is applied inside the function, before LIMIT, so callers get
+-- exactly match_count rows that satisfy it (metadata @> filter, served by
+-- the documents_metadata_idx GIN index).
+
+DROP FUNCTION IF EXISTS public.match_documents(vector, float, int);
+CREATE OR REPLACE FUNCTION public.match_documents(
+  query_embedding vector(1536),
+  match_threshold float DEFAULT 0.0,
+  match_count int DEFAULT 10,
+  filter jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (
+  id bigint,
+  text text,
+  metadata jsonb,
+  embedding vector,
+  similarity float
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    documents.id,
+    documents.text,
+    documents.metadata,
+    documents.embedding,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM public.documents
+  WHERE documents.embedding IS NOT NULL
+    AND documents.metadata @> filter
+    AND 1 - (documents.embedding <=> query_embedding) > match_threshold
+  ORDER BY documents.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+REVOKE ALL ON FUNCTION public.match_documents(vector, float, int, jsonb) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.match_documents(vector, float, int, jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION public.match_documents(vector, float, int, jsonb) TO authenticated;
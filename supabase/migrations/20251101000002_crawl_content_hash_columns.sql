@@ -0,0 +1,10 @@
+-- Add the URL and title hash columns used by ContentDeduplicator
+-- Duplicate checks look up content_hash, url_hash and title_hash in one
+-- OR query; one index per column lets Postgres answer it with a bitmap OR
+-- (a composite index cannot serve an OR across columns).
+
+ALTER TABLE public.crawl_content ADD COLUMN IF NOT EXISTS url_hash VARCHAR(64);
+ALTER TABLE public.crawl_content ADD COLUMN IF NOT EXISTS title_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_content_url_hash ON public.crawl_content(url_hash);
+CREATE INDEX IF NOT EXISTS idx_crawl_content_title_hash ON public.crawl_content(title_hash);
@@ -0,0 +1,25 @@
+-- Aggregate duplicate statistics for crawl_content in the database
+-- ContentDeduplicator.get_duplicate_stats calls this instead of downloading
+-- every content_hash and url_hash to count distinct values client-side.
+
+CREATE OR REPLACE FUNCTION public.crawl_content_stats()
+RETURNS TABLE (
+  total bigint,
+  unique_content bigint,
+  unique_urls bigint
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    count(*),
+    count(DISTINCT crawl_content.content_hash),
+    count(DISTINCT crawl_content.url_hash)
+  FROM public.crawl_content;
+$$;
+
+REVOKE ALL ON FUNCTION public.crawl_content_stats() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.crawl_content_stats() TO service_role;
+GRANT EXECUTE ON FUNCTION public.crawl_content_stats() TO authenticated;
@@ -0,0 +1,5 @@
+-- Store each row's MinHash signature next to its hashes
+-- ContentDeduplicator.hydrate() rebuilds its similarity index from this
+-- column (64 uint64 values, 512 bytes) instead of fetching page content.
+
+ALTER TABLE public.crawl_content ADD COLUMN IF NOT EXISTS content_signature BYTEA;
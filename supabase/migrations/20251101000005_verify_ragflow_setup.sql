@@ -0,0 +1,52 @@
+-- End-to-end check of the RAGFlow schema in a single RPC
+-- verify_supabase.py calls this instead of one REST round trip per step:
+-- it inserts two documents (one with an embedding), runs match_documents,
+-- inserts and updates a crawl job, then deletes every row it created.
+
+CREATE OR REPLACE FUNCTION public.verify_ragflow_setup()
+RETURNS jsonb
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+DECLARE
+  test_embedding vector(1536) := array_fill(0.5::real, ARRAY[1536])::vector(1536);
+  doc_id bigint;
+  emb_doc_id bigint;
+  match_count int;
+  job_id text;
+  job_status text;
+BEGIN
+  INSERT INTO public.documents (text, metadata)
+  VALUES ('verify_ragflow_setup', '{"verify": true}'::jsonb)
+  RETURNING id INTO doc_id;
+
+  INSERT INTO public.documents (text, metadata, embedding)
+  VALUES ('verify_ragflow_setup embedding', '{"verify": true}'::jsonb, test_embedding)
+  RETURNING id INTO emb_doc_id;
+
+  SELECT count(*) INTO match_count FROM public.match_documents(test_embedding, 0.0, 5);
+
+  -- crawl_jobs.id is UUID or VARCHAR(36) depending on which setup ran
+  INSERT INTO public.crawl_jobs (id, url, status, config)
+  VALUES (gen_random_uuid(), 'https://example.com/verify_ragflow_setup', 'pending', '{}'::jsonb)
+  RETURNING id INTO job_id;
+
+  UPDATE public.crawl_jobs SET status = 'completed'
+  WHERE id::text = job_id
+  RETURNING status INTO job_status;
+
+  DELETE FROM public.documents WHERE id IN (doc_id, emb_doc_id);
+  DELETE FROM public.crawl_jobs WHERE id::text = job_id;
+
+  RETURN jsonb_build_object(
+    'documents_ok', doc_id IS NOT NULL AND emb_doc_id IS NOT NULL,
+    'vector_search_count', match_count,
+    'crawl_jobs_ok', job_status = 'completed'
+  );
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.verify_ragflow_setup() FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.verify_ragflow_setup() TO service_role;
@@ -0,0 +1,53 @@
+-- Store document embeddings as halfvec(1536) behind an HNSW index
+-- float16 halves the storage of vector(1536) (3KB vs 6KB a row), so twice
+-- as many embeddings fit in shared_buffers. HNSW needs no training pass and
+-- has better recall and latency than IVFFlat at this dimension. Requires
+-- pgvector 0.7+.
+
+DROP INDEX IF EXISTS public.documents_embedding_idx;
+
+ALTER TABLE public.documents
+  ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
+
+CREATE INDEX IF NOT EXISTS documents_embedding_idx ON public.documents
+USING hnsw (embedding halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Replace the vector(1536) signature rather than overloading it, so RPC
+-- calls passing a text literal stay unambiguous
+DROP FUNCTION IF EXISTS public.match_documents(vector, float, int, jsonb);
+CREATE OR REPLACE FUNCTION public.match_documents(
+  query_embedding halfvec(1536),
+  match_threshold float DEFAULT 0.0,
+  match_count int DEFAULT 10,
+  filter jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (
+  id bigint,
+  text text,
+  metadata jsonb,
+  embedding halfvec,
+  similarity float
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    documents.id,
+    documents.text,
+    documents.metadata,
+    documents.embedding,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM public.documents
+  WHERE documents.embedding IS NOT NULL
+    AND documents.metadata @> filter
+    AND 1 - (documents.embedding <=> query_embedding) > match_threshold
+  ORDER BY documents.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+REVOKE ALL ON FUNCTION public.match_documents(halfvec, float, int, jsonb) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.match_documents(halfvec, float, int, jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION public.match_documents(halfvec, float, int, jsonb) TO authenticated;
@@ -0,0 +1,11 @@
+-- Rebuild documents_metadata_idx with jsonb_path_ops
+-- Every metadata filter (match_documents' filter, the latest-documents
+-- fallback) is a containment test, metadata @> filter. jsonb_path_ops
+-- indexes only that operator, with one hashed entry per path instead of
+-- one per key and value, so the index is smaller and faster to probe. A
+-- selective filter can then be answered by a bitmap scan of this index
+-- plus an exact distance sort of the matching rows, instead of
+-- post-filtering an approximate HNSW scan that can come back short.
+
+DROP INDEX IF EXISTS public.documents_metadata_idx;
+CREATE INDEX documents_metadata_idx ON public.documents USING gin (metadata jsonb_path_ops);
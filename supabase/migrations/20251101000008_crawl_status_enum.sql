@@ -0,0 +1,18 @@
+-- Store crawl_jobs.status as an enum instead of TEXT/VARCHAR plus CHECK
+-- An enum value is a 4-byte identifier, so rows and crawl_jobs' status
+-- index shrink, comparisons are integer compares, and the per-row CHECK
+-- goes away. PostgREST clients keep sending the strings; Postgres coerces
+-- them. The labels match crawl4ai_source.models.CrawlStatus.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'crawl_status') THEN
+    CREATE TYPE public.crawl_status AS ENUM ('pending', 'running', 'completed', 'failed', 'cancelled');
+  END IF;
+END$$;
+
+ALTER TABLE public.crawl_jobs DROP CONSTRAINT IF EXISTS crawl_jobs_status_check;
+ALTER TABLE public.crawl_jobs ALTER COLUMN status DROP DEFAULT;
+ALTER TABLE public.crawl_jobs
+  ALTER COLUMN status TYPE public.crawl_status USING status::public.crawl_status;
+ALTER TABLE public.crawl_jobs ALTER COLUMN status SET DEFAULT 'pending';
@@ -0,0 +1,39 @@
+-- Stop echoing stored embeddings back from match_documents
+-- Callers already hold the query embedding and never read the stored one,
+-- which added ~1536 values of text (and a halfvec_out call) per result row.
+-- The return type changes, so the function is dropped and recreated.
+
+DROP FUNCTION IF EXISTS public.match_documents(halfvec, float, int, jsonb);
+CREATE FUNCTION public.match_documents(
+  query_embedding halfvec(1536),
+  match_threshold float DEFAULT 0.0,
+  match_count int DEFAULT 10,
+  filter jsonb DEFAULT '{}'::jsonb
+)
+RETURNS TABLE (
+  id bigint,
+  text text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE SQL
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+  SELECT
+    documents.id,
+    documents.text,
+    documents.metadata,
+    1 - (documents.embedding <=> query_embedding) AS similarity
+  FROM public.documents
+  WHERE documents.embedding IS NOT NULL
+    AND documents.metadata @> filter
+    AND 1 - (documents.embedding <=> query_embedding) > match_threshold
+  ORDER BY documents.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+REVOKE ALL ON FUNCTION public.match_documents(halfvec, float, int, jsonb) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.match_documents(halfvec, float, int, jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION public.match_documents(halfvec, float, int, jsonb) TO authenticated;
@@ -1,6 +1,7 @@
 # Supabase integration for Ragflow Slim
 # Contributor-safe, modular connection and document storage
 import os
+import threading
 from typing import Optional
 from supabase import create_client, Client
 
@@ -14,19 +15,67 @@ if SUPABASE_URL != "<your-supabase-url>" and SUPABASE_KEY != "<your-supabase-key
         supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     except Exception:
         supabase = None
+_client_lock = threading.Lock()
 
-def add_document_to_supabase(text, metadata=None, embedding=None):
+def get_client() -> Client:
+    """
+    Return the process-wide Supabase client, creating it on first use.
+
+    Callers share one client and with it one pooled HTTP session, so only the
+    first request pays for DNS and the TLS handshake. Credentials are read
+    when the client is first built, so scripts can load a .env file first.
+    """
+    global supabase
     if supabase is None:
-        raise RuntimeError("Supabase client not initialized. Check SUPABASE_URL and SUPABASE_KEY environment variables.")
-    data = {
+        with _client_lock:
+            if supabase is None:
+                supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    return supabase
+
+def _vector_literal(embedding):
+    """
+    Format an embedding as a pgvector text literal, e.g. '[0.1,0.2]'.
+
+    The halfvec column parses this directly instead of casting a JSON array
+    of floats. Nine significant digits round-trip a float4 exactly, more
+    than pgvector's float4/float16 types keep, so the payload is shorter too.
+    """
+    return "[" + ",".join([format(x, ".9g") for x in embedding]) + "]"
+
+def _document_row(text, metadata=None, embedding=None):
+    return {
         "text": text,
         "metadata": metadata or {},
-        "embedding": embedding or {},
+        "embedding": _vector_literal(embedding) if embedding else {},
     }
-    response = supabase.table("documents").insert(data).execute()
+
+def add_document_to_supabase(text, metadata=None, embedding=None):
+    if supabase is None:
+        raise RuntimeError("Supabase client not initialized. Check SUPABASE_URL and SUPABASE_KEY environment variables.")
+    # postgrest 1.x (pinned) cannot chain select() after insert(); the default
+    # returning=representation already hands back the new row with its id
+    response = supabase.table("documents").insert(_document_row(text, metadata, embedding)).execute()
+    return response
+
+def add_documents_to_supabase(documents):
+    """
+    Insert several documents in one request.
+
+    PostgREST inserts a JSON array in a single transaction and returns the
+    new ids in input order, so a batch costs one round trip instead of one
+    per document.
+
+    Args:
+        documents: Dicts with a "text" key and optional "metadata" and
+            "embedding" keys, as taken by add_document_to_supabase
+    """
+    if supabase is None:
+        raise RuntimeError("Supabase client not initialized. Check SUPABASE_URL and SUPABASE_KEY environment variables.")
+    rows = [_document_row(**document) for document in documents]
+    response = supabase.table("documents").insert(rows).execute()
     return response
 
-def search_documents_supabase(query_embedding, top_k=3):
+def search_documents_supabase(query_embedding, top_k=3, metadata_filter=None):
     """
     Search documents using vector similarity with Supabase pgvector.
 
@@ -36,6 +85,8 @@ def search_documents_supabase(query_embedding, top_k=3):
     Args:
         query_embedding: The query embedding vector (list of floats)
         top_k: Number of results to return
+        metadata_filter: Optional dict; only documents whose metadata contains
+            every key/value pair (jsonb @>) are returned
 
     Returns:
         List of matching documents with similarity scores
@@ -47,39 +98,49 @@ def search_documents_supabase(query_embedding, top_k=3):
         # Try vector similarity search using pgvector RPC function
         # This requires a match_documents function in Supabase:
         # CREATE OR REPLACE FUNCTION match_documents(
-        #   query_embedding vector(1536),
+        #   query_embedding halfvec(1536),
         #   match_threshold float,
-        #   match_count int
+        #   match_count int,
+        #   filter jsonb DEFAULT '{}'
         # )
-        # RETURNS TABLE (id bigint, text text, metadata jsonb, embedding vector, similarity float)
+        # RETURNS TABLE (id bigint, text text, metadata jsonb, similarity float)
         # AS $$
-        #   SELECT id, text, metadata, embedding,
+        #   SELECT id, text, metadata,
         #   1 - (embedding <=> query_embedding) AS similarity
         #   FROM documents
-        #   WHERE 1 - (embedding <=> query_embedding) > match_threshold
+        #   WHERE metadata @> filter
+        #     AND 1 - (embedding <=> query_embedding) > match_threshold
         #   ORDER BY embedding <=> query_embedding
         #   LIMIT match_count;
         # $$ LANGUAGE SQL STABLE;
 
-        response = supabase.rpc(
-            'match_documents',
-            {
-                'query_embedding': query_embedding,
-                'match_threshold': 0.0,  # Include all results
-                'match_count': top_k
-            }
-        ).execute()
+        params = {
+            'query_embedding': _vector_literal(query_embedding),
+            'match_threshold': 0.0,  # Include all results
+            'match_count': top_k
+        }
+        if metadata_filter:
+            # Filter before LIMIT inside the RPC so top_k matching rows come back
+            params['filter'] = metadata_filter
+        response = supabase.rpc('match_documents', params).execute()
 
         if response.data:
             return response.data
         else:
             # Fallback if no results
-            response = supabase.table("documents").select("*").order("created_at", desc=True).limit(top_k).execute()
-            return response.data
+            return _latest_documents(top_k, metadata_filter)
 
     except Exception as e:
         # Fallback to latest documents if vector search not available
         import logging
         logging.warning(f"Vector search failed, falling back to latest documents: {e}")
-        response = supabase.table("documents").select("*").order("created_at", desc=True).limit(top_k).execute()
-        return response.data
+        return _latest_documents(top_k, metadata_filter)
+
+def _latest_documents(top_k, metadata_filter=None):
+    """Most recent documents, optionally restricted to a metadata filter."""
+    # Same columns as match_documents; the stored embedding is never needed
+    query = supabase.table("documents").select("id, text, metadata, created_at, updated_at")
+    if metadata_filter:
+        query = query.contains("metadata", metadata_filter)
+    response = query.order("created_at", desc=True).limit(top_k).execute()
+    return response.data
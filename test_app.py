@@ -1,10 +1,27 @@
+import asyncio
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import MagicMock, patch
+
+import app as app_module
 from app import app
 
 class RagflowSlimTestCase(unittest.TestCase):
     def setUp(self):
         self.client = app.test_client()
         self.api_key = "changeme"  # Set to match RAGFLOW_API_KEY
+        self._next_id = 0
+
+    def _insert(self, documents):
+        """Stand-in for add_documents_to_supabase returning sequential ids."""
+        ids = range(self._next_id + 1, self._next_id + len(documents) + 1)
+        self._next_id += len(documents)
+        return MagicMock(data=[{"id": i} for i in ids])
 
     def test_completion_unauthorized(self):
         resp = self.client.post("/completion", json={"prompt": "test"})
@@ -19,9 +36,421 @@ class RagflowSlimTestCase(unittest.TestCase):
         resp = self.client.post("/ingest", headers={"X-API-KEY": self.api_key})
         self.assertEqual(resp.status_code, 400)
 
+    @unittest.skipIf(app_module.fitz is None, "PyMuPDF not installed")
+    def test_ingest_pdf_extracts_text(self):
+        doc = app_module.fitz.open()
+        doc.new_page().insert_text((72, 72), "hello from page one")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        with patch.object(app_module, "GRAPHITI_AVAILABLE", False), \
+             patch.object(app_module, "get_embeddings_ollama_batch", side_effect=lambda texts: [[0.1]] * len(texts)), \
+             patch.object(app_module, "add_documents_to_supabase", side_effect=self._insert) as mock_add:
+            resp = self.client.post(
+                "/ingest",
+                data={"file": (io.BytesIO(pdf_bytes), "doc.pdf")},
+                headers={"X-API-KEY": self.api_key},
+                content_type="multipart/form-data",
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("hello from page one", mock_add.call_args[0][0][0]["text"])
+
+    @unittest.skipIf(app_module.fitz is None, "PyMuPDF not installed")
+    def test_ingest_collects_garbage_only_after_large_pdfs(self):
+        doc = app_module.fitz.open()
+        doc.new_page().insert_text((72, 72), "hello from page one")
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        uploads = [
+            ("doc.txt", b"x" * 100, 0, False),
+            ("doc.pdf", pdf_bytes, len(pdf_bytes) + 1, False),
+            ("doc.pdf", pdf_bytes, len(pdf_bytes), True),
+        ]
+        for name, data, threshold, collected in uploads:
+            with patch.object(app_module, "GRAPHITI_AVAILABLE", False), \
+                 patch.object(app_module, "get_embeddings_ollama_batch", side_effect=lambda texts: [[0.1]] * len(texts)), \
+                 patch.object(app_module, "add_documents_to_supabase", side_effect=self._insert), \
+                 patch.object(app_module, "INGEST_GC_MIN_BYTES", threshold), \
+                 patch.object(app_module.gc, "collect") as mock_collect:
+                resp = self.client.post(
+                    "/ingest",
+                    data={"file": (io.BytesIO(data), name)},
+                    headers={"X-API-KEY": self.api_key},
+                    content_type="multipart/form-data",
+                )
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(mock_collect.called, collected, (name, threshold))
+
+    def test_ingest_txt_stores_one_document_per_chunk(self):
+        body = "x" * (app_module.INGEST_CHUNK_CHARS * 2 + 10)
+        with patch.object(app_module, "GRAPHITI_AVAILABLE", False), \
+             patch.object(app_module, "get_embeddings_ollama_batch", side_effect=lambda texts: [[0.1]] * len(texts)), \
+             patch.object(app_module, "INGEST_EMBED_BATCH", 2), \
+             patch.object(app_module, "add_documents_to_supabase", side_effect=self._insert) as mock_add:
+            resp = self.client.post(
+                "/ingest",
+                data={"file": (io.BytesIO(body.encode()), "doc.txt")},
+                headers={"X-API-KEY": self.api_key},
+                content_type="multipart/form-data",
+            )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["chunks"], 3)
+        # supabase_response holds the inserted ids, one list per insert batch
+        self.assertEqual(resp.get_json()["supabase_response"], [[1, 2], [3]])
+        # One insert per embedding batch
+        self.assertEqual([len(c[0][0]) for c in mock_add.call_args_list], [2, 1])
+        documents = [d for c in mock_add.call_args_list for d in c[0][0]]
+        self.assertEqual("".join(d["text"] for d in documents), body)
+        self.assertEqual([d["metadata"]["chunk_index"] for d in documents], [0, 1, 2])
+
+    def test_iter_text_upload_decodes_across_blocks(self):
+        text = "héllo wörld " * 50
+        file = MagicMock(stream=io.BytesIO(text.encode("utf-8")))
+        self.assertEqual("".join(app_module.iter_text_upload(file, read_size=7)), text)
+
+    def test_iter_text_upload_falls_back_to_latin1(self):
+        data = "ok é ".encode("utf-8") + b"caf\xe9"
+        file = MagicMock(stream=io.BytesIO(data))
+        self.assertEqual("".join(app_module.iter_text_upload(file, read_size=4)), "ok é café")
+
+    def test_iter_text_chunks_joins_segments(self):
+        chunks = list(app_module.iter_text_chunks(["abc", "defgh", "ij"], chunk_chars=4))
+        self.assertEqual(chunks, ["abc\n", "defg", "h\nij"])
+
     def test_retrieval_missing_query(self):
         resp = self.client.post("/retrieval", json={}, headers={"X-API-KEY": self.api_key})
         self.assertEqual(resp.status_code, 400)
 
+class OutputTimestampTestCase(unittest.TestCase):
+    def test_output_timestamp_matches_strftime_format(self):
+        with patch.object(app_module.time, "time", return_value=1700000000.5):
+            expected = time.strftime("%Y%m%d_%H%M%S", time.localtime(1700000000))
+            self.assertEqual(app_module.output_timestamp(), expected)
+            with patch.object(app_module.time, "strftime", side_effect=AssertionError("reformatted")):
+                self.assertEqual(app_module.output_timestamp(), expected)
+
+class LogOutputTestCase(unittest.TestCase):
+    def test_log_output_is_written_by_background_writer(self):
+        with tempfile.TemporaryDirectory() as tmp, patch.object(app_module, "OUTPUT_DIR", tmp):
+            app_module.log_output("../escape.txt", "payload")
+            app_module._output_queue.join()
+            with open(os.path.join(tmp, "escape.txt"), encoding="utf-8") as fh:
+                self.assertEqual(fh.read(), "payload")
+
+    def test_log_output_drops_when_queue_full(self):
+        with patch.object(app_module._output_queue, "put_nowait", side_effect=app_module.queue.Full):
+            before = app_module._dropped_outputs
+            app_module.log_output("x.txt", "payload")
+        self.assertEqual(app_module._dropped_outputs, before + 1)
+
+class RateLimitTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self._reset()
+        self.addCleanup(self._reset)
+
+    def _reset(self):
+        for i in range(len(app_module._rate_limit_table)):
+            app_module._rate_limit_table[i] = 0
+
+    def test_rate_limit_exceeded(self):
+        with patch.object(app_module, "RATE_LIMIT", 2):
+            codes = [
+                self.client.post("/completion", json={"prompt": "t"}, headers={"X-API-KEY": "changeme"}).status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(codes, [200, 200, 429])
+
+    def test_rate_limit_resets_next_hour(self):
+        with patch.object(app_module, "RATE_LIMIT", 1), patch.object(app_module.time, "time", return_value=3600 * 10):
+            with app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+                self.assertTrue(app_module.rate_limit())
+                self.assertFalse(app_module.rate_limit())
+        with patch.object(app_module, "RATE_LIMIT", 1), patch.object(app_module.time, "time", return_value=3600 * 11):
+            with app.test_request_context(environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+                self.assertTrue(app_module.rate_limit())
+
+class FallbackEmbeddingTestCase(unittest.TestCase):
+    def test_fallback_is_deterministic_unit_vector(self):
+        with patch.object(app_module._ollama_session, "post", side_effect=ConnectionError("down")):
+            first = app_module.get_embedding_ollama("some text")
+            second = app_module.get_embedding_ollama("some text")
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), app_module.FALLBACK_EMBED_DIM)
+        self.assertAlmostEqual(sum(x * x for x in first), 1.0, places=5)
+        self.assertNotEqual(first, app_module.fallback_embedding("other text"))
+
+class EmbeddingCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        app_module._embed_cache.clear()
+        self.addCleanup(app_module._embed_cache.clear)
+
+    def _response(self, payload):
+        resp = MagicMock()
+        resp.json.return_value = payload
+        return resp
+
+    def test_repeated_text_hits_cache(self):
+        with patch.object(app_module._ollama_session, "post",
+                          return_value=self._response({"embedding": [0.5]})) as mock_post:
+            self.assertEqual(app_module.get_embedding_ollama("abc"), [0.5])
+            self.assertEqual(app_module.get_embedding_ollama("abc"), [0.5])
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_fallback_is_not_cached(self):
+        with patch.object(app_module._ollama_session, "post", side_effect=OSError("down")) as mock_post:
+            app_module.get_embedding_ollama("abc")
+            app_module.get_embedding_ollama("abc")
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_batch_sends_only_misses_in_one_call(self):
+        app_module._embed_cache_put(app_module._embed_cache_key("a", "nomic-embed-text"), [1.0])
+        with patch.object(app_module._ollama_session, "post",
+                          return_value=self._response({"embeddings": [[2.0], [3.0]]})) as mock_post:
+            result = app_module.get_embeddings_ollama_batch(["a", "b", "c"])
+        self.assertEqual(result, [[1.0], [2.0], [3.0]])
+        mock_post.assert_called_once()
+        self.assertEqual(mock_post.call_args.kwargs["json"]["input"], ["b", "c"])
+
+class ConfigCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = os.path.realpath(self.tmp.name)
+        patcher = patch.object(app_module, "CONFIG_DIR", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = os.path.join(self.dir, "settings.yaml")
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write("a: 1")
+
+    def test_load_config_file_served_from_cache(self):
+        self.assertEqual(app_module.load_config_file(), {"settings.yaml": "a: 1"})
+        with patch("builtins.open", side_effect=AssertionError("cache miss")):
+            self.assertEqual(app_module.load_config_file(), {"settings.yaml": "a: 1"})
+
+    def test_load_config_file_sees_file_changes(self):
+        app_module.load_config_file()
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write("a: 2")
+        future = time.time_ns() + 1_000_000_000
+        os.utime(self.path, ns=(future, future))
+        self.assertEqual(app_module.load_config_file(), {"settings.yaml": "a: 2"})
+
+    def test_list_config_files_sees_new_files(self):
+        self.assertEqual(app_module.list_config_files(), [self.path])
+        other = os.path.join(self.dir, "other.yaml")
+        with open(other, "w", encoding="utf-8") as fh:
+            fh.write("b: 1")
+        future = time.time_ns() + 1_000_000_000
+        os.utime(self.dir, ns=(future, future))
+        self.assertEqual(app_module.list_config_files(), sorted([self.path, other]))
+
+    def test_cache_is_bounded_and_skips_empty_results(self):
+        app_module._CFG_CACHE.clear()
+        with patch.object(app_module, "CFG_CACHE_SIZE", 4):
+            for i in range(10):
+                app_module.load_config_file(filename=f"missing-{i}.yaml", app_name=f"../app-{i}")
+            self.assertEqual(len(app_module._CFG_CACHE), 0)
+            for i in range(10):
+                app_module.load_config_file(app_name=f"app-{i}")
+            self.assertEqual(len(app_module._CFG_CACHE), 4)
+        # App names are keyed by their basename, as used for the lookup
+        self.assertNotIn(("load", self.dir, "app-0", None), app_module._CFG_CACHE)
+        app_module.load_config_file(app_name="nested/app-0")
+        self.assertIn(("load", self.dir, "app-0", None), app_module._CFG_CACHE)
+
+    def test_symlink_escaping_config_dir_is_skipped(self):
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        secret = os.path.join(outside.name, "secret.txt")
+        with open(secret, "w", encoding="utf-8") as fh:
+            fh.write("nope")
+        os.symlink(secret, os.path.join(self.dir, "link.txt"))
+        self.assertEqual(app_module.load_config_file(), {"settings.yaml": "a: 1"})
+
+    def test_is_safe_path(self):
+        base = self.dir
+        self.assertTrue(app_module._is_safe_path(base, self.path))
+        self.assertTrue(app_module._is_safe_path(base, base))
+        self.assertFalse(app_module._is_safe_path(base, os.path.join(base, "..", "x")))
+        self.assertFalse(app_module._is_safe_path(base, base + "-sibling/file"))
+
+class RetrievalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_vector_and_graph_search_run_concurrently(self):
+        graph_started = threading.Event()
+
+        def vector_search(query_embedding, top_k=3, metadata_filter=None):
+            # Only completes promptly if the graph search is already running
+            self.assertTrue(graph_started.wait(timeout=5))
+            return [{"id": 1, "text": "doc", "metadata": {"filename": "a.txt"}}]
+
+        async def graph_search(query, num_results=10, center_node_uuid=None):
+            graph_started.set()
+            return [{"fact": "x"}]
+
+        with patch.object(app_module, "GRAPHITI_AVAILABLE", True), \
+             patch.object(app_module, "get_embedding_ollama", return_value=[0.1]), \
+             patch.object(app_module, "search_documents_supabase", side_effect=vector_search), \
+             patch.object(app_module, "search_graph_async", side_effect=graph_search):
+            resp = self.client.post("/retrieval", json={"query": "q"}, headers={"X-API-KEY": "changeme"})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual(data["vector_results"][0]["filename"], "a.txt")
+        self.assertEqual(data["graph_results"], [{"fact": "x"}])
+
+    def test_hung_view_is_cancelled_with_504(self):
+        cancelled = threading.Event()
+
+        async def graph_search(query, num_results=10, center_node_uuid=None):
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with patch.object(app_module, "VIEW_TIMEOUT", 0.2), \
+             patch.object(app_module, "GRAPHITI_AVAILABLE", True), \
+             patch.object(app_module, "get_embedding_ollama", return_value=[0.1]), \
+             patch.object(app_module, "search_documents_supabase", return_value=[]), \
+             patch.object(app_module, "search_graph_async", side_effect=graph_search):
+            resp = self.client.post("/retrieval", json={"query": "q"}, headers={"X-API-KEY": "changeme"})
+        self.assertEqual(resp.status_code, 504)
+        self.assertTrue(cancelled.wait(timeout=5))
+
+    def test_metadata_filter_is_passed_to_supabase(self):
+        docs = [{"id": 1, "text": "doc", "metadata": {"filename": "a.txt"}}]
+        with patch.object(app_module, "GRAPHITI_AVAILABLE", False), \
+             patch.object(app_module, "get_embedding_ollama", return_value=[0.1]), \
+             patch.object(app_module, "search_documents_supabase", return_value=docs) as search:
+            resp = self.client.post(
+                "/retrieval",
+                json={"query": "q", "top_k": 5, "metadata": {"filename": "a.txt"}},
+                headers={"X-API-KEY": "changeme"},
+            )
+        self.assertEqual(resp.status_code, 200)
+        search.assert_called_once_with([0.1], top_k=5, metadata_filter={"filename": "a.txt"})
+        self.assertEqual(len(resp.get_json()["vector_results"]), 1)
+
+    def test_metadata_filter_must_be_object(self):
+        resp = self.client.post(
+            "/retrieval", json={"query": "q", "metadata": ["a"]}, headers={"X-API-KEY": "changeme"}
+        )
+        self.assertEqual(resp.status_code, 400)
+
+class SafeUrlTestCase(unittest.TestCase):
+    def setUp(self):
+        app_module._dns_cache.clear()
+
+    @staticmethod
+    def _addrinfo(*addresses):
+        return [(None, None, None, "", (a, 0)) for a in addresses]
+
+    def test_resolution_is_cached(self):
+        with patch.object(app_module.socket, "getaddrinfo", return_value=self._addrinfo("93.184.216.34")) as lookup:
+            self.assertTrue(app_module.is_safe_url("https://public.test/a"))
+            self.assertTrue(app_module.is_safe_url("https://public.test/b"))
+        lookup.assert_called_once()
+
+    def test_expired_entry_is_resolved_again(self):
+        with patch.object(app_module.socket, "getaddrinfo", return_value=self._addrinfo("93.184.216.34")) as lookup:
+            app_module.is_safe_url("https://public.test/")
+            expires, addresses = app_module._dns_cache["public.test"]
+            app_module._dns_cache["public.test"] = (time.monotonic() - 1, addresses)
+            app_module.is_safe_url("https://public.test/")
+        self.assertEqual(lookup.call_count, 2)
+
+    def test_any_private_address_blocks(self):
+        with patch.object(app_module.socket, "getaddrinfo", return_value=self._addrinfo("93.184.216.34", "fd00::1")):
+            self.assertFalse(app_module.is_safe_url("https://rebind.test/"))
+
+    def test_failed_lookup_is_not_cached(self):
+        with patch.object(app_module.socket, "getaddrinfo", side_effect=socket.gaierror):
+            self.assertFalse(app_module.is_safe_url("https://missing.test/"))
+        self.assertNotIn("missing.test", app_module._dns_cache)
+
+class HealthTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        app_module._provider_info.cache_clear()
+
+    def tearDown(self):
+        app_module._provider_info.cache_clear()
+
+    def test_provider_info_is_computed_once_until_refresh(self):
+        info = {"provider": "ollama", "llm_model": "m", "embeddings_model": "e"}
+        with patch.object(app_module.llm_config, "get_provider_info", return_value=info) as get_info:
+            self.client.get("/health")
+            resp = self.client.get("/health")
+            self.assertEqual(resp.get_json()["llm_provider"], "ollama")
+            get_info.assert_called_once()
+            self.assertEqual(self.client.post("/health/refresh").status_code, 401)
+            resp = self.client.post("/health/refresh", headers={"X-API-KEY": "changeme"})
+            self.assertEqual(resp.status_code, 200)
+            self.client.get("/health")
+        self.assertEqual(get_info.call_count, 2)
+
+class JsonProviderTestCase(unittest.TestCase):
+    def test_orjson_output_matches_stdlib_semantics(self):
+        import datetime
+        import decimal
+        obj = {"b": 1, "a": [None, "é"], 3: datetime.datetime(2025, 1, 2, 3, 4, 5), "d": decimal.Decimal("1.5")}
+        with app.app_context():
+            data = app.json.loads(app.json.dumps(obj))
+        self.assertEqual(list(data), ["3", "a", "b", "d"])
+        self.assertEqual(data["a"], [None, "é"])
+        self.assertEqual(data["3"], "Thu, 02 Jan 2025 03:04:05 GMT")
+        self.assertEqual(data["d"], "1.5")
+
+    def test_dataclasses_serialize_like_asdict(self):
+        import dataclasses
+        from crawl4ai_source import CrawlJobResponse
+        response = CrawlJobResponse(id="j", url="u", status="pending", created_at="c", updated_at="c",
+                                    completed_at=None, result={"k": [1]}, error_message=None)
+        with app.app_context():
+            data = app.json.loads(app.json.dumps({"jobs": [response]}))
+        self.assertEqual(data["jobs"][0], dataclasses.asdict(response))
+
+    def test_output_json_is_indented(self):
+        self.assertEqual(app_module.to_output_json({"a": 1}), '{\n  "a": 1\n}')
+
+class AppContextTestCase(unittest.TestCase):
+    def test_header_and_query_skip_body_parsing(self):
+        for kwargs in ({"headers": {"X-APP": "h"}}, {"query_string": {"app": "q"}}):
+            with app.test_request_context("/config", method="POST", json={"app": "body"}, **kwargs):
+                with patch.object(app_module.request, "get_json") as get_json:
+                    ctx = app_module.get_app_context_from_request(app_module.request)
+                get_json.assert_not_called()
+                self.assertIn(ctx, ("h", "q"))
+
+    def test_body_is_used_as_last_resort(self):
+        with app.test_request_context("/config", method="POST", json={"app": "body"}):
+            self.assertEqual(app_module.get_app_context_from_request(app_module.request), "body")
+        with app.test_request_context("/config"):
+            self.assertIsNone(app_module.get_app_context_from_request(app_module.request))
+
+class GuardTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        for i in range(len(app_module._rate_limit_table)):
+            app_module._rate_limit_table[i] = 0
+
+    def test_guarded_keeps_views_async(self):
+        self.assertTrue(app_module.inspect.iscoroutinefunction(app.view_functions["retrieval"]))
+
+    def test_non_ascii_api_key_is_rejected(self):
+        resp = self.client.post("/completion", json={"prompt": "hi"}, headers={"X-API-KEY": "clé"})
+        self.assertEqual(resp.status_code, 401)
+
+    def test_unauthorized_requests_do_not_count_against_rate_limit(self):
+        with patch.object(app_module, "RATE_LIMIT", 1):
+            self.client.post("/completion", json={"prompt": "hi"}, headers={"X-API-KEY": "wrong"})
+            ok = self.client.post("/completion", json={"prompt": "hi"}, headers={"X-API-KEY": "changeme"})
+            limited = self.client.post("/completion", json={"prompt": "hi"}, headers={"X-API-KEY": "changeme"})
+        self.assertEqual(ok.status_code, 200)
+        self.assertEqual(limited.status_code, 429)
+
 if __name__ == "__main__":
     unittest.main()
@@ -11,6 +11,7 @@ Tests the Flask API endpoints for crawl job management, including:
 
 import pytest
 import json
+import asyncio
 import datetime
 from unittest.mock import patch, AsyncMock, MagicMock
 from flask import Flask
@@ -346,6 +347,26 @@ class TestCrawlJobActions:
         assert 'error' in data
 
 
+class TestEventLoop:
+    """Test that async views share one long-lived event loop."""
+
+    def test_views_reuse_shared_loop(self, client, valid_headers):
+        """Consecutive requests run on the same loop instead of a fresh one each."""
+        loops = []
+
+        async def record_loop(job_id):
+            loops.append(asyncio.get_running_loop())
+            return True
+
+        with patch.object(crawl_manager, 'start_job', side_effect=record_loop):
+            client.post('/crawl/job-a/start', headers=valid_headers)
+            client.post('/crawl/job-b/start', headers=valid_headers)
+
+        assert len(loops) == 2
+        assert loops[0] is loops[1]
+        assert not loops[0].is_closed()
+
+
 class TestRateLimiting:
     """Test rate limiting functionality."""
 
@@ -0,0 +1,326 @@
+"""
+Tests for Crawl4AI content deduplication.
+
+This module contains unit tests for crawl4ai_source/deduplicator.py,
+covering fingerprinting and MinHash-LSH near-duplicate detection.
+"""
+
+import hashlib
+import zlib
+
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from crawl4ai_source import deduplicator as deduplicator_module
+from crawl4ai_source.deduplicator import (
+    ContentDeduplicator,
+    decode_signature,
+    encode_signature,
+    minhash_signature,
+    normalize_url,
+    sha256_hex,
+    sha256_hex_and_size,
+    utf8_size,
+)
+
+BASE = " ".join(f"word{i}" for i in range(400))
+
+
+@pytest.fixture
+def deduplicator():
+    # Most tests use short bodies, so disable the minimum-length filter
+    return ContentDeduplicator(MagicMock(), min_content_length=0)
+
+
+class TestMinHash:
+    """Test MinHash signatures."""
+
+    def test_signature_is_deterministic(self):
+        assert (minhash_signature(BASE) == minhash_signature(BASE)).all()
+
+    def test_empty_content_has_no_signature(self):
+        assert minhash_signature("  ...  ") is None
+
+    def test_short_content_still_hashes(self):
+        assert minhash_signature("two words") is not None
+
+    def test_blocked_signature_matches_full_outer_product(self):
+        words = " ".join(f"word{i}" for i in range(3 * deduplicator_module._MINHASH_BLOCK))
+        tokens = words.split()
+        shingles = {" ".join(tokens[i:i + 5]) for i in range(len(tokens) - 4)}
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+        expected = (
+            (np.outer(hashes, deduplicator_module._PERM_A) + deduplicator_module._PERM_B)
+            % deduplicator_module._MERSENNE_PRIME
+        ).min(axis=0)
+        assert (minhash_signature(words) == expected).all()
+
+
+class TestSimilarity:
+    """Test near-duplicate detection through the LSH index."""
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_is_detected(self, deduplicator):
+        deduplicator.register(deduplicator.create_fingerprint("https://a.test", BASE))
+        near = BASE.replace("word200", "changed")
+        assert await deduplicator._check_similarity(deduplicator.create_fingerprint("https://b.test", near))
+
+    @pytest.mark.asyncio
+    async def test_unrelated_content_is_not_flagged(self, deduplicator):
+        deduplicator.register(deduplicator.create_fingerprint("https://a.test", BASE))
+        other = " ".join(f"term{i}" for i in range(400))
+        assert not await deduplicator._check_similarity(deduplicator.create_fingerprint("https://b.test", other))
+
+    @pytest.mark.asyncio
+    async def test_content_does_not_match_itself(self, deduplicator):
+        fingerprint = deduplicator.create_fingerprint("https://a.test", BASE)
+        deduplicator.register(fingerprint)
+        assert not await deduplicator._check_similarity(fingerprint)
+
+
+class TestHashing:
+    """Test content hashing."""
+
+    def test_chunked_hash_matches_single_pass(self):
+        text = "é€😀abc" * 40000
+        assert len(text) > 64 * 1024
+        assert sha256_hex(text) == hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def test_hash_and_size_in_one_pass(self):
+        for text in ("", "plain ascii", "é€😀abc" * 40000):
+            encoded = text.encode("utf-8")
+            assert sha256_hex_and_size(text) == (hashlib.sha256(encoded).hexdigest(), len(encoded))
+
+    def test_utf8_size_matches_encoded_length(self):
+        for text in ("", "plain ascii", "é€😀abc" * 40000):
+            assert utf8_size(text) == len(text.encode("utf-8"))
+
+
+class TestHashLookup:
+    """Test the combined hash lookup."""
+
+    @pytest.mark.asyncio
+    async def test_single_or_query_for_all_hashes(self, deduplicator):
+        fingerprint = deduplicator.create_fingerprint("https://a.test/page", "body", title="Title")
+        query = deduplicator.supabase.table.return_value.select.return_value.or_.return_value.limit.return_value
+        query.execute.return_value = MagicMock(data=[{"id": "1", "url_hash": fingerprint.url_hash}])
+
+        assert await deduplicator.is_duplicate(fingerprint)
+
+        or_filter = deduplicator.supabase.table.return_value.select.return_value.or_.call_args[0][0]
+        assert or_filter == (
+            f"content_hash.eq.{fingerprint.content_hash},"
+            f"url_hash.eq.{fingerprint.url_hash},"
+            f"title_hash.eq.{fingerprint.title_hash}"
+        )
+        query.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_lookup_error_fails_open(self, deduplicator):
+        fingerprint = deduplicator.create_fingerprint("https://a.test/page", "body")
+        deduplicator.supabase.table.side_effect = RuntimeError("down")
+        assert not await deduplicator.is_duplicate(fingerprint)
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookups_are_cached(self, deduplicator):
+        query = deduplicator.supabase.table.return_value.select.return_value.or_.return_value.limit.return_value
+        query.execute.return_value = MagicMock(data=[])
+        fingerprint = deduplicator.create_fingerprint("https://a.test/page", "body")
+
+        assert not await deduplicator.is_duplicate(fingerprint)
+        assert not await deduplicator.is_duplicate(fingerprint)
+        query.execute.assert_called_once()
+
+        # Storing the content invalidates the cached absent result
+        deduplicator.register(fingerprint)
+        assert await deduplicator.is_duplicate(fingerprint)
+        query.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_stored_hash_from_lookup_is_cached(self, deduplicator):
+        fingerprint = deduplicator.create_fingerprint("https://a.test/page", "body")
+        query = deduplicator.supabase.table.return_value.select.return_value.or_.return_value.limit.return_value
+        query.execute.return_value = MagicMock(data=[{"id": "1", "content_hash": fingerprint.content_hash}])
+
+        assert await deduplicator.is_duplicate(fingerprint)
+        recrawl = deduplicator.create_fingerprint("https://b.test/other", "body")
+        assert await deduplicator.is_duplicate(recrawl)
+        query.execute.assert_called_once()
+
+
+class TestMinimumLength:
+    """Test the short-content filter."""
+
+    @pytest.mark.asyncio
+    async def test_short_content_is_reported_without_lookup(self):
+        supabase = MagicMock()
+        dedup = ContentDeduplicator(supabase)
+        fingerprint = dedup.create_fingerprint("https://a.test/404", "  Not found  ")
+
+        assert fingerprint.too_short and fingerprint.minhash is None
+        assert await dedup.is_duplicate(fingerprint)
+        assert await dedup.are_duplicates([fingerprint]) == [True]
+        supabase.table.assert_not_called()
+
+    def test_empty_content_hash(self):
+        dedup = ContentDeduplicator(MagicMock())
+        assert dedup.generate_content_hash("") == hashlib.sha256(b"").hexdigest()
+
+
+class TestBatchLookup:
+    """Test checking many fingerprints at once."""
+
+    @pytest.mark.asyncio
+    async def test_batch_uses_one_in_query(self, deduplicator):
+        old = deduplicator.create_fingerprint("https://a.test/old", "old body")
+        new = deduplicator.create_fingerprint("https://a.test/new", "new body")
+        query = deduplicator.supabase.table.return_value.select.return_value.or_.return_value
+        query.execute.return_value = MagicMock(data=[
+            {"content_hash": old.content_hash, "url_hash": old.url_hash, "title_hash": None},
+        ])
+
+        assert await deduplicator.are_duplicates([old, new]) == [True, False]
+
+        query.execute.assert_called_once()
+        or_filter = deduplicator.supabase.table.return_value.select.return_value.or_.call_args[0][0]
+        content_hashes = ",".join(sorted([old.content_hash, new.content_hash]))
+        assert or_filter.startswith(f"content_hash.in.({content_hashes}),url_hash.in.(")
+        assert "title_hash" not in or_filter
+
+        # Both results are now cached
+        assert await deduplicator.are_duplicates([new, old]) == [False, True]
+        query.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_batch_error_fails_open(self, deduplicator):
+        fingerprints = [deduplicator.create_fingerprint(f"https://a.test/{i}", f"body {i}") for i in range(3)]
+        deduplicator.supabase.table.side_effect = RuntimeError("down")
+        assert await deduplicator.are_duplicates(fingerprints) == [False, False, False]
+
+    @pytest.mark.asyncio
+    async def test_batch_includes_similar_content(self, deduplicator):
+        base = " ".join(f"word{i}" for i in range(300))
+        stored = deduplicator.create_fingerprint("https://a.test/1", base)
+        deduplicator.register(stored)
+        query = deduplicator.supabase.table.return_value.select.return_value.or_.return_value
+        query.execute.return_value = MagicMock(data=[])
+
+        near = deduplicator.create_fingerprint("https://a.test/2", base + " extra")
+        assert await deduplicator.are_duplicates([near]) == [True]
+
+
+class TestLocalIndex:
+    """Test the SQLite-backed local hash index."""
+
+    @pytest.mark.asyncio
+    async def test_registered_content_survives_restart(self, tmp_path):
+        path = str(tmp_path / "dedup.sqlite")
+        first = ContentDeduplicator(MagicMock(), local_index_path=path)
+        first.register(first.create_fingerprint("https://a.test/1", BASE))
+
+        supabase = MagicMock()
+        query = supabase.table.return_value.select.return_value.or_.return_value.limit.return_value
+        query.execute.return_value = MagicMock(data=[])
+        second = ContentDeduplicator(supabase, local_index_path=path)
+        assert await second.is_duplicate(second.create_fingerprint("https://b.test/other", BASE))
+        supabase.table.assert_not_called()
+        # Near-duplicates are found through the reloaded MinHash signatures
+        assert await second.is_duplicate(second.create_fingerprint("https://b.test/near", BASE + " tail"))
+
+    @pytest.mark.asyncio
+    async def test_hydrate_pages_through_supabase(self, tmp_path):
+        supabase = MagicMock()
+        dedup = ContentDeduplicator(supabase, local_index_path=str(tmp_path / "dedup.sqlite"), min_content_length=0)
+        stored = dedup.create_fingerprint("https://a.test/stored", "stored body")
+        page = supabase.table.return_value.select.return_value.order.return_value.range.return_value
+        page.execute.return_value = MagicMock(data=[
+            {"content_hash": stored.content_hash, "url_hash": stored.url_hash, "title_hash": None},
+        ])
+
+        assert await dedup.hydrate() == 1
+        assert await dedup.hydrate() == 0
+        page.execute.assert_called_once()
+
+        # Once hydrated, both hits and misses are answered locally
+        supabase.table.reset_mock()
+        fresh = dedup.create_fingerprint("https://a.test/fresh", "fresh body")
+        assert await dedup.are_duplicates([stored, fresh]) == [True, False]
+        assert not await dedup.is_duplicate(fresh)
+        supabase.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_hydrate_loads_signatures_without_content(self, tmp_path):
+        supabase = MagicMock()
+        dedup = ContentDeduplicator(supabase, local_index_path=str(tmp_path / "dedup.sqlite"))
+        stored = dedup.create_fingerprint("https://a.test/stored", BASE)
+        page = supabase.table.return_value.select.return_value.order.return_value.range.return_value
+        page.execute.return_value = MagicMock(data=[{
+            "content_hash": stored.content_hash,
+            "url_hash": stored.url_hash,
+            "title_hash": None,
+            "content_signature": encode_signature(stored.minhash),
+        }])
+
+        await dedup.hydrate()
+
+        columns = supabase.table.return_value.select.call_args[0][0]
+        assert "content_signature" in columns.split(", ")
+        assert "content" not in columns.split(", ")
+        near = dedup.create_fingerprint("https://a.test/near", BASE + " tail")
+        assert await dedup.is_duplicate(near)
+
+    def test_signature_round_trips_through_bytea_literal(self):
+        signature = minhash_signature(BASE)
+        encoded = encode_signature(signature)
+        assert encoded.startswith("\\x")
+        assert (decode_signature(encoded) == signature).all()
+
+    @pytest.mark.asyncio
+    async def test_unhydrated_miss_falls_through_to_supabase(self, tmp_path):
+        supabase = MagicMock()
+        dedup = ContentDeduplicator(supabase, local_index_path=str(tmp_path / "dedup.sqlite"), min_content_length=0)
+        query = supabase.table.return_value.select.return_value.or_.return_value.limit.return_value
+        fingerprint = dedup.create_fingerprint("https://a.test/page", "body")
+        query.execute.return_value = MagicMock(data=[{"id": "1", "content_hash": fingerprint.content_hash}])
+
+        assert await dedup.is_duplicate(fingerprint)
+        query.execute.assert_called_once()
+        # The stored hash learned from Supabase is now in the local index
+        assert dedup._local.lookup([fingerprint.content_hash]) == {fingerprint.content_hash: "content_hash"}
+
+
+class TestDuplicateStats:
+    """Test duplicate statistics."""
+
+    @pytest.mark.asyncio
+    async def test_stats_come_from_rpc(self, deduplicator):
+        deduplicator.supabase.rpc.return_value.execute.return_value = MagicMock(
+            data=[{"total": 10, "unique_content": 7, "unique_urls": 8}]
+        )
+        stats = await deduplicator.get_duplicate_stats()
+        deduplicator.supabase.rpc.assert_called_once_with("crawl_content_stats")
+        deduplicator.supabase.table.assert_not_called()
+        assert stats == {
+            "total_content": 10,
+            "unique_content": 7,
+            "unique_urls": 8,
+            "duplicate_content": 3,
+            "duplicate_urls": 2,
+        }
+
+
+class TestNormalizeUrl:
+    """Test URL normalization."""
+
+    def test_tracking_params_are_dropped(self):
+        assert normalize_url("https://a.test/p?utm_source=x&id=1&gclid=y") == "https://a.test/p?id=1"
+
+    def test_only_scheme_and_host_are_lowercased(self):
+        assert normalize_url("HTTPS://A.Test/Path/?Q=V") == "https://a.test/Path/?Q=V"
+
+    def test_trailing_slash_and_empty_query_are_stripped(self):
+        assert normalize_url("https://a.test/docs/?utm_campaign=z") == "https://a.test/docs"
+
+    def test_kept_params_are_not_reencoded(self):
+        assert normalize_url("https://a.test/s?q=a%20b&x") == "https://a.test/s?q=a%20b&x"
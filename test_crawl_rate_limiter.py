@@ -0,0 +1,261 @@
+"""
+Tests for Crawl4AI per-domain rate limiting.
+
+This module contains unit tests for crawl4ai_source/rate_limiter.py.
+"""
+
+import asyncio
+import email.utils
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from crawl4ai_source.rate_limiter import (
+    MAX_COOLDOWN_SECONDS,
+    RateLimiter,
+    RateLimitRule,
+    extract_domain,
+    parse_retry_after,
+)
+
+
+NS = 1_000_000_000
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter()
+
+
+class TestDomainStats:
+    """Test per-domain statistics storage."""
+
+    @pytest.mark.asyncio
+    async def test_requests_are_counted_per_domain(self, limiter):
+        with patch("crawl4ai_source.rate_limiter.asyncio.sleep", new_callable=AsyncMock):
+            await limiter.wait_if_needed("https://example.com/a")
+            await limiter.wait_if_needed("https://example.com/b")
+            await limiter.wait_if_needed("https://other.test/")
+
+        # Default rule: bursts of 5, so two requests leave about 3 tokens
+        assert limiter.get_domain_stats("example.com").tokens == pytest.approx(3, abs=0.01)
+        assert limiter.get_domain_stats("other.test").tokens == pytest.approx(4, abs=0.01)
+        assert limiter.get_domain_stats("unseen.test") is None
+        assert limiter.get_stats()["example.com"]["tokens"] == pytest.approx(3, abs=0.01)
+
+    def test_rows_grow_and_are_reused(self, limiter):
+        rows = [limiter._get_domain_stats(f"d{i}.test") for i in range(len(limiter._tokens) + 1)]
+        assert len(set(rows)) == len(rows)
+
+        limiter.reset_domain("d0.test")
+        assert limiter._get_domain_stats("new.test") == rows[0]
+        assert limiter.get_domain_stats("new.test").last_request == 0.0
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_domain_is_evicted(self):
+        limiter = RateLimiter(max_domains=2)
+        with patch("crawl4ai_source.rate_limiter.asyncio.sleep", new_callable=AsyncMock):
+            await limiter.wait_if_needed("https://a.test/")
+            await limiter.wait_if_needed("https://b.test/")
+            await limiter.wait_if_needed("https://a.test/")
+            await limiter.wait_if_needed("https://c.test/")
+
+        assert list(limiter._rows) == ["a.test", "c.test"]
+        assert limiter.get_domain_stats("b.test") is None
+        assert "b.test" not in limiter._resolved_rule
+        # The evicted row is reused and starts as a fresh bucket
+        assert len(limiter._tokens) == 1024
+        assert limiter.get_domain_stats("c.test").tokens == pytest.approx(4, abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_cooldown_delays_requests(self, limiter):
+        limiter.set_domain_rule("example.com", RateLimitRule(requests_per_minute=60, cooldown_seconds=0.1))
+        limiter.handle_rate_limit_response("https://example.com/x", 429)
+        stats = limiter.get_stats()["example.com"]
+        assert stats["is_cooling_down"]
+
+        start = time.monotonic()
+        await limiter.wait_if_needed("https://example.com/y")
+        assert time.monotonic() - start == pytest.approx(0.1, abs=0.05)
+
+
+class TestTokenBucket:
+    """Test token-bucket pacing."""
+
+    def test_burst_then_steady_rate(self, limiter):
+        rule = RateLimitRule(requests_per_minute=60, burst_limit=3)
+        row = limiter._get_domain_stats("example.com")
+
+        waits = [limiter._calculate_wait_time(row, rule, 100 * NS) for _ in range(5)]
+        # Three banked requests go immediately, then one per second queues up
+        assert waits == pytest.approx([0.0, 0.0, 0.0, 1.0, 2.0])
+
+        # After the queue drains and a second passes, one token is back
+        assert limiter._calculate_wait_time(row, rule, 103 * NS) == pytest.approx(0.0)
+        assert limiter._calculate_wait_time(row, rule, 103 * NS) == pytest.approx(1.0)
+
+    def test_idle_bucket_refills_to_capacity(self, limiter):
+        rule = RateLimitRule(requests_per_minute=60, burst_limit=2)
+        row = limiter._get_domain_stats("example.com")
+        for _ in range(2):
+            limiter._calculate_wait_time(row, rule, 0)
+
+        assert limiter._calculate_wait_time(row, rule, 1000 * NS) == 0.0
+        assert limiter.get_domain_stats("example.com").tokens == pytest.approx(1.0)
+
+    def test_rule_without_burst_allows_one_request(self):
+        rule = RateLimitRule(requests_per_minute=30)
+        assert rule.capacity == 1.0
+        assert rule.rate_per_second == pytest.approx(0.5)
+
+
+class TestExtractDomain:
+    """Test cached domain extraction."""
+
+    def test_paths_on_a_host_share_a_cache_entry(self, limiter):
+        extract_domain.cache_clear()
+        assert limiter._extract_domain("https://WWW.Example.com/a?q=1") == "example.com"
+        assert limiter._extract_domain("https://WWW.Example.com/b/c") == "example.com"
+        assert extract_domain.cache_info().hits == 1
+
+    def test_userinfo_port_and_ipv6(self, limiter):
+        assert limiter._extract_domain("https://user:pw@www.example.com:8443/x") == "example.com"
+        assert limiter._extract_domain("http://example.com?q=1") == "example.com"
+        assert limiter._extract_domain("http://example.com#top") == "example.com"
+        assert limiter._extract_domain("http://[::1]:8080/") == "[::1]"
+
+    def test_invalid_urls(self, limiter):
+        assert limiter._extract_domain("not a url") is None
+        assert limiter._extract_domain("") is None
+        assert limiter._extract_domain("example.com/page") is None
+        assert limiter._extract_domain("http://[::1/") is None
+        assert limiter._extract_domain("https:///path") is None
+        assert limiter._extract_domain("://example.com") is None
+
+
+class TestDomainRules:
+    """Test rule lookup."""
+
+    def test_rule_lookup_is_cached_and_invalidated(self, limiter):
+        assert limiter.get_domain_rule("github.com").requests_per_minute == 15
+        assert limiter.get_domain_rule("example.com") is limiter._default_rule
+
+        custom = RateLimitRule(requests_per_minute=1)
+        limiter.set_domain_rule("Example.com", custom)
+        assert limiter.get_domain_rule("example.com") is custom
+
+    def test_rules_cover_subdomains(self, limiter):
+        google = limiter.get_domain_rule("google.com")
+        assert limiter.get_domain_rule("mail.google.com") is google
+        assert limiter.get_domain_rule("a.b.google.com") is google
+        assert limiter.get_domain_rule("notgoogle.com") is limiter._default_rule
+        assert limiter.get_domain_rule("com") is limiter._default_rule
+
+        # A more specific rule wins over its parent's
+        docs = RateLimitRule(requests_per_minute=2)
+        limiter.set_domain_rule("docs.google.com", docs)
+        assert limiter.get_domain_rule("api.docs.google.com") is docs
+        assert limiter.get_domain_rule("mail.google.com") is google
+
+    def test_rules_are_slotted_and_immutable(self):
+        rule = RateLimitRule(requests_per_minute=30, burst_limit=4)
+        assert not hasattr(rule, "__dict__")
+        assert rule.rate_per_second == 0.5
+        assert rule.capacity == 4.0
+        assert hash(rule) == hash(RateLimitRule(requests_per_minute=30, burst_limit=4))
+        with pytest.raises(AttributeError):
+            rule.requests_per_minute = 60
+
+
+class TestRetryAfter:
+    """Test Retry-After parsing."""
+
+    def test_numeric_values(self):
+        assert parse_retry_after("120") == (120.0, False)
+        assert parse_retry_after(" 30 ") == (30.0, False)
+
+    def test_http_date_is_absolute(self):
+        seconds, is_absolute = parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT")
+        assert is_absolute
+        assert seconds == 1445412480.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 -0000") == (1445412480.0, True)
+
+    def test_invalid_values(self):
+        assert parse_retry_after("soon") is None
+
+    @pytest.mark.parametrize("value", ["1.5", "-5", "inf", "nan", "1e400", "+10", "\u00b2"])
+    def test_only_delay_seconds_or_http_date(self, value):
+        assert parse_retry_after(value) is None
+
+    def test_http_date_sets_cooldown(self, limiter):
+        retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+        limiter.handle_rate_limit_response("https://example.com/", 429, retry_after=retry_at)
+        remaining = limiter.get_domain_stats("example.com").cooldown_until - time.monotonic()
+        assert 28 < remaining <= 30
+
+    def test_unparseable_value_uses_rule_cooldown(self, limiter):
+        limiter.handle_rate_limit_response("https://example.com/", 429, retry_after="soon")
+        remaining = limiter.get_domain_stats("example.com").cooldown_until - time.monotonic()
+        assert 59 < remaining <= 60
+
+    def test_huge_delay_is_clamped(self, limiter):
+        limiter.handle_rate_limit_response("https://example.com/", 429, retry_after="99999999999")
+        remaining = limiter.get_domain_stats("example.com").cooldown_until - time.monotonic()
+        assert MAX_COOLDOWN_SECONDS - 2 < remaining <= MAX_COOLDOWN_SECONDS
+
+    def test_past_http_date_means_no_wait(self, limiter):
+        limiter.handle_rate_limit_response("https://example.com/", 429, retry_after="Wed, 21 Oct 2015 07:28:00 GMT")
+        remaining = limiter.get_domain_stats("example.com").cooldown_until - time.monotonic()
+        assert remaining <= 0
+
+    @pytest.mark.parametrize("value", ["inf", "nan", "1e400"])
+    def test_non_finite_value_uses_rule_cooldown(self, limiter, value):
+        limiter.handle_rate_limit_response("https://example.com/", 429, retry_after=value)
+        remaining = limiter.get_domain_stats("example.com").cooldown_until - time.monotonic()
+        assert 59 < remaining <= 60
+
+
+class TestConcurrentWaiters:
+    """Test concurrent callers for one domain."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_queue_behind_each_other(self, limiter):
+        limiter.set_domain_rule("example.com", RateLimitRule(requests_per_minute=60, burst_limit=1))
+        with patch("crawl4ai_source.rate_limiter.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await asyncio.gather(*(limiter.wait_if_needed("https://example.com/") for _ in range(4)))
+
+        waits = sorted(call.args[0] for call in mock_sleep.call_args_list)
+        assert waits == pytest.approx([1.0, 2.0, 3.0], abs=0.05)
+
+    @pytest.mark.asyncio
+    async def test_waiters_after_cooldown_are_paced(self, limiter):
+        limiter.set_domain_rule(
+            "example.com", RateLimitRule(requests_per_minute=600, burst_limit=1, cooldown_seconds=0.2)
+        )
+        limiter.handle_rate_limit_response("https://example.com/", 429)
+        start = time.monotonic()
+        done = []
+
+        async def request():
+            await limiter.wait_if_needed("https://example.com/")
+            done.append(time.monotonic() - start)
+
+        with patch("crawl4ai_source.rate_limiter.asyncio.sleep", wraps=asyncio.sleep) as sleep:
+            await asyncio.gather(*(request() for _ in range(3)))
+
+        assert done == pytest.approx([0.2, 0.3, 0.4], abs=0.05)
+        # All three share the cooldown timer; only the bucket pacing after
+        # it ends needs a timer per waiter
+        assert sleep.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cooldown_without_event_loop_falls_back_to_sleep(self, limiter):
+        limiter.set_domain_rule("example.com", RateLimitRule(requests_per_minute=60, burst_limit=1))
+        with patch("crawl4ai_source.rate_limiter.asyncio.get_running_loop", side_effect=RuntimeError):
+            limiter.handle_rate_limit_response("https://example.com/", 429, retry_after="10")
+        assert "example.com" not in limiter._cooldown_events
+
+        with patch("crawl4ai_source.rate_limiter.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await limiter.wait_if_needed("https://example.com/")
+        assert mock_sleep.call_args.args[0] == pytest.approx(10.0, abs=0.05)
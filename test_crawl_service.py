@@ -240,6 +240,13 @@ class TestCrawlService:
         assert 'https://link1.com' in links
         assert 'https://link2.com' in links
 
+    def test_extract_links_keeps_first_seen_order(self, crawl_service):
+        """Test that deduplicated links keep their page order."""
+        mock_result = MagicMock()
+        mock_result.links = ['https://b.com', 'https://a.com', 'https://b.com', 'https://c.com']
+
+        assert crawl_service._extract_links(mock_result) == ['https://b.com', 'https://a.com', 'https://c.com']
+
     def test_extract_links_from_dicts(self, crawl_service):
         """Test link extraction from list of dicts."""
         mock_result = MagicMock()
@@ -254,6 +261,13 @@ class TestCrawlService:
         assert 'https://link1.com' in links
         assert 'https://link2.com' in links
 
+    def test_extract_links_from_mixed_list(self, crawl_service):
+        """Test link extraction from a list mixing strings and dicts."""
+        mock_result = MagicMock()
+        mock_result.links = ['https://link1.com', {'href': 'https://link2.com'}, {'href': 'https://link1.com'}]
+
+        assert crawl_service._extract_links(mock_result) == ['https://link1.com', 'https://link2.com']
+
     def test_extract_links_failure(self, crawl_service):
         """Test link extraction failure handling."""
         mock_result = MagicMock()
@@ -0,0 +1,478 @@
+"""
+Tests for the Graphiti client wrappers in graphiti_client.py.
+
+The Graphiti client itself is mocked; no Neo4j or LLM backend is needed.
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from neo4j.exceptions import TransientError
+from tenacity import wait_none
+
+import graphiti_client
+
+
+def test_import_defers_graphiti_core():
+    code = "import sys, graphiti_client; print('graphiti_core' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_sync_wrappers_share_one_persistent_loop():
+    loops = []
+
+    async def record_loop(*args, **kwargs):
+        loops.append(asyncio.get_running_loop())
+        return {"status": "success"}
+
+    with patch.object(graphiti_client, "add_episode_async", side_effect=record_loop), \
+         patch.object(graphiti_client, "search_graph_async", side_effect=record_loop), \
+         patch.object(graphiti_client, "get_temporal_context_async", side_effect=record_loop):
+        assert graphiti_client.add_episode("ep", "body", "test") == {"status": "success"}
+        graphiti_client.search_graph("query")
+        graphiti_client.get_temporal_context("entity")
+
+    assert len(loops) == 3
+    assert loops[0] is loops[1] is loops[2] is graphiti_client._bg_loop
+    assert not loops[0].is_closed()
+
+
+def _fake_client(episode_delay=0.0):
+    """A Graphiti stand-in that records how many episodes are in flight."""
+    client = MagicMock()
+    client.build_indices_and_constraints = AsyncMock()
+    client.in_flight = 0
+    client.max_in_flight = 0
+
+    async def add_episode(**kwargs):
+        client.in_flight += 1
+        client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        await asyncio.sleep(episode_delay)
+        client.in_flight -= 1
+        if kwargs["name"] == "fails":
+            raise RuntimeError("extraction failed")
+
+    client.add_episode = AsyncMock(side_effect=add_episode)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_batch_adds_episodes_concurrently_with_a_bound():
+    client = _fake_client(episode_delay=0.01)
+    items = [{"name": f"ep{i}", "episode_body": "body", "source_description": "test"} for i in range(10)]
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        results = await graphiti_client.add_episodes_batch_async(items, max_concurrency=3)
+
+    assert [r["episode_name"] for r in results] == [f"ep{i}" for i in range(10)]
+    assert client.add_episode.await_count == 10
+    assert client.max_in_flight == 3
+    client.build_indices_and_constraints.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_failures_per_item():
+    client = _fake_client()
+    items = [
+        {"name": "ok", "episode_body": "body", "source_description": "test"},
+        {"name": "fails", "episode_body": "body", "source_description": "test"},
+        {"name": "missing-body"},
+    ]
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        results = await graphiti_client.add_episodes_batch_async(items)
+
+    assert results[0]["status"] == "success"
+    assert results[1] == {"error": "extraction failed"}
+    assert "error" in results[2]
+
+
+@pytest.fixture
+def fresh_schema(monkeypatch):
+    monkeypatch.setattr(graphiti_client, "_schema_ready", False)
+    monkeypatch.setattr(graphiti_client, "_embedder_warmed", False)
+
+
+@pytest.mark.asyncio
+async def test_schema_is_built_once_per_process(fresh_schema):
+    client = _fake_client()
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        await asyncio.gather(*(graphiti_client.add_episode_async(f"ep{i}", "body", "test") for i in range(3)))
+        await graphiti_client.add_episodes_batch_async([{"name": "ep3", "episode_body": "body", "source_description": "test"}])
+
+    client.build_indices_and_constraints.assert_awaited_once()
+    assert client.add_episode.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_schema_build_contended_across_loops(fresh_schema):
+    async def slow(**kwargs):
+        await asyncio.sleep(0.1)
+
+    client = _fake_client()
+    client.build_indices_and_constraints = AsyncMock(side_effect=slow)
+    # The background loop holds its lock while this loop asks for one
+    background = asyncio.run_coroutine_threadsafe(graphiti_client._ensure_schema(client), graphiti_client._bg_loop)
+    await asyncio.sleep(0.02)
+    await graphiti_client._ensure_schema(client)
+    await asyncio.wrap_future(background)
+
+    assert graphiti_client._schema_ready
+
+
+@pytest.mark.asyncio
+async def test_schema_build_overlaps_embedder_warmup(fresh_schema):
+    async def slow(**kwargs):
+        await asyncio.sleep(0.1)
+
+    client = _fake_client()
+    client.build_indices_and_constraints = AsyncMock(side_effect=slow)
+    client.embedder.create = AsyncMock(side_effect=slow)
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        start = time.monotonic()
+        await graphiti_client.add_episode_async("ep0", "body", "test")
+        elapsed = time.monotonic() - start
+        await graphiti_client.add_episode_async("ep1", "body", "test")
+
+    assert 0.1 <= elapsed < 0.18
+    client.embedder.create.assert_awaited_once_with(input_data=["warmup"])
+
+
+@pytest.mark.asyncio
+async def test_failed_schema_build_is_retried(fresh_schema):
+    client = _fake_client()
+    client.build_indices_and_constraints.side_effect = [RuntimeError("neo4j down"), None]
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        first = await graphiti_client.add_episode_async("ep0", "body", "test")
+        await graphiti_client.add_episode_async("ep1", "body", "test")
+        await graphiti_client.add_episode_async("ep2", "body", "test")
+
+    assert first["status"] == "success"
+    assert client.build_indices_and_constraints.await_count == 2
+
+
+def test_concurrent_first_calls_build_one_client():
+    built = []
+
+    def slow_create():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    graphiti_client.close_graphiti_client()
+    try:
+        with patch.object(graphiti_client, "_create_graphiti_client", side_effect=slow_create):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                clients = list(pool.map(lambda _: graphiti_client.get_graphiti_client(), range(8)))
+    finally:
+        graphiti_client.close_graphiti_client()
+
+    assert len(built) == 1
+    assert all(c is built[0] for c in clients)
+
+
+class _FakeNeo4jDriver:
+    """Stands in for Graphiti's Neo4jDriver, which builds an unpooled client."""
+
+    def __init__(self, uri, user, password, database="neo4j"):
+        self.client = MagicMock(name="default_client", close=AsyncMock())
+
+
+def _fake_classes():
+    classes = {name: MagicMock(name=name) for name in (
+        "Graphiti", "OpenAIClient", "LLMConfig", "OpenAIEmbedder",
+        "OpenAIEmbedderConfig", "GeminiClient", "GeminiRerankerClient",
+        "AsyncGraphDatabase",
+    )}
+    classes["Neo4jDriver"] = type("Neo4jDriver", (_FakeNeo4jDriver,), {})
+    return classes
+
+
+@pytest.fixture
+def fresh_shared_clients():
+    graphiti_client._get_embedder.cache_clear()
+    graphiti_client._get_reranker.cache_clear()
+    yield
+    graphiti_client._get_embedder.cache_clear()
+    graphiti_client._get_reranker.cache_clear()
+
+
+@pytest.mark.parametrize("provider, llm_class, has_reranker", [
+    ("openai", "OpenAIClient", False),
+    ("google", "GeminiClient", True),
+    ("ollama", "OpenAIClient", False),
+])
+def test_client_is_built_by_the_provider_builder(provider, llm_class, has_reranker, monkeypatch, fresh_shared_clients):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("GOOGLE_API_KEY", "g-test")
+    classes = _fake_classes()
+    config = MagicMock(provider=provider)
+    config.get_graphiti_llm_config.return_value = {"llm_config": {"api_key": "sk-test", "model": "gpt-4o-mini"}}
+
+    with patch.object(graphiti_client, "_import_graphiti", return_value=classes), \
+         patch.object(graphiti_client, "llm_config", config, create=True), \
+         patch.object(graphiti_client, "LLM_CONFIG_AVAILABLE", True), \
+         patch.object(graphiti_client, "GRAPHITI_AVAILABLE", True):
+        instance = graphiti_client._create_graphiti_client()
+
+    assert instance is classes["Graphiti"].return_value
+    kwargs = classes["Graphiti"].call_args.kwargs
+    assert kwargs["llm_client"] is classes[llm_class].return_value
+    assert kwargs["embedder"] is classes["OpenAIEmbedder"].return_value
+    assert ("cross_encoder" in kwargs) is has_reranker
+
+
+def test_embedder_and_reranker_are_shared_between_clients(monkeypatch, fresh_shared_clients):
+    monkeypatch.setenv("GOOGLE_API_KEY", "g-test")
+    classes = _fake_classes()
+    # Each construction yields a distinct object, so sharing is observable
+    classes["OpenAIEmbedder"].side_effect = lambda **kwargs: object()
+    classes["GeminiRerankerClient"].side_effect = lambda **kwargs: object()
+    config = MagicMock(provider="google")
+
+    with patch.object(graphiti_client, "_import_graphiti", return_value=classes), \
+         patch.object(graphiti_client, "llm_config", config, create=True), \
+         patch.object(graphiti_client, "LLM_CONFIG_AVAILABLE", True), \
+         patch.object(graphiti_client, "GRAPHITI_AVAILABLE", True):
+        graphiti_client._create_graphiti_client()
+        graphiti_client._create_graphiti_client()
+
+    first, second = (c.kwargs for c in classes["Graphiti"].call_args_list)
+    assert first["embedder"] is second["embedder"]
+    assert first["cross_encoder"] is second["cross_encoder"]
+    assert classes["OpenAIEmbedder"].call_count == 1
+
+
+def test_neo4j_pool_is_configured_from_env(monkeypatch):
+    monkeypatch.setattr(graphiti_client, "NEO4J_POOL_SIZE", 128)
+    monkeypatch.setattr(graphiti_client, "NEO4J_ACQUIRE_TIMEOUT", 15.0)
+    classes = _fake_classes()
+
+    with patch.object(graphiti_client, "_import_graphiti", return_value=classes), \
+         patch.object(graphiti_client, "LLM_CONFIG_AVAILABLE", False), \
+         patch.object(graphiti_client, "GRAPHITI_AVAILABLE", True):
+        graphiti_client._create_graphiti_client()
+
+    driver = classes["Graphiti"].call_args.kwargs["graph_driver"]
+    assert classes["Graphiti"].call_args.kwargs == {"graph_driver": driver}
+    assert isinstance(driver, classes["Neo4jDriver"])
+    assert driver.client is classes["AsyncGraphDatabase"].driver.return_value
+    pool_kwargs = classes["AsyncGraphDatabase"].driver.call_args.kwargs
+    assert pool_kwargs["max_connection_pool_size"] == 128
+    assert pool_kwargs["connection_acquisition_timeout"] == 15.0
+
+
+@pytest.mark.asyncio
+async def test_neo4j_driver_built_in_a_loop_leaves_no_task_or_open_client():
+    import neo4j
+    from graphiti_core.driver.neo4j_driver import Neo4jDriver
+
+    closed = []
+    original_close = neo4j.AsyncDriver.close
+
+    async def close(self):
+        closed.append(self)
+        await original_close(self)
+
+    pooled = []
+
+    def pooled_driver(*args, **kwargs):
+        pooled.append(neo4j.AsyncGraphDatabase.driver(*args, **kwargs))
+        return pooled[-1]
+
+    graph_database = MagicMock(driver=MagicMock(side_effect=pooled_driver))
+    with patch.object(neo4j.AsyncDriver, "close", close):
+        tasks_before = asyncio.all_tasks()
+        driver = graphiti_client._neo4j_driver({"Neo4jDriver": Neo4jDriver, "AsyncGraphDatabase": graph_database})
+        # No schema build of its own was scheduled on this loop
+        assert asyncio.all_tasks() == tasks_before
+        assert pooled == [driver.client]
+        assert len(closed) == 1 and closed[0] is not driver.client
+        await driver.close()
+
+
+@pytest.fixture
+def fresh_search_cache():
+    graphiti_client._search_cache_clear()
+    yield
+    graphiti_client._search_cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_repeat_searches_are_cached(fresh_search_cache):
+    client = _fake_client()
+    client.search = AsyncMock(return_value=[{"fact": "a"}])
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        first = await graphiti_client.search_graph_async("who  runs alpha?")
+        second = await graphiti_client.search_graph_async(" who runs alpha? ")
+        await graphiti_client.search_graph_async("who runs alpha?", num_results=5)
+
+    assert first == second == [{"fact": "a"}]
+    assert client.search.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_search_cache_expires_and_skips_errors(fresh_search_cache, monkeypatch):
+    client = _fake_client()
+    client.search = AsyncMock(side_effect=[RuntimeError("neo4j down"), [{"fact": "a"}], [{"fact": "b"}]])
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        assert "error" in (await graphiti_client.search_graph_async("q"))[0]
+        assert await graphiti_client.search_graph_async("q") == [{"fact": "a"}]
+        monkeypatch.setattr(graphiti_client, "GRAPH_SEARCH_CACHE_TTL", 0.0)
+        graphiti_client._search_cache_put(("q", 10, None), [{"fact": "a"}])
+        assert await graphiti_client.search_graph_async("q") == [{"fact": "b"}]
+
+
+@pytest.mark.asyncio
+async def test_adding_an_episode_clears_search_cache(fresh_search_cache):
+    client = _fake_client()
+    client.search = AsyncMock(return_value=[{"fact": "a"}])
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        await graphiti_client.search_graph_async("q")
+        await graphiti_client.add_episode_async("ep", "body", "test")
+        await graphiti_client.search_graph_async("q")
+
+    assert client.search.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_episode_timestamp_is_aware_and_computed_once(fresh_schema):
+    client = _fake_client()
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        result = await graphiti_client.add_episode_async("ep", "body", "test")
+
+    sent = client.add_episode.call_args.kwargs["reference_time"]
+    assert sent.tzinfo is not None
+    assert result["timestamp"] == sent.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_search_stream_yields_each_result(fresh_search_cache):
+    client = _fake_client()
+    client.search = AsyncMock(return_value=[{"fact": "a"}, {"fact": "b"}])
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        results = [r async for r in graphiti_client.search_graph_stream("q", num_results=2)]
+
+    assert results == [{"fact": "a"}, {"fact": "b"}]
+    client.search.assert_awaited_once_with(query="q", num_results=2, center_node_uuid=None)
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def no_retry_wait(monkeypatch):
+    for fn in (graphiti_client._client_add_episode, graphiti_client._client_search):
+        monkeypatch.setattr(fn.retry, "wait", wait_none())
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(fresh_schema, fresh_search_cache, no_retry_wait):
+    client = _fake_client()
+    client.add_episode = AsyncMock(side_effect=[_StatusError(429), _StatusError(503), None])
+    client.search = AsyncMock(side_effect=[TransientError("deadlock"), [{"fact": "a"}]])
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        added = await graphiti_client.add_episode_async("ep", "body", "test")
+        found = await graphiti_client.search_graph_async("q")
+
+    assert added["status"] == "success"
+    assert client.add_episode.await_count == 3
+    assert found == [{"fact": "a"}]
+
+
+@pytest.mark.asyncio
+async def test_permanent_failures_are_not_retried(fresh_schema, no_retry_wait):
+    client = _fake_client()
+    client.add_episode = AsyncMock(side_effect=_StatusError(400))
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        result = await graphiti_client.add_episode_async("ep", "body", "test")
+
+    assert result == {"error": "HTTP 400"}
+    assert client.add_episode.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_give_up_after_the_attempt_limit(fresh_schema, no_retry_wait):
+    client = _fake_client()
+    client.add_episode = AsyncMock(side_effect=_StatusError(503))
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        result = await graphiti_client.add_episode_async("ep", "body", "test")
+
+    assert result == {"error": "HTTP 503"}
+    assert client.add_episode.await_count == graphiti_client.GRAPHITI_RETRY_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_episodes_are_coalesced(fresh_schema):
+    client = _fake_client(episode_delay=0.01)
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        first, second, other = await asyncio.gather(
+            graphiti_client.add_episode_async("ep", "body", "test"),
+            graphiti_client.add_episode_async("ep", "body", "retry"),
+            graphiti_client.add_episode_async("ep", "other body", "test"),
+        )
+        again = await graphiti_client.add_episode_async("ep", "body", "test")
+
+    assert first == second
+    assert other["status"] == again["status"] == "success"
+    assert client.add_episode.await_count == 3
+    assert graphiti_client._inflight_episodes == {}
+
+
+@pytest.mark.asyncio
+async def test_temporal_context_serializes_datetimes_and_models():
+    edge = MagicMock(spec=["model_dump"])
+    edge.model_dump.return_value = {"fact": "a", "valid_at": "2024-01-02T00:00:00Z"}
+    client = _fake_client()
+    client.search = AsyncMock(return_value=[edge])
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        context = await graphiti_client.get_temporal_context_async(
+            "entity", start_time=datetime(2024, 1, 1), end_time=datetime(2024, 2, 1, tzinfo=timezone.utc)
+        )
+
+    assert context["time_range"]["start"] == datetime(2024, 1, 1)
+    for encoder in (graphiti_client.orjson, None):
+        with patch.object(graphiti_client, "orjson", encoder):
+            decoded = json.loads(graphiti_client.serialize(context))
+        assert decoded["time_range"] == {"start": "2024-01-01T00:00:00+00:00", "end": "2024-02-01T00:00:00+00:00"}
+        assert decoded["results"] == [{"fact": "a", "valid_at": "2024-01-02T00:00:00Z"}]
+
+
+@pytest.mark.asyncio
+async def test_episodes_share_one_concurrency_bound(fresh_schema, monkeypatch):
+    monkeypatch.setattr(graphiti_client, "GRAPHITI_MAX_CONCURRENCY", 2)
+    client = _fake_client(episode_delay=0.01)
+    items = [{"name": f"ep{i}", "episode_body": "body", "source_description": "test"} for i in range(6)]
+
+    with patch.object(graphiti_client, "get_graphiti_client", return_value=client):
+        await asyncio.gather(
+            graphiti_client.add_episodes_batch_async(items, max_concurrency=16),
+            graphiti_client.add_episode_async("single", "body", "test"),
+        )
+
+    assert client.add_episode.await_count == 7
+    assert client.max_in_flight == 2
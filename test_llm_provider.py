@@ -0,0 +1,110 @@
+"""
+Tests for LLM provider detection in llm_provider.py.
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+import llm_provider
+from llm_provider import LLMConfig
+
+
+@pytest.fixture
+def provider_env(tmp_path, monkeypatch):
+    """Auto-detect with no API keys and a provider cache under tmp_path."""
+    monkeypatch.setattr(llm_provider, "PROVIDER_CACHE_PATH", str(tmp_path / "provider.json"))
+    monkeypatch.setenv("LLM_PROVIDER", "auto")
+    monkeypatch.setenv("OLLAMA_HOST", "http://ollama.test:11434")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    return tmp_path
+
+
+def test_explicit_provider_skips_probe(provider_env, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    with patch.object(LLMConfig, "_probe_ollama") as probe:
+        assert LLMConfig().provider == "openai"
+    probe.assert_not_called()
+
+
+def test_probe_result_is_cached(provider_env):
+    with patch.object(LLMConfig, "_probe_ollama", return_value=True) as probe:
+        assert LLMConfig().provider == "ollama"
+        assert LLMConfig().provider == "ollama"
+    probe.assert_called_once()
+
+
+def test_negative_probe_is_not_cached(provider_env):
+    with patch.object(LLMConfig, "_probe_ollama", return_value=False):
+        LLMConfig()
+    assert not os.path.exists(llm_provider.PROVIDER_CACHE_PATH)
+    # Ollama started since the last run is picked up straight away
+    with patch.object(LLMConfig, "_probe_ollama", return_value=True) as probe:
+        assert LLMConfig().provider == "ollama"
+    probe.assert_called_once()
+
+
+def test_cache_is_per_host_and_expires(provider_env, monkeypatch):
+    with patch.object(LLMConfig, "_probe_ollama", return_value=True) as probe:
+        LLMConfig()
+        monkeypatch.setenv("OLLAMA_HOST", "http://other.test:11434")
+        LLMConfig()
+        assert probe.call_count == 2
+
+        stale = os.path.getmtime(llm_provider.PROVIDER_CACHE_PATH) - llm_provider.PROVIDER_CACHE_TTL_SECONDS - 1
+        os.utime(llm_provider.PROVIDER_CACHE_PATH, (stale, stale))
+        LLMConfig()
+        assert probe.call_count == 3
+
+
+def test_unreachable_ollama_fails_on_connect(provider_env):
+    with patch("llm_provider.socket.create_connection", side_effect=ConnectionRefusedError):
+        assert LLMConfig().provider == "ollama"  # default with no keys
+        assert LLMConfig()._probe_ollama() is False
+
+
+def test_unwritable_cache_is_ignored(provider_env, monkeypatch):
+    blocker = provider_env / "blocker"
+    blocker.write_text("")
+    monkeypatch.setattr(llm_provider, "PROVIDER_CACHE_PATH", str(blocker / "provider.json"))
+    with patch.object(LLMConfig, "_probe_ollama", return_value=False):
+        monkeypatch.setenv("GOOGLE_API_KEY", "key")
+        assert LLMConfig().provider == "google"
+
+
+def test_probe_checks_tags_endpoint_without_requests(provider_env, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    with patch("llm_provider.socket.create_connection"), \
+         patch("llm_provider.http.client.HTTPConnection") as connection:
+        connection.return_value.getresponse.return_value.status = 200
+        assert LLMConfig()._probe_ollama() is True
+
+    connection.assert_called_once_with("ollama.test", 11434, timeout=2)
+    connection.return_value.request.assert_called_once_with("GET", "/api/tags")
+    connection.return_value.close.assert_called_once()
+
+
+def test_config_dicts_are_computed_once(provider_env, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    config = LLMConfig()
+    assert config.get_provider_info() is config.get_provider_info()
+    assert config.get_embeddings_config() is config.embeddings_config
+    assert config.get_graphiti_llm_config()["llm_config"]["model"] == config.ollama_model
+
+    monkeypatch.setenv("OLLAMA_EMBED_MODEL", "other-embed")
+    assert config.get_embeddings_config()["model"] != "other-embed"
+    config.clear_cached_configs()
+    assert config.get_embeddings_config()["model"] == "other-embed"
+
+
+def test_provider_info_json_is_serialized_once(provider_env, monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    config = LLMConfig()
+    assert json.loads(config.provider_info_json) == config.get_provider_info()
+    assert config.provider_info_json is config.provider_info_json
+
+    config.clear_cached_configs()
+    assert "provider_info_json" not in vars(config)
@@ -32,9 +32,9 @@ async def test_supabase_failure_does_not_fail_job():
 
     with patch('crawl4ai_source.manager.SUPABASE_AVAILABLE', True), \
          patch('crawl4ai_source.manager.EMBEDDING_AVAILABLE', True), \
-         patch('crawl4ai_source.manager.get_embedding_ollama') as mock_emb, \
-         patch('crawl4ai_source.manager.add_document_to_supabase') as mock_add:
-        mock_emb.return_value = [0.1, 0.2]
+         patch('crawl4ai_source.manager.get_embeddings_ollama_batch') as mock_emb, \
+         patch('crawl4ai_source.manager.add_documents_to_supabase') as mock_add:
+        mock_emb.return_value = [[0.1, 0.2]]
         mock_add.side_effect = Exception('Supabase error')
         # Should not raise
         await manager._integrate_with_supabase(job, result)
@@ -3,7 +3,7 @@ from unittest.mock import AsyncMock, patch, MagicMock
 
 import pytest
 
-from crawl4ai_source.manager import CrawlJobManager, add_episode, add_document_to_supabase
+from crawl4ai_source.manager import CrawlJobManager, add_episode, add_documents_to_supabase
 from crawl4ai_source.models import CrawlJob, CrawlResult, CrawlConfig, CrawlStatus
 
 
@@ -36,11 +36,298 @@ async def test_store_result_in_supabase_calls_client():
     with (
         patch('crawl4ai_source.manager.SUPABASE_AVAILABLE', True),
         patch('crawl4ai_source.manager.EMBEDDING_AVAILABLE', True),
-        patch('crawl4ai_source.manager.get_embedding_ollama') as mock_emb,
-        patch('crawl4ai_source.manager.add_document_to_supabase') as mock_add,
+        patch('crawl4ai_source.manager.get_embeddings_ollama_batch') as mock_emb,
+        patch('crawl4ai_source.manager.add_documents_to_supabase') as mock_add,
     ):
-        mock_emb.return_value = [0.1, 0.2, 0.3]
+        mock_emb.return_value = [[0.1, 0.2, 0.3]]
         mock_add.return_value = {'id': 'doc-1'}
         # Call the supabase integration method
         await manager._integrate_with_supabase(job, result)
         assert mock_add.called
+
+
+@pytest.mark.asyncio
+async def test_supabase_queries_run_off_event_loop():
+    import threading
+
+    supabase = MagicMock()
+    threads = []
+    query = supabase.table.return_value.select.return_value.eq.return_value
+    query.execute.side_effect = lambda: threads.append(threading.current_thread()) or MagicMock(data=[])
+    manager = CrawlJobManager(supabase_client=supabase)
+
+    assert await manager.get_job('missing') is None
+    assert threads and threads[0] is not threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_persists_share_one_upsert():
+    supabase = MagicMock()
+    manager = CrawlJobManager(supabase_client=supabase)
+    jobs = [CrawlJob(url=f'https://example.com/{i}') for i in range(5)]
+
+    await asyncio.gather(*(manager._persist_job(job) for job in jobs))
+    jobs[0].mark_running()
+    await manager._persist_job(jobs[0])
+    await manager.stop()
+
+    upserts = supabase.table.return_value.upsert.call_args_list
+    assert len(upserts) == 2
+    assert {row['id'] for row in upserts[0].args[0]} == {job.id for job in jobs}
+    assert upserts[1].args[0][0]['status'] == 'running'
+    assert all(call.kwargs['returning'].value == 'minimal' for call in upserts)
+
+
+@pytest.mark.asyncio
+async def test_persist_failure_reaches_caller():
+    supabase = MagicMock()
+    supabase.table.return_value.upsert.return_value.execute.side_effect = RuntimeError('db down')
+    manager = CrawlJobManager(supabase_client=supabase)
+
+    with pytest.raises(RuntimeError, match='db down'):
+        await manager._persist_job(CrawlJob(url='https://example.com'))
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_jobs_beyond_limit_wait_for_a_slot():
+    manager = CrawlJobManager(supabase_client=MagicMock(), max_concurrent_jobs=1)
+    release = asyncio.Event()
+    running = []
+
+    async def crawl_url(url, config):
+        running.append(url)
+        await release.wait()
+        return CrawlResult(url=url, content='body')
+
+    manager._crawl_service = MagicMock(crawl_url=crawl_url)
+    jobs = [CrawlJob(url='https://example.com/a'), CrawlJob(url='https://example.com/b')]
+    with patch.object(manager, 'get_job', new_callable=AsyncMock, side_effect=jobs), \
+         patch.object(manager, '_integrate_with_downstream', new_callable=AsyncMock):
+        assert await manager.start_job(jobs[0].id)
+        assert await manager.start_job(jobs[1].id)
+        await asyncio.sleep(0.05)
+        assert running == ['https://example.com/a']
+
+        release.set()
+        await asyncio.gather(*list(manager._active_jobs.values()))
+    assert running == ['https://example.com/a', 'https://example.com/b']
+    assert all(job.status == CrawlStatus.COMPLETED for job in jobs)
+    manager._crawl_service = None
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_persisted_job_round_trips():
+    supabase = MagicMock()
+    manager = CrawlJobManager(supabase_client=supabase)
+    job = CrawlJob(url='https://example.com', config=CrawlConfig(max_depth=3))
+    job.result = CrawlResult(url='https://example.com', title='Title', content='body', links=['https://a.test'])
+    job.mark_completed(job.result)
+
+    await manager._persist_job(job)
+    await manager.stop()
+
+    row = supabase.table.return_value.upsert.call_args.args[0][0]
+    restored = manager._job_from_db_row(row)
+    assert restored.config.max_depth == 3
+    assert restored.result.title == 'Title'
+    assert restored.result.links == ['https://a.test']
+
+
+def test_job_columns_are_encoded_once():
+    job = CrawlJob(url='https://example.com')
+    with patch('crawl4ai_source.manager._dumps', return_value='{}') as mock_dumps:
+        for _ in range(3):
+            CrawlJobManager._encode_column(job, 'config')
+        assert CrawlJobManager._encode_column(job, 'result') is None
+        assert mock_dumps.call_count == 1
+
+        job.mark_completed(CrawlResult(url='https://example.com', content='body'))
+        CrawlJobManager._encode_column(job, 'result')
+        CrawlJobManager._encode_column(job, 'result')
+        assert mock_dumps.call_count == 2
+
+        # Replacing the object invalidates its cached encoding
+        job.config = CrawlConfig(max_depth=5)
+        CrawlJobManager._encode_column(job, 'config')
+        assert mock_dumps.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_downstream_integrations_run_concurrently():
+    manager = CrawlJobManager(supabase_client=MagicMock())
+    job = CrawlJob(url='https://example.com')
+    result = CrawlResult(url='https://example.com', content='body')
+    started = []
+    both_started = asyncio.Event()
+
+    async def integrate(name):
+        started.append(name)
+        if len(started) == 2:
+            both_started.set()
+        await asyncio.wait_for(both_started.wait(), timeout=1)
+
+    async def supabase(job, result):
+        await integrate('supabase')
+
+    async def failing_graphiti(job, result):
+        await integrate('graphiti')
+        raise RuntimeError('graph down')
+
+    with patch.object(manager, '_integrate_with_supabase', side_effect=supabase), \
+         patch.object(manager, '_integrate_with_graphiti', side_effect=failing_graphiti):
+        await manager._integrate_with_downstream(job, result)
+
+    assert sorted(started) == ['graphiti', 'supabase']
+
+
+@pytest.mark.asyncio
+async def test_supabase_integration_runs_blocking_calls_off_loop():
+    import threading
+
+    manager = CrawlJobManager.__new__(CrawlJobManager)
+    job = CrawlJob(id='job-3', url='https://example.com')
+    result = CrawlResult(url='https://example.com', content='hello world')
+    threads = []
+
+    def record(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return [[0.1]]
+
+    with (
+        patch('crawl4ai_source.manager.SUPABASE_AVAILABLE', True),
+        patch('crawl4ai_source.manager.EMBEDDING_AVAILABLE', True),
+        patch('crawl4ai_source.manager.get_embeddings_ollama_batch', side_effect=record),
+        patch('crawl4ai_source.manager.add_documents_to_supabase', side_effect=record),
+    ):
+        await manager._integrate_with_supabase(job, result)
+
+    assert len(threads) == 2
+    assert threading.current_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_large_content_is_stored_in_chunks():
+    from text_chunks import INGEST_CHUNK_CHARS, INGEST_EMBED_BATCH
+
+    manager = CrawlJobManager.__new__(CrawlJobManager)
+    job = CrawlJob(id='job-4', url='https://example.com')
+    content = 'x' * (INGEST_CHUNK_CHARS * (INGEST_EMBED_BATCH + 1) + 10)
+    result = CrawlResult(url='https://example.com', content=content)
+
+    with (
+        patch('crawl4ai_source.manager.SUPABASE_AVAILABLE', True),
+        patch('crawl4ai_source.manager.EMBEDDING_AVAILABLE', True),
+        patch('crawl4ai_source.manager.get_embeddings_ollama_batch', side_effect=lambda b: [[0.1]] * len(b)) as mock_emb,
+        patch('crawl4ai_source.manager.add_documents_to_supabase') as mock_add,
+    ):
+        await manager._integrate_with_supabase(job, result)
+
+    # One embedding call and one insert per INGEST_EMBED_BATCH chunks
+    assert [len(c.args[0]) for c in mock_emb.call_args_list] == [INGEST_EMBED_BATCH, 2]
+    documents = [d for c in mock_add.call_args_list for d in c.args[0]]
+    assert len(mock_add.call_args_list) == 2
+    assert [len(d['text']) for d in documents[-2:]] == [INGEST_CHUNK_CHARS, 10]
+    assert ''.join(d['text'] for d in documents) == content
+    assert [d['metadata']['chunk_index'] for d in documents] == list(range(INGEST_EMBED_BATCH + 2))
+
+
+@pytest.mark.asyncio
+async def test_episode_name_is_stable_for_a_url():
+    import hashlib
+
+    manager = CrawlJobManager.__new__(CrawlJobManager)
+    job = CrawlJob(id='job-5', url='https://example.com')
+    result = CrawlResult(url='https://example.com/page', content='hello world')
+
+    with patch('crawl4ai_source.manager.add_episode', new_callable=AsyncMock) as mock_add, \
+         patch('crawl4ai_source.manager.GRAPHITI_AVAILABLE', True):
+        mock_add.return_value = {'status': 'success'}
+        await manager._integrate_with_graphiti(job, result)
+
+    digest = hashlib.blake2b(b'https://example.com/page', digest_size=6).hexdigest()
+    assert mock_add.call_args.kwargs['name'] == f'crawl_job-5_{digest}'
+
+
+@pytest.mark.asyncio
+async def test_start_and_cancel_use_in_process_job():
+    manager = CrawlJobManager(supabase_client=MagicMock())
+    release = asyncio.Event()
+
+    async def crawl_url(url, config):
+        await release.wait()
+        return CrawlResult(url=url, content='body')
+
+    manager._crawl_service = MagicMock(crawl_url=crawl_url)
+    job = CrawlJob(url='https://example.com')
+    with patch.object(manager, 'get_job', new_callable=AsyncMock) as mock_get:
+        assert await manager.start_job(job)
+        await asyncio.sleep(0.01)
+        assert await manager.cancel_job(job.id)
+        mock_get.assert_not_called()
+
+    assert job.status == CrawlStatus.CANCELLED
+    assert job.id not in manager._active_job_objects
+    manager._crawl_service = None
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_resume_restarts_running_jobs_from_fetched_rows():
+    supabase = MagicMock()
+    manager = CrawlJobManager(supabase_client=supabase)
+    running = CrawlJob(url='https://example.com/running', status=CrawlStatus.RUNNING)
+    pending = CrawlJob(url='https://example.com/pending')
+    query = supabase.table.return_value.select.return_value.in_.return_value
+    query.execute.return_value = MagicMock(data=[
+        {**running.to_dict(), 'config': '{}'},
+        {**pending.to_dict(), 'config': '{}'},
+    ])
+
+    with patch.object(manager, 'get_job', new_callable=AsyncMock) as mock_get, \
+         patch.object(manager, '_execute_job', new_callable=AsyncMock) as mock_execute:
+        await manager._resume_pending_jobs()
+        await asyncio.gather(*manager._active_jobs.values())
+
+    mock_get.assert_not_called()
+    assert [call.args[0].id for call in mock_execute.call_args_list] == [running.id]
+
+
+@pytest.mark.asyncio
+async def test_persisted_content_is_registered_with_deduplicator(tmp_path):
+    from crawl4ai_source.deduplicator import ContentDeduplicator, sha256_hex
+
+    supabase = MagicMock()
+    dedup = ContentDeduplicator(supabase, local_index_path=str(tmp_path / 'dedup.sqlite'), min_content_length=0)
+    dedup._local.mark_hydrated()
+    manager = CrawlJobManager(supabase_client=supabase, deduplicator=dedup)
+    result = CrawlResult(
+        url='https://example.com/page', content='fresh body', title='Page', content_hash=sha256_hex('fresh body')
+    )
+
+    with patch.object(manager, '_write', new_callable=AsyncMock):
+        await manager._persist_crawl_result('job-6', result)
+
+    # Answered by the hydrated local index, without a Supabase query
+    supabase.table.reset_mock()
+    fingerprint = dedup.create_fingerprint('https://example.com/page', 'fresh body', 'Page')
+    assert await dedup.is_duplicate(fingerprint)
+    supabase.table.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_persisted_row_carries_url_and_title_hashes():
+    from crawl4ai_source.deduplicator import ContentDeduplicator
+
+    manager = CrawlJobManager(supabase_client=MagicMock())
+    result = CrawlResult(url='https://Example.com/page/?utm_source=x', content='body', title=' Page ')
+
+    with patch.object(manager, '_write', new_callable=AsyncMock) as mock_write:
+        await manager._persist_crawl_result('job-7', result)
+
+    row = mock_write.call_args.args[1]
+    fingerprint = ContentDeduplicator(MagicMock()).create_fingerprint(result.url, result.content, result.title)
+    assert row['url_hash'] == fingerprint.url_hash
+    assert fingerprint.title_hash is not None
+    assert row['title_hash'] == fingerprint.title_hash
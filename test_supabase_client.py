@@ -0,0 +1,69 @@
+"""
+Tests for the Supabase helpers in supabase_client.py.
+
+The Supabase client is mocked, or backed by a real PostgREST query builder
+over a mock HTTP transport; no Supabase project is needed.
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import httpx
+import numpy as np
+import pytest
+from postgrest import SyncPostgrestClient
+
+import supabase_client
+
+
+@pytest.fixture(scope="module")
+def embedding():
+    """A deterministic 1536-dim float32 embedding, generated once."""
+    return np.random.default_rng(42).random(1536, dtype=np.float32).tolist()
+
+
+def test_vector_literal_round_trips_float4(embedding):
+    literal = supabase_client._vector_literal(embedding)
+
+    assert literal.startswith("[") and literal.endswith("]")
+    parsed = np.array(literal[1:-1].split(","), dtype=np.float32)
+    assert np.array_equal(parsed, np.array(embedding, dtype=np.float32))
+
+
+def test_documents_are_inserted_in_one_request():
+    client = MagicMock()
+    with patch.object(supabase_client, "supabase", client):
+        supabase_client.add_documents_to_supabase([
+            {"text": "a", "metadata": {"chunk_index": 0}, "embedding": [0.5, 0.25]},
+            {"text": "b"},
+        ])
+
+    client.table.assert_called_once_with("documents")
+    insert = client.table.return_value.insert
+    insert.return_value.execute.assert_called_once_with()
+    rows = insert.call_args[0][0]
+    assert rows == [
+        {"text": "a", "metadata": {"chunk_index": 0}, "embedding": "[0.5,0.25]"},
+        {"text": "b", "metadata": {}, "embedding": {}},
+    ]
+
+
+def test_insert_runs_on_the_real_query_builder():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        rows = json.loads(request.content)
+        return httpx.Response(201, json=[{"id": i + 1, **row} for i, row in enumerate(rows)])
+
+    postgrest = SyncPostgrestClient(
+        "http://postgrest.test", http_client=httpx.Client(transport=httpx.MockTransport(handler))
+    )
+    client = MagicMock(table=postgrest.from_)
+    with patch.object(supabase_client, "supabase", client):
+        response = supabase_client.add_documents_to_supabase([{"text": "a"}, {"text": "b"}])
+
+    assert [row["id"] for row in response.data] == [1, 2]
+    (request,) = requests
+    assert request.method == "POST" and request.url.path == "/documents"
+    assert "return=representation" in request.headers["prefer"]
@@ -0,0 +1,34 @@
+"""
+Text chunking shared by /ingest and the crawl manager.
+
+Documents are embedded in chunks of roughly 1000 tokens, INGEST_EMBED_BATCH
+chunks per embedding call and insert.
+"""
+
+INGEST_CHUNK_CHARS = 4000
+INGEST_EMBED_BATCH = 8
+
+
+def iter_text_chunks(segments, chunk_chars: int = INGEST_CHUNK_CHARS, sep: str = "\n"):
+    """Regroup text segments (e.g. PDF pages) into chunks of about chunk_chars.
+
+    Segments are joined with sep; only the chunk being built is held in
+    memory, so the whole document is never materialized as one string.
+    """
+    buf: list[str] = []
+    size = 0
+    for segment in segments:
+        if buf and sep:
+            buf.append(sep)
+            size += len(sep)
+        while segment:
+            piece = segment[:chunk_chars - size]
+            segment = segment[len(piece):]
+            buf.append(piece)
+            size += len(piece)
+            if size >= chunk_chars:
+                yield "".join(buf)
+                buf.clear()
+                size = 0
+    if buf:
+        yield "".join(buf)